@@ -0,0 +1,172 @@
+# backends.py
+### QUERY BACKENDS UNDER db.fetch_arrow / db.fetch_df
+#   SnowflakeBackend – production: pooled Snowflake connections (db.get_pool)
+#   DuckDBBackend    – offline dev/benchmarks: local DuckDB file with fixture tables shaped
+#                      like RAW.RSS_ARTICLES / MART.TWEET_MEDIA (see dev_fixtures.py)
+# Selected with DB_BACKEND=snowflake|duckdb; page SQL is passed through unchanged
+# apart from the small dialect shim below.
+from __future__ import annotations
+import re, threading, time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import pyarrow as pa
+
+
+class Backend:
+    name = "?"
+
+    def execute_arrow(self, sql: str, params: Optional[dict] = None,
+                      tag: Optional[str] = None) -> Tuple[pa.Table, Optional[str]]:
+        """Run `sql` (Snowflake dialect, pyformat params) → (Arrow table, query id or None)."""
+        raise NotImplementedError
+
+    def iter_arrow(self, sql: str, params: Optional[dict] = None, tag: Optional[str] = None,
+                   cancel: Optional[threading.Event] = None) -> Iterator[pa.Table]:
+        """
+        Stream `sql` as Arrow chunks in result order, holding one connection until the
+        iterator is exhausted or closed. Setting `cancel` aborts the statement (while it runs)
+        or stops fetching further chunks (raises FetchCancelled).
+        """
+        raise NotImplementedError
+
+    def execute(self, sql: str, params: Optional[dict] = None, tag: Optional[str] = None) -> Tuple[int, Optional[str]]:
+        """Run a DDL/DML statement → (rows affected, query id or None)."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class FetchCancelled(RuntimeError):
+    pass
+
+
+class SnowflakeBackend(Backend):
+    name = "snowflake"
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def execute_arrow(self, sql, params=None, tag=None):
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            try:
+                # QUERY_TAG lets Snowflake's QUERY_HISTORY attribute warehouse time to a page/widget
+                cur.execute(sql, params or {}, _statement_params={"QUERY_TAG": tag[:2000]} if tag else None)
+                # concat_tables only stitches the batch buffers together (no row copy)
+                tables = list(cur.fetch_arrow_batches())
+                if tables:
+                    return pa.concat_tables(tables), cur.sfqid
+                empty = pa.table({d[0]: pa.array([], pa.null()) for d in cur.description or []})
+                return empty, cur.sfqid
+            finally:
+                cur.close()
+
+    def execute(self, sql, params=None, tag=None):
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute(sql, params or {}, _statement_params={"QUERY_TAG": tag[:2000]} if tag else None)
+                return max(cur.rowcount or 0, 0), cur.sfqid
+            finally:
+                cur.close()
+
+    def iter_arrow(self, sql, params=None, tag=None, cancel=None, poll_s: float = 0.25):
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            try:
+                # async submit + poll, so a cancel can abort a statement that is still running
+                cur.execute_async(sql, params or {}, _statement_params={"QUERY_TAG": tag[:2000]} if tag else None)
+                qid = cur.sfqid
+                while conn.is_still_running(conn.get_query_status_throw_if_error(qid)):
+                    if cancel is not None and cancel.is_set():
+                        cur.abort_query(qid)
+                        raise FetchCancelled(qid)
+                    time.sleep(poll_s)
+                cur.get_results_from_sfqid(qid)
+                # result chunks are downloaded lazily, one at a time
+                for tbl in cur.fetch_arrow_batches():
+                    if cancel is not None and cancel.is_set():
+                        raise FetchCancelled(qid)
+                    yield tbl
+            finally:
+                cur.close()
+
+
+# --- DuckDB ----------------------------------------------------------------
+
+# Snowflake functions DuckDB lacks, defined per connection as macros so page SQL runs as-is.
+# ILIKE, COALESCE, NULLS LAST, LIMIT/OFFSET and GROUPING SETS are native in DuckDB.
+_MACROS = [
+    """CREATE OR REPLACE TEMP MACRO TRY_TO_TIMESTAMP_TZ(x) AS COALESCE(
+        TRY_CAST(x AS TIMESTAMPTZ),
+        TRY_STRPTIME(x, '%a, %d %b %Y %H:%M:%S %z'),
+        TRY_STRPTIME(x, '%a, %d %b %Y %H:%M:%S %Z'),
+        TRY_STRPTIME(x, '%Y-%m-%d %H:%M:%S %z')),
+        -- explicit-format form: only the RFC-2822 format normalize.py uses
+        (x, fmt) AS TRY_STRPTIME(x, '%a, %d %b %Y %H:%M:%S %z')""",
+    "CREATE OR REPLACE TEMP MACRO TO_TIMESTAMP_TZ(x) AS TRY_TO_TIMESTAMP_TZ(x)",
+]
+
+_pyformat = re.compile(r"%\((\w+)\)s")
+_nextval = re.compile(r"\b([\w.]+)\.NEXTVAL\b", re.IGNORECASE)
+
+def translate_sql(sql: str, params: Optional[dict] = None) -> Tuple[str, Dict[str, Any]]:
+    """Snowflake pyformat → DuckDB named params: %(name)s → $name, %% → %; seq.NEXTVAL → nextval('seq')."""
+    used = _pyformat.findall(sql)
+    out = _pyformat.sub(lambda m: "$" + m.group(1), sql)
+    out = _nextval.sub(lambda m: f"nextval('{m.group(1)}')", out)
+    if params:
+        out = out.replace("%%", "%")
+    # DuckDB rejects parameters the statement doesn't reference
+    return out, {k: v for k, v in (params or {}).items() if k in used}
+
+
+class DuckDBBackend(Backend):
+    name = "duckdb"
+
+    def __init__(self, path: str, catalog: str = "SNACKLASH2", read_only: bool = False):
+        import duckdb  # optional dependency; only needed when DB_BACKEND=duckdb
+        self.catalog = catalog
+        self._root = duckdb.connect()
+        self._root.execute(f"ATTACH '{path}' AS {catalog}" + (" (READ_ONLY)" if read_only else ""))
+        self._local = threading.local()
+
+    def _new_cursor(self):
+        cur = self._root.cursor()
+        cur.execute(f"USE {self.catalog}")
+        for m in _MACROS:
+            cur.execute(m)
+        return cur
+
+    def cursor(self):
+        # DuckDB connections aren't thread-safe; each thread gets its own cursor on the same db
+        cur = getattr(self._local, "cur", None)
+        if cur is None:
+            cur = self._local.cur = self._new_cursor()
+        return cur
+
+    def execute_arrow(self, sql, params=None, tag=None):
+        q, p = translate_sql(sql, params)
+        return self.cursor().execute(q, p).fetch_arrow_table(), None
+
+    def execute(self, sql, params=None, tag=None):
+        q, p = translate_sql(sql, params)
+        row = self.cursor().execute(q, p).fetchone()  # DML returns its row count; DDL nothing
+        return (int(row[0]) if row else 0), None
+
+    def iter_arrow(self, sql, params=None, tag=None, cancel=None, batch_rows: int = 100_000):
+        q, p = translate_sql(sql, params)
+        # own cursor: the stream may be consumed while this thread runs other queries
+        cur = self._new_cursor()
+        try:
+            reader = cur.execute(q, p).fetch_record_batch(batch_rows)
+            for batch in reader:
+                if cancel is not None and cancel.is_set():
+                    raise FetchCancelled()
+                yield pa.Table.from_batches([batch])
+        finally:
+            cur.close()
+
+    def close(self):
+        self._root.close()
@@ -0,0 +1,132 @@
+# cache_scopes.py
+### SCOPED CACHE INVALIDATION
+# st.cache_data.clear() drops every entry of every page for every session at once (and the
+# next runs all go to Snowflake / Playwright together). Here every cached thing has a
+# namespace instead, and a refresh names the ones it means:
+#   query results       the queries.py name they came from ("tweets.count", "news.page", …)
+#   st.cache_data fns   a name registered with on_invalidate ("render.tweet_images", …)
+# invalidate(["tweets.*"]) bumps a generation per pattern. Generations live in the shared
+# cache, so every process sees them within probe_s and folds them into cache versions:
+#   this process     matching in-process entries are dropped → one coalesced reload each
+#   other processes  matching entries turn stale → served once more while ONE refresh runs
+# A pattern invalidated less than debounce_s ago is skipped (it is already fresh) unless the
+# caller knows the data changed (force=True, e.g. normalize.py), and RefreshLimiter caps how
+# often one user may ask.
+from __future__ import annotations
+import json, threading, time
+from fnmatch import fnmatchcase
+from typing import Callable, Dict, Iterable, List, MutableMapping, Optional, Tuple
+
+STORE_KEY = "__cache_scopes__"  # shared-cache key the generations are kept under
+
+# namespace → clear functions (st.cache_data functions register themselves at import)
+_HOOKS: Dict[str, List[Callable[[], None]]] = {}
+_hooks_lock = threading.Lock()
+
+
+def on_invalidate(namespace: str, clear: Callable[[], None]) -> None:
+    """Call `clear` when a pattern matching `namespace` is invalidated (e.g. an st.cache_data fn's .clear)."""
+    with _hooks_lock:
+        _HOOKS.setdefault(namespace, []).append(clear)
+
+def matches(namespace: Optional[str], pattern: str) -> bool:
+    # "news.*" covers "news.page" and "news.sources.filled"; "news" alone only itself
+    return namespace is not None and fnmatchcase(namespace, pattern)
+
+
+class CacheScopes:
+    def __init__(self, load: Callable[[], Optional[bytes]], save: Callable[[bytes], None],
+                 evict: Callable[[str], int], probe_s: float = 5, debounce_s: float = 30):
+        # load/save: the generations blob in the shared cache; evict(pattern) drops this
+        # process's in-memory entries whose namespace matches → count
+        self._load = load
+        self._save = save
+        self._evict = evict
+        self.probe_s = float(probe_s)
+        self.debounce_s = float(debounce_s)
+        self._gens: Dict[str, Tuple[int, float]] = {}   # pattern → (generation, invalidated at, epoch s)
+        self._versions: Dict[Optional[str], str] = {}   # namespace → version suffix (for these gens)
+        self._probed_at = 0.0
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict[str, Tuple[int, float]]:
+        try:
+            blob = self._load()
+            return {p: (int(g), float(at)) for p, (g, at) in json.loads(blob).items()} if blob else {}
+        except Exception:
+            return dict(self._gens)  # keep the last known generations
+
+    def _refresh(self, force: bool = False) -> Dict[str, Tuple[int, float]]:
+        with self._lock:
+            if not force and time.monotonic() - self._probed_at < self.probe_s:
+                return self._gens
+        gens = self._read()
+        with self._lock:
+            if gens != self._gens:
+                self._gens, self._versions = gens, {}
+            self._probed_at = time.monotonic()
+            return self._gens
+
+    def version(self, namespace: Optional[str]) -> str:
+        """Generation suffix for a namespace's cache versions ("" if nothing matching was ever invalidated)."""
+        gens = self._refresh()
+        with self._lock:
+            v = self._versions.get(namespace)
+            if v is None:
+                v = ",".join(f"{p}#{g}" for p, (g, _) in sorted(gens.items()) if matches(namespace, p))
+                self._versions[namespace] = v
+            return v
+
+    def invalidate(self, patterns: Iterable[str], force: bool = False) -> Dict[str, List[str]]:
+        """→ {"invalidated": [...], "debounced": [...]} patterns (force: never debounced)."""
+        now = time.time()
+        gens = dict(self._refresh(force=True))
+        done, skipped = [], []
+        for p in dict.fromkeys(patterns):
+            g, at = gens.get(p, (0, 0.0))
+            if not force and now - at < self.debounce_s:
+                skipped.append(p)
+                continue
+            gens[p] = (g + 1, now)
+            done.append(p)
+        if not done:
+            return {"invalidated": [], "debounced": skipped}
+        try:
+            self._save(json.dumps(gens).encode("utf-8"))
+        except Exception:
+            pass  # still applies to this process
+        with self._lock:
+            self._gens, self._versions = gens, {}
+            self._probed_at = time.monotonic()
+        for p in done:
+            self._evict(p)
+            with _hooks_lock:
+                hooks = [fn for ns, fns in _HOOKS.items() if matches(ns, p) for fn in fns]
+            for fn in hooks:
+                try:
+                    fn()
+                except Exception:
+                    pass
+        return {"invalidated": done, "debounced": skipped}
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {p: {"generation": g, "invalidated_at": at} for p, (g, at) in self._refresh().items()}
+
+
+class RefreshLimiter:
+    """At most `max_calls` manual refreshes per `window_s` for one user (state: their session)."""
+
+    def __init__(self, max_calls: int = 3, window_s: float = 300, key: str = "_manual_refreshes"):
+        self.max_calls = int(max_calls)
+        self.window_s = float(window_s)
+        self.key = key
+
+    def take(self, state: MutableMapping) -> Optional[float]:
+        """Record one refresh → None if allowed, else seconds until the next one is."""
+        now = time.time()
+        recent = [t for t in state.get(self.key, []) if now - t < self.window_s]
+        if len(recent) >= self.max_calls:
+            state[self.key] = recent
+            return self.window_s - (now - recent[0])
+        state[self.key] = recent + [now]
+        return None
@@ -14,6 +14,16 @@ def _maybe_load_dotenv() -> None:
     except Exception:
         pass
 
+def setting(key: str, default: Any = None) -> Any:
+    # Optional tuning knobs (pool size, cache dirs, ...): Streamlit secrets → env → default
+    try:
+        import streamlit as st
+        if getattr(st, "secrets", None) and key in st.secrets:
+            return st.secrets[key]
+    except Exception:
+        pass
+    return os.getenv(key, default)
+
 def load_config() -> Dict[str, Any]:
     # 1) Streamlit secrets (works w/ .streamlit/secrets.toml locally)
     try:
@@ -1,13 +1,43 @@
 # db.py
 import pandas as pd
+import pyarrow as pa
 import streamlit as st
 import snowflake.connector
 from cryptography.hazmat.primitives import serialization
 import base64
-from config import load_config
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple, Union
+from config import load_config, setting
+from db_pool import ConnectionPool
+from backends import Backend, DuckDBBackend, FetchCancelled, SnowflakeBackend  # noqa: F401
+from cache_scopes import STORE_KEY, CacheScopes, RefreshLimiter, matches
+from result_cache import LocalCache, SharedCache, cache_key, ipc_to_table, make_shared_cache, table_to_ipc
+from watermarks import WatermarkRegistry, default_registry
+from queries import CACHE_NONE, CACHE_WATERMARK, CachePolicy
+from queries import get as get_query
+from queries import bind as bind_query
+from queries import name_for
+from queries import in_list
+from search_index import ArticleIndex
+from query_log import QueryLog, current_tag, query_tag, set_tag  # noqa: F401  (query_tag re-exported for pages)
 
-@st.cache_resource
-def get_conn():
+QUERY_CACHE_TTL_S = float(setting("QUERY_CACHE_TTL_S", 300))           # tables without a watermark
+QUERY_CACHE_MAX_AGE_S = float(setting("QUERY_CACHE_MAX_AGE_S", 86400))  # safety net for watermarked ones
+WATERMARK_PROBE_S = float(setting("WATERMARK_PROBE_S", 60))
+FETCH_BATCH_ROWS = int(setting("FETCH_BATCH_ROWS", 50_000))            # fetch_batches chunk bounds
+FETCH_BATCH_MB = float(setting("FETCH_BATCH_MB", 32))
+PREFETCH_WORKERS = int(setting("PREFETCH_WORKERS", 2))                 # speculative loads (db.prefetch)
+REFRESH_DEBOUNCE_S = float(setting("REFRESH_DEBOUNCE_S", 30))          # invalidate(): skip scopes refreshed this recently
+REFRESH_MAX_PER_USER = int(setting("REFRESH_MAX_PER_USER", 3))         # manual refreshes per session …
+REFRESH_WINDOW_S = float(setting("REFRESH_WINDOW_S", 300))             # … per this many seconds
+
+_tls = threading.local()  # per-thread: last Snowflake query id / where a load was served from
+
+def _connect():
     cfg = load_config()
     key = serialization.load_pem_private_key(
         base64.b64decode(cfg["PRIVATE_KEY_PEM_B64"]),
@@ -28,12 +58,402 @@ def get_conn():
         client_session_keep_alive=True,
     )
 
-@st.cache_data(ttl=300)
-def fetch_df(sql: str, params=None) -> pd.DataFrame:
-    conn = get_conn()
-    cur = conn.cursor()
+@st.cache_resource
+def get_pool() -> ConnectionPool:
+    # one pool per server process, shared by every session
+    return ConnectionPool(
+        _connect,
+        size=int(setting("SNOWFLAKE_POOL_SIZE", 4)),
+        max_idle_s=float(setting("SNOWFLAKE_POOL_MAX_IDLE_S", 600)),
+        health_check_s=float(setting("SNOWFLAKE_POOL_HEALTH_CHECK_S", 60)),
+        checkout_timeout_s=float(setting("SNOWFLAKE_POOL_TIMEOUT_S", 30)),
+    )
+
+@contextmanager
+def get_conn():
+    # checkout → yield → checkin; use as `with get_conn() as conn:`
+    with get_pool().connection() as conn:
+        yield conn
+
+@st.cache_resource
+def get_backend() -> Backend:
+    # DB_BACKEND=snowflake (default) | duckdb (offline fixtures, see dev_fixtures.py)
+    kind = str(setting("DB_BACKEND", "snowflake")).lower()
+    if kind == "duckdb":
+        path = Path(setting("DUCKDB_PATH", "~/.cache/snacklash/dev.duckdb")).expanduser()
+        catalog = setting("DUCKDB_CATALOG", "SNACKLASH2")
+        if not path.exists():
+            from dev_fixtures import seed
+            seed(str(path), rows=int(setting("DUCKDB_SYNTHETIC_ROWS", 10000)), catalog=catalog)
+        return DuckDBBackend(str(path), catalog)
+    if kind != "snowflake":
+        raise ValueError(f"Unknown DB_BACKEND: {kind!r}")
+    return SnowflakeBackend(get_pool())
+
+def _execute_arrow(sql: str, params=None, tag: Optional[str] = None) -> pa.Table:
+    tbl, _tls.query_id = get_backend().execute_arrow(sql, params, tag)
+    return tbl
+
+@st.cache_resource
+def get_shared_cache() -> SharedCache:
+    # QUERY_CACHE_BACKEND=sqlite (default, local disk) | redis | none
+    return make_shared_cache(
+        setting("QUERY_CACHE_BACKEND", "sqlite"),
+        path=setting("QUERY_CACHE_PATH"),
+        url=setting("QUERY_CACHE_REDIS_URL", "redis://localhost:6379/0"),
+        max_mb=setting("QUERY_CACHE_MAX_MB", 512),
+    )
+
+def _shared_get(key: str):
+    try:
+        blob = get_shared_cache().get(key)
+        return ipc_to_table(blob) if blob is not None else None
+    except Exception:
+        return None  # the shared cache is an optimization; never fail a page over it
+
+def _shared_set(key: str, tbl: pa.Table, ttl_s: float) -> None:
+    try:
+        get_shared_cache().set(key, table_to_ipc(tbl), ttl_s)
+    except Exception:
+        pass
+
+@st.cache_resource
+def get_watermarks() -> WatermarkRegistry:
+    # register more with get_watermarks().register("SCHEMA.TABLE", fq_table, ts_column);
+    # client_db is the database News Coverage reads (page3_news)
+    return default_registry(_execute_arrow, WATERMARK_PROBE_S, setting("client_db", "SNACKLASH2"))
+
+def _version_for(sql: str, cache: CachePolicy = CACHE_WATERMARK) -> str:
+    # watermark token if every table the query reads is registered, else a TTL time bucket;
+    # plus the generation of any invalidated scope the query's name falls under
+    scope = get_cache_scopes().version(name_for(sql))
+    scope = f"|{scope}" if scope else ""
+    if cache == CACHE_WATERMARK:
+        token = get_watermarks().token_for(sql)
+        if token is not None:
+            return "wm:" + token + scope
+        ttl = QUERY_CACHE_TTL_S
+    else:
+        ttl = float(cache)
+    return f"ttl{ttl:g}:{int(time.time() // ttl)}" + scope
+
+@st.cache_resource
+def get_query_log() -> QueryLog:
+    # QUERY_LOG_PATH="" keeps events in memory only
+    return QueryLog(
+        capacity=int(setting("QUERY_LOG_CAPACITY", 2000)),
+        path=setting("QUERY_LOG_PATH", "~/.cache/snacklash/query_log.jsonl"),
+        max_file_mb=float(setting("QUERY_LOG_MAX_MB", 50)),
+    )
+
+@st.cache_resource
+def get_local_cache() -> LocalCache:
+    return LocalCache(
+        max_entries=int(setting("QUERY_CACHE_MAX_ENTRIES", 256)),
+        max_stale_s=QUERY_CACHE_MAX_AGE_S,
+    )
+
+@st.cache_resource
+def get_cache_scopes() -> CacheScopes:
+    # generations are shared through the shared cache tier (with QUERY_CACHE_BACKEND=none:
+    # this process only, which is also all the caching there is)
+    def load():
+        try:
+            return get_shared_cache().get(STORE_KEY)
+        except Exception:
+            return None
+
+    def save(blob: bytes):
+        get_shared_cache().set(STORE_KEY, blob, 10 * QUERY_CACHE_MAX_AGE_S)  # outlives any entry
+
+    return CacheScopes(load, save,
+                       evict=lambda pattern: get_local_cache().evict(lambda tag: matches(tag, pattern)),
+                       probe_s=float(setting("CACHE_SCOPE_PROBE_S", 5)), debounce_s=REFRESH_DEBOUNCE_S)
+
+def invalidate(*patterns: str, force: bool = False) -> Dict[str, list]:
+    """
+    Scoped replacement for st.cache_data.clear(): drop cached results whose queries.py name
+    matches a pattern ("tweets.*", "news.page", "render.*") in every process, and clear the
+    st.cache_data functions registered under one (cache_scopes.on_invalidate).
+    force=True skips the debounce (writers that just changed the data).
+    → {"invalidated": [...], "debounced": [...]}
+    """
+    return get_cache_scopes().invalidate(patterns, force=force)
+
+def scope_version(namespace: str) -> str:
+    # for st.cache_data functions: pass it as an argument so an invalidation reaches every process
+    return get_cache_scopes().version(namespace)
+
+_refresh_limiter = RefreshLimiter(REFRESH_MAX_PER_USER, REFRESH_WINDOW_S)
+
+def manual_refresh(*patterns: str) -> Optional[float]:
+    """
+    invalidate() behind a "Refresh" button: rate-limited per session → None if it ran,
+    else seconds until this user may refresh again.
+    """
+    wait = _refresh_limiter.take(st.session_state)
+    if wait is not None:
+        return wait
+    invalidate(*patterns)
+    return None
+
+def fetch_arrow(sql: str, params=None, cache: CachePolicy = CACHE_WATERMARK) -> pa.Table:
+    """
+    Result as a pyarrow.Table. Cache hits hand back the same immutable Table
+    (never pickled), so a hit costs no copy; convert with `.to_pandas()` only
+    where a DataFrame is really needed.
+    Results stay cached until a watermark of a table they read advances
+    (see watermarks.py); queries on unregistered tables fall back to QUERY_CACHE_TTL_S.
+    Once outdated, the previous result is served while one background refresh runs,
+    and concurrent misses on the same query share a single Snowflake execution.
+    `cache` is the policy a queries.py entry declares: watermark (default), TTL seconds, or none.
+    """
+    tag = current_tag()
+    t0 = time.perf_counter()
+    if cache == CACHE_NONE:
+        return _fetch_uncached(sql, params, tag, t0)
+    version = _version_for(sql, cache)
+    caller = threading.get_ident()
+    _tls.load = None
     try:
-        cur.execute(sql, params or {})
-        return cur.fetch_pandas_all()   # ← no pandas/sqlalchemy warning
+        tbl, status = get_local_cache().get(
+            cache_key(sql, params), version, lambda: _load_arrow(sql, params, version, tag, caller),
+            tag=name_for(sql),
+        )
+    except Exception as exc:
+        get_query_log().record(sql, "error", (time.perf_counter() - t0) * 1000, tag, error=repr(exc)[:500])
+        raise
+    load = _tls.load or {}
+    if status == "miss" and load.get("source") == "shared":
+        status = "shared"
+    get_query_log().record(sql, status, (time.perf_counter() - t0) * 1000, tag,
+                           rows=tbl.num_rows, nbytes=tbl.nbytes, query_id=load.get("query_id"))
+    return tbl
+
+def _fetch_uncached(sql: str, params, tag: str, t0: float) -> pa.Table:
+    _tls.query_id = None
+    try:
+        tbl = _execute_arrow(sql, params, tag)
+    except Exception as exc:
+        get_query_log().record(sql, "error", (time.perf_counter() - t0) * 1000, tag, error=repr(exc)[:500])
+        raise
+    get_query_log().record(sql, "bypass", (time.perf_counter() - t0) * 1000, tag,
+                           rows=tbl.num_rows, nbytes=tbl.nbytes, query_id=_tls.query_id)
+    return tbl
+
+def _load_arrow(sql: str, params, version: str, tag: Optional[str] = None, caller: Optional[int] = None) -> pa.Table:
+    # local miss → shared cache (other processes/replicas) → Snowflake
+    t0 = time.perf_counter()
+    key = cache_key(sql, params, version)
+    tbl = _shared_get(key)
+    load = {"source": "shared", "query_id": None}
+    if tbl is None:
+        _tls.query_id = None
+        tbl = _execute_arrow(sql, params, tag)
+        load = {"source": "warehouse", "query_id": _tls.query_id}
+        ttl = QUERY_CACHE_MAX_AGE_S if version.startswith("wm:") else QUERY_CACHE_TTL_S
+        _shared_set(key, tbl, ttl)
+    if caller is not None and threading.get_ident() != caller:
+        # background stale-while-revalidate refresh: nobody else will log it
+        get_query_log().record(sql, "refresh", (time.perf_counter() - t0) * 1000, tag,
+                               rows=tbl.num_rows, nbytes=tbl.nbytes, query_id=load["query_id"])
+    else:
+        _tls.load = load
+    return tbl
+
+def prime(sql: str, params, tbl: pa.Table, cache: CachePolicy = CACHE_WATERMARK) -> None:
+    """Seed the cache for (sql, params) with a result computed by another statement."""
+    if cache == CACHE_NONE:
+        return
+    version = _version_for(sql, cache)
+    get_local_cache().put(cache_key(sql, params), version, tbl, tag=name_for(sql))
+    _shared_set(cache_key(sql, params, version), tbl,
+                QUERY_CACHE_MAX_AGE_S if version.startswith("wm:") else QUERY_CACHE_TTL_S)
+
+def peek(sql: str, params=None, cache: CachePolicy = CACHE_WATERMARK) -> Optional[pa.Table]:
+    """Cached result for (sql, params), possibly one version behind; never runs the query."""
+    if cache == CACHE_NONE:
+        return None
+    t0 = time.perf_counter()
+    key = cache_key(sql, params)
+    tbl, status = get_local_cache().peek(key), "hit"
+    if tbl is None:
+        version = _version_for(sql, cache)
+        tbl, status = _shared_get(cache_key(sql, params, version)), "shared"
+        if tbl is not None:
+            get_local_cache().put(key, version, tbl, tag=name_for(sql))
+    if tbl is not None:
+        get_query_log().record(sql, status, (time.perf_counter() - t0) * 1000, current_tag(),
+                               rows=tbl.num_rows, nbytes=tbl.nbytes)
+    return tbl
+
+def fetch_df(sql: str, params=None, cache: CachePolicy = CACHE_WATERMARK) -> pd.DataFrame:
+    # pandas view over the shared Arrow cache; each caller gets its own mutable copy
+    return fetch_arrow(sql, params, cache).to_pandas()
+
+def fetch_query(name: str, params: Optional[dict] = None, as_arrow: bool = False, **fragments: str):
+    """Run a named queries.py entry with its declared cache policy."""
+    sql, bound, cache = get_query(name).spec(params, **fragments)
+    return fetch_arrow(sql, bound, cache) if as_arrow else fetch_df(sql, bound, cache)
+
+def execute(sql: str, params=None) -> int:
+    """Run a DDL/DML statement (never cached) → rows affected."""
+    tag = current_tag()
+    t0 = time.perf_counter()
+    try:
+        n, query_id = get_backend().execute(sql, params, tag)
+    except Exception as exc:
+        get_query_log().record(sql, "error", (time.perf_counter() - t0) * 1000, tag, error=repr(exc)[:500])
+        raise
+    get_query_log().record(sql, "bypass", (time.perf_counter() - t0) * 1000, tag, rows=n, query_id=query_id)
+    return n
+
+
+# --- local search index ----------------------------------------------------
+
+@st.cache_resource
+def _search_index(fqt: str) -> ArticleIndex:
+    base = Path(setting("SEARCH_INDEX_DIR", "~/.cache/snacklash")).expanduser()
+    safe = "".join(c if c.isalnum() else "_" for c in fqt.lower())
+
+    def delta(since: str):
+        from normalize import ROW_KEY_SQL, published_at_sql
+        sql, params = bind_query("search.delta", {"since": since}, fqt=fqt, row_key=ROW_KEY_SQL,
+                                 published_at=published_at_sql(fqt))
+        return fetch_batches(sql, params, as_arrow=True)
+
+    def published(guids):
+        from normalize import ROW_KEY_SQL, published_at_sql
+        frag, params = in_list(guids, "g")
+        return fetch_arrow(*bind_query("search.published", params, fqt=fqt, guids=frag, row_key=ROW_KEY_SQL,
+                                       published_at=published_at_sql(fqt)), CACHE_NONE)
+
+    def keys():
+        from normalize import ROW_KEY_SQL
+        return fetch_batches(*bind_query("search.keys", fqt=fqt, row_key=ROW_KEY_SQL), as_arrow=True)
+
+    def rows(guids):
+        from normalize import ROW_KEY_SQL, published_at_sql
+        frag, params = in_list(guids, "g")
+        return fetch_batches(*bind_query("search.rows", params, fqt=fqt, guids=frag, row_key=ROW_KEY_SQL,
+                                         published_at=published_at_sql(fqt)), as_arrow=True)
+    return ArticleIndex(str(base / f"search_{safe}.sqlite"), delta=delta, published=published, keys=keys,
+                        rows=rows, reconcile_s=float(setting("SEARCH_INDEX_RECONCILE_S", 3600)))
+
+def get_search_index(fqt: str, wait: bool = False) -> ArticleIndex:
+    """
+    FTS5 index over `fqt` (an RSS_ARTICLES table). Kicks off a background sync when the
+    table's watermark moved; wait=True syncs in the calling thread instead (warm-up).
+    """
+    idx = _search_index(fqt)
+    if wait:
+        idx.sync()
+    else:
+        idx.refresh_async(get_watermarks().token_for(fqt), max_age_s=float(setting("SEARCH_INDEX_SYNC_S", 300)))
+    return idx
+
+
+# --- streaming -------------------------------------------------------------
+
+def fetch_batches(sql: str, params=None, as_arrow: bool = False, batch_rows: Optional[int] = None,
+                  batch_mb: Optional[float] = None, cancel: Optional[threading.Event] = None) -> Iterator:
+    """
+    Stream a large result as bounded chunks: DataFrames (or pyarrow Tables with as_arrow=True)
+    of at most `batch_rows` rows and roughly `batch_mb` MB each, in result order.
+    Nothing is cached and only the current warehouse chunk is held, so peak memory stays flat
+    however many rows the query returns. The generator keeps one pooled connection until it is
+    exhausted or closed; `cancel.set()` from another thread aborts it (raises FetchCancelled).
+    """
+    tag = current_tag()  # resolved now: the body only runs on the first next()
+    return _stream(sql, params, tag, as_arrow, int(batch_rows or FETCH_BATCH_ROWS),
+                   int(float(batch_mb or FETCH_BATCH_MB) * 1024 * 1024), cancel)
+
+def _bounded(tbl: pa.Table, max_rows: int, max_bytes: int) -> Iterator[pa.Table]:
+    # zero-copy slices, sized by the chunk's average row width
+    if tbl.num_rows == 0:
+        return
+    per_row = max(1, tbl.nbytes // tbl.num_rows)
+    step = max(1, min(max_rows, max_bytes // per_row))
+    for start in range(0, tbl.num_rows, step):
+        yield tbl.slice(start, step)
+
+def _stream(sql: str, params, tag: str, as_arrow: bool, max_rows: int, max_bytes: int,
+            cancel: Optional[threading.Event]) -> Iterator:
+    t0 = time.perf_counter()
+    rows = nbytes = 0
+    status, error = "stream", None
+    try:
+        for tbl in get_backend().iter_arrow(sql, params, tag, cancel):
+            for piece in _bounded(tbl, max_rows, max_bytes):
+                if cancel is not None and cancel.is_set():
+                    raise FetchCancelled()
+                rows += piece.num_rows
+                nbytes += piece.nbytes
+                yield piece if as_arrow else piece.to_pandas()
+    except (GeneratorExit, FetchCancelled):
+        status = "cancelled"
+        raise
+    except Exception as exc:
+        status, error = "error", repr(exc)[:500]
+        raise
     finally:
-        cur.close()
+        get_query_log().record(sql, status, (time.perf_counter() - t0) * 1000, tag,
+                               rows=rows, nbytes=nbytes, error=error)
+
+
+# --- concurrent multi-query ------------------------------------------------
+
+QuerySpec = Union[str, Tuple[str, Optional[dict]], Tuple[str, Optional[dict], CachePolicy]]
+
+@st.cache_resource
+def _get_executor() -> ThreadPoolExecutor:
+    # one worker per pooled connection; more would just queue on checkout
+    return ThreadPoolExecutor(max_workers=get_pool().size, thread_name_prefix="fetch_many")
+
+def _with_script_ctx(fn, ctx, tag: Optional[str] = None):
+    # re-attach the caller's ScriptRunContext (so st.cache_data works inside worker
+    # threads) and its query tag (so QUERY_TAG / the query log name the real caller)
+    def run(*args):
+        if ctx is not None:
+            from streamlit.runtime.scriptrunner import add_script_run_ctx
+            add_script_run_ctx(threading.current_thread(), ctx)
+        token = set_tag(tag)
+        try:
+            return fn(*args)
+        finally:
+            token.var.reset(token)
+    return run
+
+def fetch_many(queries: Dict[str, QuerySpec], as_arrow: bool = False) -> Dict[str, Union[pd.DataFrame, pa.Table]]:
+    """
+    Run independent queries at once: {name: sql | (sql, params) | queries.spec(...)} → {name: DataFrame}.
+    Each query goes through fetch_df (so cache hits stay free) on its own pooled connection,
+    which makes page latency the slowest query instead of the sum of all of them.
+    as_arrow=True returns pyarrow Tables from fetch_arrow instead.
+    """
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    run = _with_script_ctx(fetch_arrow if as_arrow else fetch_df, get_script_run_ctx(), current_tag())
+    ex = _get_executor()
+    futures = {}
+    for name, spec in queries.items():
+        spec = (spec,) if isinstance(spec, str) else tuple(spec)
+        futures[name] = ex.submit(run, *spec)
+    return {name: fut.result() for name, fut in futures.items()}
+
+@st.cache_resource
+def _get_prefetch_executor() -> ThreadPoolExecutor:
+    # its own few workers: speculative loads never queue ahead of a page's real queries
+    return ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch")
+
+def prefetch(fn, *args) -> Future:
+    """
+    Run fn(*args) in the background for a result the user will probably ask for next
+    (e.g. the next results page) → Future. Queries inside are tagged "…/prefetch";
+    `future.cancel()` drops it if it hasn't started yet.
+    """
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    def speculative(*a):
+        with query_tag("prefetch"):
+            return fn(*a)
+    return _get_prefetch_executor().submit(_with_script_ctx(speculative, get_script_run_ctx(), current_tag()), *args)
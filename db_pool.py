@@ -0,0 +1,138 @@
+# db_pool.py
+### BOUNDED CONNECTION POOL SHARED BY ALL STREAMLIT SESSIONS (see db.get_pool)
+from __future__ import annotations
+import threading, time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, Tuple
+
+
+class PoolTimeout(RuntimeError):
+    """Raised when no connection frees up within checkout_timeout_s."""
+
+
+def _is_closed(conn: Any) -> bool:
+    is_closed = getattr(conn, "is_closed", None)
+    try:
+        return bool(is_closed()) if callable(is_closed) else False
+    except Exception:
+        return True
+
+def _close_quietly(conn: Any) -> None:
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of DB-API connections.
+    - at most `size` connections exist (idle + checked out)
+    - idle connections older than `max_idle_s` are closed instead of reused
+    - connections idle longer than `health_check_s` get a `SELECT 1` before checkout
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        size: int = 4,
+        max_idle_s: float = 600,
+        health_check_s: float = 60,
+        checkout_timeout_s: float = 30,
+    ):
+        self._connect = connect
+        self.size = max(1, int(size))
+        self.max_idle_s = float(max_idle_s)
+        self.health_check_s = float(health_check_s)
+        self.checkout_timeout_s = float(checkout_timeout_s)
+
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._idle: Deque[Tuple[Any, float]] = deque()   # (conn, last_checkin)
+        self._in_use = 0
+
+    # --- checkout / checkin ------------------------------------------------
+
+    def checkout(self) -> Any:
+        if not self._slots.acquire(timeout=self.checkout_timeout_s):
+            raise PoolTimeout(f"No Snowflake connection free after {self.checkout_timeout_s:.0f}s "
+                              f"(pool size {self.size})")
+        try:
+            conn = self._take_idle()
+            if conn is None:
+                conn = self._connect()
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._in_use += 1
+        return conn
+
+    def checkin(self, conn: Any, broken: bool = False) -> None:
+        with self._lock:
+            self._in_use -= 1
+            if broken or _is_closed(conn):
+                _close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+        self._slots.release()
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        conn = self.checkout()
+        try:
+            yield conn
+        finally:
+            # a failed query doesn't poison the connection; a dropped session does
+            self.checkin(conn, broken=_is_closed(conn))
+
+    # --- maintenance -------------------------------------------------------
+
+    def _take_idle(self) -> Any:
+        self.evict_idle()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                conn, last = self._idle.pop()  # LIFO: warmest session first
+            if time.monotonic() - last < self.health_check_s or self._healthy(conn):
+                return conn
+            _close_quietly(conn)
+
+    def _healthy(self, conn: Any) -> bool:
+        if _is_closed(conn):
+            return False
+        try:
+            cur = conn.cursor()
+            try:
+                cur.execute("SELECT 1")
+                cur.fetchone()
+            finally:
+                cur.close()
+            return True
+        except Exception:
+            return False
+
+    def evict_idle(self) -> int:
+        """Close idle connections past max_idle_s. Returns how many were closed."""
+        now = time.monotonic()
+        stale = []
+        with self._lock:
+            keep: Deque[Tuple[Any, float]] = deque()
+            for conn, last in self._idle:
+                (stale if now - last > self.max_idle_s else keep).append((conn, last))
+            self._idle = keep
+        for conn, _ in stale:
+            _close_quietly(conn)
+        return len(stale)
+
+    def close_all(self) -> None:
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn, _ in idle:
+            _close_quietly(conn)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": self.size, "idle": len(self._idle), "in_use": self._in_use}
@@ -0,0 +1,172 @@
+# dev_fixtures.py
+### OFFLINE FIXTURES FOR DB_BACKEND=duckdb
+# Builds a DuckDB file whose tables look like the Snowflake ones the pages query:
+#   <catalog>.RAW.RSS_ARTICLES   ← data/news.csv, issues.csv, favorite_articles.csv + synthetic rows
+#   <catalog>.MART.TWEET_MEDIA   ← data/glp1_*_reup.csv + synthetic rows
+# Synthetic rows are generated inside DuckDB (range()), so millions take seconds.
+#
+#   python dev_fixtures.py --rows 2000000 --tweets 500000 --path ~/.cache/snacklash/bench.duckdb
+from __future__ import annotations
+import argparse
+from pathlib import Path
+
+RSS_COLUMNS = """
+    PULLED_AT          TIMESTAMPTZ,
+    PUBLISHED_AT_RAW   VARCHAR,
+    UPDATED_AT_RAW     VARCHAR,
+    SOURCE_NAME        VARCHAR,
+    SOURCE_FEED_TITLE  VARCHAR,
+    SOURCE_FEED_URL    VARCHAR,
+    TITLE              VARCHAR,
+    SUMMARY            VARCHAR,
+    CONTENT_TEXT       VARCHAR,
+    CONTENT_HTML       VARCHAR,
+    AUTHOR_NAME        VARCHAR,
+    AUTHOR_EMAIL       VARCHAR,
+    AUTHOR_URI         VARCHAR,
+    URL                VARCHAR,
+    IMAGE_URL          VARCHAR,
+    CATEGORIES         VARCHAR,
+    MATCHING_RULE_IDS  VARCHAR,
+    MATCHING_TERMS     VARCHAR,
+    GUID               VARCHAR,
+    GUID_IS_PERMALINK  BOOLEAN,
+    ENCLOSURE_URL      VARCHAR,
+    ENCLOSURE_TYPE     VARCHAR,
+    ENCLOSURE_LENGTH   BIGINT
+"""
+
+TWEET_COLUMNS = """
+    TWEET_ID                  VARCHAR,
+    TWEET_URL                 VARCHAR,
+    TWEET_TEXT                VARCHAR,
+    CREATED_AT                TIMESTAMPTZ,
+    AUTHOR_USERNAME           VARCHAR,
+    AUTHOR_NAME               VARCHAR,
+    AUTHOR_PROFILE_IMAGE_URL  VARCHAR,
+    LIKE_COUNT                BIGINT,
+    RETWEET_COUNT             BIGINT,
+    REPLY_COUNT               BIGINT,
+    QUOTE_COUNT               BIGINT,
+    MEDIA_URL                 VARCHAR,
+    MEDIA_TYPE                VARCHAR
+"""
+
+_SOURCES = ["Reuters", "STAT", "Fierce Pharma", "CNBC", "Bloomberg", "Food Dive",
+            "The Guardian", "NBC News", "Healthline", "Business Insider", "WSJ", "AP News"]
+_WORDS = ["GLP-1", "Ozempic", "Wegovy", "Mounjaro", "semaglutide", "tirzepatide", "snack",
+          "sales", "pricing", "supply", "shortage", "FDA", "compounded", "appetite", "obesity",
+          "insurance", "coverage", "marketing", "consumers", "food", "industry", "weight",
+          "loss", "study", "trial", "brands", "grocery", "portion", "protein", "cravings"]
+_TERMS = ["ozempic", "wegovy", "glp-1", "snacking", "semaglutide", "mounjaro"]
+
+
+def _sql_list(items) -> str:
+    return "[" + ", ".join("'" + s.replace("'", "''") + "'" for s in items) + "]"
+
+def _pick(items) -> str:
+    # random element of a literal list, evaluated per row
+    return f"list_extract({_sql_list(items)}, 1 + CAST(floor(random() * {len(items)}) AS INTEGER))"
+
+
+def seed(path: str, rows: int = 10_000, tweets: int = 2_000, catalog: str = "SNACKLASH2",
+         data_dir: str = "data") -> None:
+    import duckdb
+    path = str(Path(path).expanduser())
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    data = Path(data_dir)
+
+    con = duckdb.connect()
+    con.execute(f"ATTACH '{path}' AS {catalog}")
+    con.execute(f"USE {catalog}")
+    con.execute("CREATE SCHEMA IF NOT EXISTS RAW")
+    con.execute("CREATE SCHEMA IF NOT EXISTS MART")
+    con.execute(f"CREATE OR REPLACE TABLE RAW.RSS_ARTICLES ({RSS_COLUMNS})")
+    con.execute(f"CREATE OR REPLACE TABLE MART.TWEET_MEDIA ({TWEET_COLUMNS})")
+
+    # --- real rows from data/*.csv ---
+    csv = "read_csv('{}', header=true, all_varchar=true)"
+    con.execute(f"""
+        INSERT INTO RAW.RSS_ARTICLES (PULLED_AT, PUBLISHED_AT_RAW, SOURCE_NAME, TITLE, SUMMARY,
+                                      CONTENT_TEXT, CONTENT_HTML, URL, GUID, GUID_IS_PERMALINK)
+        SELECT now(), NULL, source, title, summary, summary, '<p>' || summary || '</p>', Link, Link, TRUE
+        FROM {csv.format(data / "news.csv")}
+        UNION ALL
+        SELECT now(), NULL, source, issue, description, description, '<p>' || description || '</p>', link, link, TRUE
+        FROM {csv.format(data / "issues.csv")}
+        UNION ALL
+        SELECT CAST(published_at AS TIMESTAMPTZ),
+               strftime(CAST(published_at AS TIMESTAMP), '%a, %d %b %Y %H:%M:%S GMT'),
+               source, title, description, description, description, link, id, TRUE
+        FROM {csv.format(data / "favorite_articles.csv")}
+    """)
+    con.execute(f"""
+        INSERT INTO MART.TWEET_MEDIA
+        SELECT id,
+               'https://twitter.com/' || author_username_x || '/status/' || id,
+               text_x,
+               CAST(created_at_x AS TIMESTAMPTZ),
+               author_username_x, author_name_x, author_profile_image_x,
+               TRY_CAST(like_count_x AS BIGINT), TRY_CAST(retweet_count_x AS BIGINT),
+               TRY_CAST(reply_count_x AS BIGINT), TRY_CAST(quote_count_x AS BIGINT),
+               NULL, NULL
+        FROM {csv.format(data / "glp1_snacking_tweets_with_categorizations_and_authors_reup.csv")}
+        WHERE id IS NOT NULL
+    """)
+
+    # --- synthetic rows, scaled to taste ---
+    if rows > 0:
+        con.execute(f"""
+            INSERT INTO RAW.RSS_ARTICLES
+            SELECT ts AS PULLED_AT,
+                   strftime(ts - INTERVAL 3 HOUR, '%a, %d %b %Y %H:%M:%S GMT') AS PUBLISHED_AT_RAW,
+                   NULL,
+                   src, src || ' – Health', 'https://feeds.example.com/' || lower(replace(src, ' ', '-')),
+                   title,
+                   title || '. ' || body,
+                   repeat(body || ' ', 8),
+                   '<article><p>' || repeat(body || ' ', 8) || '</p></article>',
+                   {_pick(["Staff", "A. Reporter", "J. Smith", "K. Lee"])}, NULL, NULL,
+                   'https://news.example.com/a/' || i, NULL,
+                   {_pick(["Health", "Business", "Food", "Policy"])},
+                   'rule-' || (i % 7),
+                   {_pick(_TERMS)},
+                   'syn-' || i, TRUE, NULL, NULL, NULL
+            FROM (
+                SELECT i,
+                       now() - to_seconds(CAST(random() * 86400 * 365 AS BIGINT)) AS ts,
+                       {_pick(_SOURCES)} AS src,
+                       {_pick(_WORDS)} || ' ' || {_pick(_WORDS)} || ' ' || {_pick(_WORDS)} || ' ' || {_pick(_WORDS)} AS title,
+                       {_pick(_WORDS)} || ' ' || {_pick(_WORDS)} || ' ' || {_pick(_WORDS)} || ' ' || {_pick(_WORDS)}
+                         || ' ' || {_pick(_WORDS)} || ' ' || {_pick(_WORDS)} AS body
+                FROM range({int(rows)}) t(i)
+            )
+        """)
+    if tweets > 0:
+        con.execute(f"""
+            INSERT INTO MART.TWEET_MEDIA
+            SELECT tid, 'https://twitter.com/' || handle || '/status/' || tid,
+                   {_pick(_WORDS)} || ' ' || {_pick(_WORDS)} || ' ' || {_pick(_WORDS)} || ' #' || {_pick(_TERMS)},
+                   now() - to_seconds(CAST(random() * 86400 * 180 AS BIGINT)),
+                   handle, upper(handle[1]) || handle[2:], NULL,
+                   CAST(random() * 5000 AS BIGINT), CAST(random() * 500 AS BIGINT),
+                   CAST(random() * 200 AS BIGINT), CAST(random() * 50 AS BIGINT),
+                   NULL, NULL
+            FROM (
+                SELECT CAST(1900000000000000000 + i AS VARCHAR) AS tid,
+                       {_pick(["snackwatch", "glp1news", "foodbiz", "healthdesk", "pharmafeed"])} AS handle
+                FROM range({int(tweets)}) t(i)
+            )
+        """)
+    con.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Build DuckDB fixtures for DB_BACKEND=duckdb")
+    ap.add_argument("--path", default="~/.cache/snacklash/dev.duckdb")
+    ap.add_argument("--rows", type=int, default=10_000, help="synthetic RSS_ARTICLES rows")
+    ap.add_argument("--tweets", type=int, default=2_000, help="synthetic TWEET_MEDIA rows")
+    ap.add_argument("--catalog", default="SNACKLASH2")
+    args = ap.parse_args()
+    seed(args.path, args.rows, args.tweets, args.catalog)
+    print(f"Seeded {args.path}")
@@ -0,0 +1,150 @@
+# exports.py
+### STREAMED EXPORTS: Arrow chunks → CSV / Parquet file, with bounded memory
+# A job pulls chunks from a source (e.g. db.fetch_batches) on a background thread and
+# appends each one to the output file as it arrives, so memory stays at one chunk no
+# matter how large the result is. The page polls `progress()` and can `cancel()`.
+# Files go to EXPORT_DIR (default static/exports, served at app/static/exports/ when
+# server.enableStaticServing is on) under an unguessable name and are removed after
+# EXPORT_MAX_AGE_S.
+from __future__ import annotations
+import secrets, threading, time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional
+
+import pyarrow as pa
+
+from config import setting
+
+EXPORT_DIR = Path(setting("EXPORT_DIR", "static/exports"))
+EXPORT_MAX_AGE_S = float(setting("EXPORT_MAX_AGE_S", 3600))
+
+FORMATS = {"CSV": ".csv", "Parquet": ".parquet"}
+MIME = {"CSV": "text/csv", "Parquet": "application/vnd.apache.parquet"}
+
+ChunkSource = Callable[[threading.Event], Iterator[pa.Table]]
+
+
+class _CsvSink:
+    def __init__(self, path: Path, schema: pa.Schema):
+        import pyarrow.csv as pcsv
+        self._w = pcsv.CSVWriter(str(path), schema)
+
+    def write(self, tbl: pa.Table) -> None:
+        self._w.write_table(tbl)
+
+    def close(self) -> None:
+        self._w.close()
+
+
+class _ParquetSink:
+    def __init__(self, path: Path, schema: pa.Schema):
+        import pyarrow.parquet as pq
+        self._w = pq.ParquetWriter(str(path), schema, compression="zstd")
+
+    def write(self, tbl: pa.Table) -> None:
+        self._w.write_table(tbl)  # one row group per chunk
+
+    def close(self) -> None:
+        self._w.close()
+
+
+class ExportJob:
+    def __init__(self, source: ChunkSource, fmt: str = "CSV", total_hint: Optional[int] = None,
+                 label: str = "export", tag: Optional[str] = None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown export format: {fmt!r}")
+        self.fmt = fmt
+        self.label = label
+        self.total_hint = total_hint
+        self.path = EXPORT_DIR / f"{label}-{secrets.token_urlsafe(12)}{FORMATS[fmt]}"
+        self.status = "pending"   # pending | running | done | cancelled | error
+        self.rows = 0
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._source = source
+        self._tag = tag
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "ExportJob":
+        EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+        cleanup()
+        self.status, self.started_at = "running", time.time()
+        self._thread = threading.Thread(target=self._run, name=f"export-{self.label}", daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "cancelled", "error")
+
+    def progress(self) -> Dict[str, object]:
+        frac = None
+        if self.total_hint:
+            frac = min(1.0, self.rows / self.total_hint)
+        return {"status": self.status, "rows": self.rows, "fraction": 1.0 if self.status == "done" else frac,
+                "bytes": self.path.stat().st_size if self.path.exists() else 0,
+                "elapsed_s": (self.finished_at or time.time()) - (self.started_at or time.time()),
+                "error": self.error}
+
+    def _run(self) -> None:
+        from query_log import query_tag
+        sink = None
+        try:
+            with query_tag(self._tag or f"export:{self.label}"):
+                for tbl in self._source(self._cancel):
+                    if self._cancel.is_set():
+                        raise _Cancelled()
+                    if sink is None:
+                        schema = tbl.schema
+                        sink = (_CsvSink if self.fmt == "CSV" else _ParquetSink)(self.path, schema)
+                    elif tbl.schema != schema:
+                        tbl = tbl.cast(schema)  # e.g. an all-null chunk typed as null
+                    sink.write(tbl)
+                    self.rows += tbl.num_rows
+            if sink is None:  # empty result: still hand back a valid (header-less) file
+                self.path.touch()
+            self.status = "done"
+        except Exception as exc:
+            if self._cancel.is_set():
+                self.status = "cancelled"
+            else:
+                self.status, self.error = "error", repr(exc)[:500]
+        finally:
+            if sink is not None:
+                sink.close()
+            self.finished_at = time.time()
+            if self.status != "done":
+                self.path.unlink(missing_ok=True)
+
+
+class _Cancelled(Exception):
+    pass
+
+
+def cleanup(max_age_s: float = EXPORT_MAX_AGE_S) -> int:
+    """Remove export files older than max_age_s → files removed."""
+    if not EXPORT_DIR.exists():
+        return 0
+    cutoff = time.time() - max_age_s
+    n = 0
+    for p in EXPORT_DIR.iterdir():
+        try:
+            if p.is_file() and p.stat().st_mtime < cutoff:
+                p.unlink()
+                n += 1
+        except OSError:
+            pass
+    return n
+
+def static_url(path: Path) -> Optional[str]:
+    # URL under Streamlit static serving, or None when the file isn't served
+    try:
+        rel = path.resolve().relative_to(Path("static").resolve())
+    except ValueError:
+        return None
+    return f"app/static/{rel.as_posix()}"
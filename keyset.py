@@ -0,0 +1,91 @@
+# keyset.py
+### KEYSET (SEEK) PAGINATION
+# Instead of LIMIT n OFFSET k (the warehouse sorts and discards k rows, and rows shift
+# between pages as new ones land), each page starts strictly after the (sort value,
+# tie-breaker) of the previous page's last row:
+#
+#   ORDER BY k DESC NULLS LAST, GUID DESC
+#   WHERE (k < :v) OR (k = :v AND GUID < :g) OR k IS NULL      -- after (v, g)
+#
+# so page N costs the same as page 1. Cursors are opaque url-safe tokens. The tie-breaker
+# must be unique: rows sharing (k, tie-breaker) across a page boundary would be skipped.
+from __future__ import annotations
+import base64, json
+from typing import Any, Dict, Optional, Tuple
+
+import pyarrow as pa
+
+SORT_KEY = "SORT_KEY"  # alias pages select the sort expression under (read back by cursor_after)
+
+
+class SeekOrder:
+    """
+    One sort option: `key_sql` (the ORDER BY expression), direction, and a unique
+    `tiebreak_sql` column or expression. `param_sql` wraps the cursor's bound value for comparison with
+    key_sql, e.g. "TO_TIMESTAMP_TZ({})" for timestamp keys (cursor values travel as text).
+    """
+    __slots__ = ("key_sql", "descending", "tiebreak_sql", "param_sql")
+
+    def __init__(self, key_sql: str, descending: bool = False, tiebreak_sql: str = "GUID",
+                 param_sql: str = "{}"):
+        self.key_sql = key_sql
+        self.descending = descending
+        self.tiebreak_sql = tiebreak_sql
+        self.param_sql = param_sql
+
+    def order_by(self) -> str:
+        d = "DESC" if self.descending else "ASC"
+        return f"ORDER BY {self.key_sql} {d} NULLS LAST, {self.tiebreak_sql} {d}"
+
+    def select_key(self) -> str:
+        return f"{self.key_sql} AS {SORT_KEY}"
+
+    def seek(self, cursor: Optional[str], prefix: str = "seek") -> Tuple[str, Dict[str, Any]]:
+        """→ (predicate, params) selecting rows after `cursor`; ("", {}) for the first page."""
+        if not cursor:
+            return "", {}
+        value, tie = decode_cursor(cursor)
+        op = "<" if self.descending else ">"
+        k, t = self.key_sql, self.tiebreak_sql
+        pv, pt = f"{prefix}_v", f"{prefix}_t"
+        v = self.param_sql.format(f"%({pv})s")
+        if value is None:
+            # already inside the NULLS LAST tail: only the tie-breaker moves
+            return f"({k} IS NULL AND {t} {op} %({pt})s)", {pt: tie}
+        return (f"({k} {op} {v} OR ({k} = {v} AND {t} {op} %({pt})s) OR {k} IS NULL)",
+                {pv: value, pt: tie})
+
+
+def and_where(where_sql: str, predicate: str) -> str:
+    # append a predicate to a "WHERE …" string built elsewhere ("" = no WHERE yet)
+    if not predicate:
+        return where_sql
+    return f"{where_sql} AND {predicate}" if where_sql else f"WHERE {predicate}"
+
+
+# --- cursor tokens ---------------------------------------------------------
+
+def encode_cursor(value: Any, tie: Any) -> str:
+    raw = json.dumps([value, tie], separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(token: str) -> Tuple[Any, Any]:
+    raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    value, tie = json.loads(raw)
+    return value, tie
+
+def _as_param(scalar: pa.Scalar) -> Any:
+    # timestamps keep full precision as ISO-8601 text (Python datetimes stop at µs)
+    if not scalar.is_valid:
+        return None
+    if pa.types.is_timestamp(scalar.type):
+        import pandas as pd
+        return pd.Timestamp(scalar.value, unit=scalar.type.unit, tz=scalar.type.tz or "UTC").isoformat()
+    return scalar.as_py()
+
+def cursor_after(tbl: pa.Table, tiebreak_col: str = "GUID", row: int = -1) -> Optional[str]:
+    """Cursor for the page that follows `tbl` (needs the SORT_KEY and tie-breaker columns)."""
+    if tbl.num_rows == 0:
+        return None
+    i = row % tbl.num_rows
+    return encode_cursor(_as_param(tbl.column(SORT_KEY)[i]), _as_param(tbl.column(tiebreak_col)[i]))
@@ -0,0 +1,160 @@
+# normalize.py
+### POST-INGEST NORMALIZATION OF RAW.RSS_ARTICLES
+# Work that every News query used to redo per row is done once per new row instead:
+#   PUBLISHED_AT   typed timestamp parsed from PUBLISHED_AT_RAW (table clustered by day),
+#                  instead of TRY_TO_TIMESTAMP_TZ(PUBLISHED_AT_RAW) in every filter/sort and
+#                  a pandas re-parse on every Overview render
+#   SOURCE_ID      id from the NEWS_SOURCES dimension (stable per lowercase source key),
+#                  with NEWS_SOURCE_DAYS article counts per source and day, instead of
+#                  SELECT DISTINCT / LOWER(COALESCE(...)) IN (...) over the whole table
+#
+#   after each ingest:   python normalize.py            (creates what's missing, fills new rows)
+#   ingest writers:      parse_published_utc(df["PUBLISHED_AT_RAW"]) to write PUBLISHED_AT directly
+#   in the app:          NORMALIZE_IN_APP=1 runs it from the warm-up thread instead
+#
+# Its UPDATEs don't move the table's watermark (MAX(PULLED_AT) + COUNT(*)), so normalize()
+# invalidates the news.* / rss.* cache scopes itself, in every app process that shares the
+# result cache (QUERY_CACHE_BACKEND sqlite/redis), not just the one it runs in.
+#
+# Readers check published_at_sql(fqt) / sources_ready(fqt) and fall back to the inline
+# expressions until a run has filled the columns, so pages work on a table never normalized.
+# After that they still fall back per row: rows ingested since the last run have NULL
+# PUBLISHED_AT / SOURCE_ID until the next one, and must not drop out of filters and sorts.
+# New SOURCE_IDs come from the NEWS_SOURCES_SEQ sequence, so overlapping runs are safe.
+from __future__ import annotations
+from typing import Dict, Tuple
+
+import pandas as pd
+import streamlit as st
+
+from cache_scopes import on_invalidate
+from config import setting
+
+PUBLISHED_AT = "PUBLISHED_AT"
+PUBLISHED_AT_INLINE = "TRY_TO_TIMESTAMP_TZ(PUBLISHED_AT_RAW)"  # pre-normalization fallback
+PUBLISHED_AT_READ = f"COALESCE({PUBLISHED_AT}, {PUBLISHED_AT_INLINE})"  # rows not normalized yet parse inline
+
+# GUIDs aren't unique (RSS only asks for per-feed uniqueness, and some feeds send "#"), so
+# keyset tie-breaks and the search index identify a row by this instead: computed inline,
+# so it exists for every row as soon as it is ingested. Rows equal on all of these are
+# duplicate ingests of one article.
+ROW_KEY = "ROW_KEY"
+ROW_KEY_SQL = ("MD5(COALESCE(GUID, '') || '|' || COALESCE(URL, '') || '|' || COALESCE(TITLE, '') || '|' || "
+               "COALESCE(SOURCE_NAME, SOURCE_FEED_TITLE, SOURCE_FEED_URL, '') || '|' || "
+               "COALESCE(CAST(PULLED_AT AS VARCHAR), ''))")
+
+_RFC2822 = "%a, %d %b %Y %H:%M:%S %Z"
+
+
+def parse_published_utc(s: pd.Series) -> pd.Series:
+    """Feed date strings → tz-aware UTC timestamps (NaT where unparseable)."""
+    s = s.astype("string").str.strip().replace({"": pd.NA, "None": pd.NA, "nan": pd.NA, "NaN": pd.NA})
+    # fast/strict pass for RFC-2822 like "Wed, 24 Sep 2025 14:17:29 GMT"
+    d = pd.to_datetime(s, format=_RFC2822, errors="coerce", utc=True)
+    # fallback pass for anything that didn't match exactly (ISO, numeric offsets, oddball feeds)
+    mask = d.isna() & s.notna()
+    if mask.any():
+        d.loc[mask] = pd.to_datetime(s[mask], errors="coerce", utc=True)
+    return d
+
+
+def normalize_published_at(fqt: str, cluster: bool = True) -> Dict[str, int]:
+    """Add PUBLISHED_AT if needed, fill rows that don't have it yet → {"updated": n}."""
+    from db import execute, get_backend
+    from queries import bind
+    execute(*bind("news.published_at.add", fqt=fqt))
+    n = execute(*bind("news.published_at.backfill", fqt=fqt))
+    if cluster and get_backend().name == "snowflake":
+        # idempotent; automatic clustering keeps new micro-partitions sorted by day
+        execute(*bind("news.published_at.cluster", fqt=fqt))
+    _published_at_sql.clear()
+    return {"updated": n}
+
+
+def source_tables(fqt: str) -> Tuple[str, str]:
+    # (dimension, daily counts), next to the articles table
+    schema = fqt.rsplit(".", 1)[0]
+    return f"{schema}.NEWS_SOURCES", f"{schema}.NEWS_SOURCE_DAYS"
+
+def normalize_sources(fqt: str) -> Dict[str, int]:
+    """Register new sources, stamp SOURCE_ID on new articles, recount recent days."""
+    from db import execute, fetch_query
+    from queries import bind
+    dim, days = source_tables(fqt)
+    seq = f"{dim}_SEQ"
+    execute(*bind("news.sources.create_dim", dim=dim))
+    start = int(fetch_query("news.sources.next_id", dim=dim)["N"].iloc[0])
+    execute(*bind("news.sources.create_seq", seq=seq, start=str(start)))
+    execute(*bind("news.sources.create_days", days=days))
+    execute(*bind("news.sources.add_column", fqt=fqt))
+    # ids come from the sequence, so overlapping runs can't hand one id to two sources
+    new = execute(*bind("news.sources.insert_new", fqt=fqt, dim=dim, seq=seq))
+    stamped = execute(*bind("news.sources.assign", fqt=fqt, dim=dim))
+    # PULLED_AT only moves forward: the last counted day may have grown, older ones can't
+    last = fetch_query("news.sources.counted_through", days=days)["DAY"].iloc[0]
+    since = "1970-01-01" if pd.isna(last) else str(pd.Timestamp(last).date())
+    counted = execute(*bind("news.sources.count_days", {"since": since}, fqt=fqt, days=days))
+    _sources_ready.clear()
+    return {"new_sources": new, "stamped": stamped, "day_counts": counted}
+
+def normalize(fqt: str, cluster: bool = True) -> Dict[str, int]:
+    from db import invalidate
+    res = {**normalize_published_at(fqt, cluster), **normalize_sources(fqt)}
+    if any(res.values()):
+        # everything that reads PUBLISHED_AT / SOURCE_ID (and the *.filled checks behind
+        # published_at_sql / sources_ready) – the data changed, so never debounced
+        invalidate("news.*", "rss.*", force=True)
+    return res
+
+
+def published_at_sql(fqt: str) -> str:
+    # typed column (with the inline parse for rows added since the last run) once
+    # normalize_published_at has filled it, else the inline parse
+    from db import scope_version
+    return _published_at_sql(fqt, scope_version("news.published_at.filled"))
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _published_at_sql(fqt: str, version: str) -> str:
+    # version: cache scope generation, so a normalize run in another process reaches this one
+    from db import fetch_query
+    try:
+        filled = fetch_query("news.published_at.filled", fqt=fqt)["N"].iloc[0]
+    except Exception:
+        return PUBLISHED_AT_INLINE  # column not there yet
+    return PUBLISHED_AT_READ if filled else PUBLISHED_AT_INLINE
+
+def published_at_between(fqt: str, lo: str, hi: str) -> str:
+    """Predicate for lo <= published time <= hi (SQL expressions); prunes on PUBLISHED_AT once normalized."""
+    expr = published_at_sql(fqt)
+    if expr == PUBLISHED_AT_INLINE:
+        return f"({expr} >= {lo} AND {expr} <= {hi})"
+    return (f"(({PUBLISHED_AT} >= {lo} AND {PUBLISHED_AT} <= {hi}) OR "
+            f"({PUBLISHED_AT} IS NULL AND {PUBLISHED_AT_INLINE} >= {lo} AND {PUBLISHED_AT_INLINE} <= {hi}))")
+
+def sources_ready(fqt: str) -> bool:
+    # SOURCE_ID / NEWS_SOURCES usable (normalize_sources has run at least once)
+    from db import scope_version
+    return _sources_ready(fqt, scope_version("news.sources.filled"))
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _sources_ready(fqt: str, version: str) -> bool:
+    from db import fetch_query
+    try:
+        return bool(fetch_query("news.sources.filled", fqt=fqt)["N"].iloc[0])
+    except Exception:
+        return False
+
+on_invalidate("news.published_at.filled", _published_at_sql.clear)
+on_invalidate("news.sources.filled", _sources_ready.clear)
+
+def normalize_in_app() -> bool:
+    return str(setting("NORMALIZE_IN_APP", "0")).lower() in ("1", "true", "yes", "on")
+
+
+if __name__ == "__main__":
+    import argparse, json
+    ap = argparse.ArgumentParser(description="Normalize new RSS_ARTICLES rows (PUBLISHED_AT, SOURCE_ID, source counts)")
+    ap.add_argument("--fqt", default="SNACKLASH2.RAW.RSS_ARTICLES")
+    ap.add_argument("--no-cluster", action="store_true", help="skip ALTER TABLE … CLUSTER BY")
+    args = ap.parse_args()
+    print(json.dumps(normalize(args.fqt, cluster=not args.no_cluster)))
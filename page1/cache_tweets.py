@@ -1,17 +1,17 @@
 # cache_tweets.py
 ### THIS IS A WRAPPER FOR tweets_widget_async.PY TO ADD DISK CACHING OF TWEET IMAGES + L1 STREAMLIT CACHING
 from __future__ import annotations
-import os, re, base64, asyncio
+import os, re, base64, time
 from pathlib import Path
 from typing import List, Optional, Tuple
-from concurrent.futures import ThreadPoolExecutor
 
 import streamlit as st
 import pandas as pd
 
-from .db import fetch_df
+from cache_scopes import on_invalidate
+from .db import fetch_query, get_watermarks, scope_version
 # Reuse your existing helpers from tweets_widget_async.py
-from .tweets_widget_async import _render_batch  # batch renderer (async)
+from .tweets_widget_async import render_tweets  # renderer service (warm browser pool), in-process fallback
 from .tweets_widget_async import _normalize     # x.com -> twitter.com (or copy same regex here)
 
 # -------- disk cache location --------
@@ -35,16 +35,6 @@ def _write_png_atomic(path: Path, data: bytes) -> None:
     tmp.write_bytes(data)
     tmp.replace(path)
 
-def _run_async(coro):
-    # Run an async coroutine from Streamlit safely
-    try:
-        asyncio.get_running_loop()
-    except RuntimeError:
-        return asyncio.run(coro)
-    else:
-        with ThreadPoolExecutor(max_workers=1) as ex:
-            return ex.submit(lambda: asyncio.run(coro)).result()
-
 @st.cache_data(show_spinner=False)
 def get_or_render_one(tweet_url: str) -> Optional[str]:
     """Return base64 PNG for one tweet, using disk cache; render if missing."""
@@ -61,7 +51,7 @@ def get_or_render_one(tweet_url: str) -> Optional[str]:
             return b64
 
     # Miss → render just this one via the batch renderer
-    pngs = _run_async(_render_batch([url]))
+    pngs = render_tweets([url])
     png = pngs[0] if pngs else None
     if not png:
         return None
@@ -69,19 +59,20 @@ def get_or_render_one(tweet_url: str) -> Optional[str]:
     _write_png_atomic(f, png)
     return base64.b64encode(png).decode("ascii")
 
-@st.cache_data(ttl=600, show_spinner=False)
 def get_recent_tweet_images_b64_and_urls(limit: int = 10) -> List[List[str]]:
     """
     Pull newest N TWEET_URLs from MART.TWEET_MEDIA and return [[b64, url], ...].
-    Uses L2 disk cache (by tweet_id) + L1 Streamlit cache for the function result.
+    Uses L2 disk cache (by tweet_id) + L1 Streamlit cache for the function result;
+    the L1 entry is keyed on the table's watermark, so it only rebuilds when new tweets land
+    (or "render.*" is invalidated, in any process).
     """
-    df: pd.DataFrame = fetch_df(f"""
-        SELECT TWEET_URL, CREATED_AT
-        FROM MART.TWEET_MEDIA
-        WHERE TWEET_URL IS NOT NULL
-        ORDER BY CREATED_AT DESC
-        LIMIT {int(limit)}
-    """).dropna(subset=["TWEET_URL"])
+    version = get_watermarks().current("MART.TWEET_MEDIA") or f"ttl:{int(time.time() // 600)}"
+    version += "|" + scope_version("render.tweet_images")
+    return _recent_tweet_images(limit, version)
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _recent_tweet_images(limit: int, version: str) -> List[List[str]]:
+    df: pd.DataFrame = fetch_query("tweets.recent_urls", {"limit": int(limit)}).dropna(subset=["TWEET_URL"])
 
     urls = [_normalize(str(u)) for u in df["TWEET_URL"]]
 
@@ -102,7 +93,7 @@ def get_recent_tweet_images_b64_and_urls(limit: int = 10) -> List[List[str]]:
 
     # 2) render misses as a single batch
     if missing:
-        pngs = _run_async(_render_batch(missing))
+        pngs = render_tweets(missing)
         for u, png in zip(missing, pngs):
             if not png:
                 continue
@@ -119,3 +110,7 @@ def get_recent_tweet_images_b64_and_urls(limit: int = 10) -> List[List[str]]:
         if b64:
             out.append([b64, u])
     return out
+
+# "render.*" refreshes drop the L1 entries (the PNGs on disk are per tweet and stay valid)
+on_invalidate("render.tweet_images", _recent_tweet_images.clear)
+on_invalidate("render.tweet_image", get_or_render_one.clear)
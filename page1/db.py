@@ -1,39 +1,4 @@
 # db.py
-import pandas as pd
-import streamlit as st
-import snowflake.connector
-from cryptography.hazmat.primitives import serialization
-import base64
-from .config import load_config
-
-@st.cache_resource
-def get_conn():
-    cfg = load_config()
-    key = serialization.load_pem_private_key(
-        base64.b64decode(cfg["PRIVATE_KEY_PEM_B64"]),
-        password=(cfg.get("PRIVATE_KEY_PASSPHRASE") or "").encode() or None,
-    ).private_bytes(
-        serialization.Encoding.DER,
-        serialization.PrivateFormat.PKCS8,
-        serialization.NoEncryption(),
-    )
-    return snowflake.connector.connect(
-        account=cfg["SNOWFLAKE_ACCOUNT"],
-        user=cfg["SNOWFLAKE_USER"],
-        role=cfg["SNOWFLAKE_ROLE"],
-        warehouse=cfg["SNOWFLAKE_WAREHOUSE"],
-        database=cfg["SNOWFLAKE_DATABASE"],
-        schema=cfg["SNOWFLAKE_SCHEMA"],
-        private_key=key,
-        client_session_keep_alive=True,
-    )
-
-@st.cache_data(ttl=300)
-def fetch_df(sql: str, params=None) -> pd.DataFrame:
-    conn = get_conn()
-    cur = conn.cursor()
-    try:
-        cur.execute(sql, params or {})
-        return cur.fetch_pandas_all()   # ← no pandas/sqlalchemy warning
-    finally:
-        cur.close()
+# page1 shares the root data layer so every page draws from the same connection pool
+# (and the same fetch_df cache) instead of holding a second Snowflake session.
+from db import get_pool, get_conn, fetch_arrow, fetch_batches, fetch_df, fetch_many, fetch_query, get_watermarks, scope_version  # noqa: F401  (db.py sits at project root)
@@ -3,29 +3,23 @@ from typing import List, Tuple
 import pandas as pd
 from urllib.parse import urlparse
 from .db import fetch_df
-from .dates import parse_publish_date_col
+from .dates import format_date_col
+from queries import spec
 
 import pandas as pd
 
-def rss_as_tuples(limit: int = 50):
-    df = fetch_df(f"""
-        SELECT TITLE, SUMMARY, SOURCE_NAME, URL, PUBLISHED_AT_RAW
-        FROM SNACKLASH2.RAW.RSS_ARTICLES
-        LIMIT {int(limit*5)}               -- grab a little extra, we’ll sort+slice
-    """)
+def rss_spec(limit: int = 50):
+    # exposed so the Overview can prefetch this exact query alongside the others
+    from normalize import published_at_sql
+    return spec("rss.overview", {"limit": int(limit)},
+                published_at=published_at_sql("SNACKLASH2.RAW.RSS_ARTICLES"))
 
-    # 1) Keep your nice label date
-    df["DATE"] = parse_publish_date_col(df["PUBLISHED_AT_RAW"])
+def rss_as_tuples(limit: int = 50):
+    # newest first straight from SQL, on the typed PUBLISHED_AT (normalize.py): no string parsing here
+    df = fetch_df(*rss_spec(limit))
 
-    # 2) Add a proper timestamp for sorting (PT shown; keep UTC by dropping tz_convert)
-    ts = pd.to_datetime(df["PUBLISHED_AT_RAW"], errors="coerce", utc=True)
-    ts = ts.dt.tz_convert("America/Los_Angeles")
-    df = (
-        df.assign(_TS=ts)
-          .sort_values("_TS", ascending=False, na_position="last")
-          .head(limit)                     # now take the newest
-          .drop(columns="_TS")
-    )
+    # Keep your nice label date
+    df["DATE"] = format_date_col(df["PUBLISHED_AT"])
 
     out = []
     for _, r in df.iterrows():
@@ -7,8 +7,11 @@ import re
 import sys
 import json
 from .widget1 import main as widget1
-from .widget2 import main as widget2
-from .widget3 import main as widget3
+from .widget2 import main as widget2, NEWS_LIMIT
+from .widget3 import main as widget3, TWEETS_LIMIT
+from .db import fetch_many
+from .parse_rss import rss_spec
+from queries import spec
 from .indxyz_utils.indxyz_utils.widgetbox import main as wb
 from  .debug_tweets import show_recent_tweet_urls
 
@@ -56,6 +59,12 @@ def main():
     """, height=0)
 
 
+    # Warm both Snowflake queries at once; widget2/widget3 then hit the fetch_df cache
+    fetch_many({
+        "news": rss_spec(NEWS_LIMIT),
+        "tweets": spec("tweets.recent_urls", {"limit": TWEETS_LIMIT}),
+    })
+
     #ISSUES
     issue_widget_html = widget1()
 
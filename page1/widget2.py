@@ -10,10 +10,12 @@ import json
 from .indxyz_utils.indxyz_utils.widgetbox_ticker import main as wb 
 from .parse_rss import rss_as_tuples
 
+NEWS_LIMIT = 100
+
 
 # === Mock Function to Return News (no filtering yet) ===
 def get_news(source_type, time_selection):
-    return(rss_as_tuples(limit=100))
+    return(rss_as_tuples(limit=NEWS_LIMIT))
 
 def build_html(items):
     return "<ul>" + "\n".join(items) + "</ul>"
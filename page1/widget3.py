@@ -4,8 +4,11 @@ import streamlit.components.v1 as components
 from .indxyz_utils.indxyz_utils.widgetbox_ticker import main as wb
 #from .tweets_widget_async import get_recent_tweet_images_b64_and_urls  # ← NEW
 from .cache_tweets import get_recent_tweet_images_b64_and_urls
+from renderer_service import RendererBusy, RendererError
 
 
+TWEETS_LIMIT = 10
+
 # render items as you already do
 
 
@@ -19,10 +22,19 @@ def main():
           background-color: #f9f9f9; font-family: Arial, sans-serif; border-radius: 12px;">
     """)
 
-    items = get_recent_tweet_images_b64_and_urls(limit=10)
-    if not items:
-        html_parts.append("<div style='color:#666'>No tweet images yet.</div>")
-        st.write("No tweet images yet.")  # temporary
+    try:
+        items = get_recent_tweet_images_b64_and_urls(limit=TWEETS_LIMIT)
+    except RendererBusy as exc:  # not cached: the next rerun asks again
+        items = []
+        html_parts.append(f"<div style='color:#666'>Tweet renderer is busy – try again in "
+                          f"{int(exc.retry_after) or 1}s.</div>")
+    except RendererError:
+        items = []
+        html_parts.append("<div style='color:#666'>Tweet images couldn't be rendered right now.</div>")
+    else:
+        if not items:
+            html_parts.append("<div style='color:#666'>No tweet images yet.</div>")
+            st.write("No tweet images yet.")  # temporary
         
     for b64, tweet_url in items:
         html_parts.append(f"""
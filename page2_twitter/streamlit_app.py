@@ -2,15 +2,27 @@
 import re, json
 import streamlit as st
 from streamlit.components.v1 import html as html_component
-from db import fetch_df  # ← relative import, per your note
+from db import fetch_query, manual_refresh  # ← relative import, per your note
+from keyset import SeekOrder, and_where, cursor_after
+from tweet_cards import cards_document, feed_document, tweet_id
 
 
 
-_ID_RE = re.compile(r"(?:status/|status%2F|i/web/status/)(\d+)")
-def _extract_id(u: str) -> str | None:
-    m = _ID_RE.search(str(u).strip())
-    return m.group(1) if m else None
+PAGE_SIZES = [5, 10, 15]
+PAGE_SIZE_DEFAULT = 10
 
+# Infinite feed: slices are keyset-paged on (CREATED_AT, row key), so slice N costs what
+# slice 1 does; session state keeps only the cursors of the last ~FEED_WINDOW rows' slices
+# (oldest-loaded dropped first), the rows themselves come back from fetch_query's keyed
+# cache on each rerun, and the browser only mounts the cards near its viewport (tweet_cards.feed_document).
+# MART.TWEET_MEDIA has a row per media item, so TWEET_ID repeats within a tweet and can't be
+# the tie-breaker; the row key adds the media columns.
+FEED_WINDOW = 200
+FEED_VIEWPORT_H = 900
+FEED_ROW_KEY_SQL = ("MD5(COALESCE(CAST(TWEET_ID AS VARCHAR), '') || '|' || COALESCE(TWEET_URL, '') || '|' || "
+                    "COALESCE(MEDIA_URL, '') || '|' || COALESCE(MEDIA_TYPE, ''))")
+FEED_ORDER = SeekOrder("CREATED_AT", descending=True, tiebreak_sql=FEED_ROW_KEY_SQL,
+                       param_sql="TO_TIMESTAMP_TZ({})")
 
 # --- helpers ---------------------------------------------------------------
 
@@ -18,26 +30,51 @@ def _normalize(u: str) -> str:
     # x.com → twitter.com is more reliable for widgets.js
     return re.sub(r"^https?://x\.com/", "https://twitter.com/", u.strip())
 
-@st.cache_data(ttl=600, show_spinner=False)
+# No TTL wrappers below: fetch_df keeps these until MART.TWEET_MEDIA's watermark advances.
 def _total_tweet_count() -> int:
-    df = fetch_df("""
-        SELECT COUNT(*) AS N
-        FROM MART.TWEET_MEDIA
-        WHERE TWEET_URL IS NOT NULL
-    """)
+    df = fetch_query("tweets.count")
     return int(df["N"].iloc[0])
 
-@st.cache_data(ttl=120, show_spinner=False)
-def _get_urls(limit: int, offset: int) -> list[str]:
-    df = fetch_df(f"""
-        SELECT TWEET_URL
-        FROM MART.TWEET_MEDIA
-        WHERE TWEET_URL IS NOT NULL
-        ORDER BY CREATED_AT DESC
-        LIMIT {int(limit)} OFFSET {int(offset)}
-    """)
-    return [_normalize(str(u)) for u in df["TWEET_URL"].dropna().astype(str)]
+def _card_rows(df) -> list[dict]:
+    rows = df.astype(object).where(df.notna(), None).to_dict("records")
+    for r in rows:
+        r["TWEET_URL"] = _normalize(str(r["TWEET_URL"]))
+    return rows
 
+def _get_rows(limit: int, offset: int) -> list[dict]:
+    params = {"limit": int(limit), "offset": int(offset)}
+    try:
+        return _card_rows(fetch_query("tweets.page_cards", params))
+    except Exception:
+        # the card columns (author, metrics, media) aren't in this mart: URLs only, which
+        # _render_cards shows as official embeds like the page did before native cards
+        return _card_rows(fetch_query("tweets.page_urls", params))
+
+def _feed_slice(cursor, limit: int):
+    """Next `limit` tweets after `cursor` → (rows, cursor for the slice after, or None at the end)."""
+    seek_sql, seek_params = FEED_ORDER.seek(cursor)
+    tbl = fetch_query("tweets.feed_page", {**seek_params, "limit": int(limit) + 1}, as_arrow=True,
+                      sort_key=FEED_ORDER.select_key(), order_by=FEED_ORDER.order_by(),
+                      row_key=FEED_ROW_KEY_SQL, where=and_where("WHERE TWEET_URL IS NOT NULL", seek_sql))
+    page = tbl.slice(0, limit)
+    nxt = cursor_after(page, tiebreak_col="ROW_KEY") if tbl.num_rows > limit else None
+    return _card_rows(page.drop(["SORT_KEY", "ROW_KEY"]).to_pandas()), nxt
+
+
+def _render_cards(rows: list[dict], theme: str = "dark") -> None:
+    """
+    Native cards from the row data (one document of fixed-height cards); a card is only
+    swapped for the official embed when its Embed button is clicked.
+    """
+    if not rows:
+        html_component("<div style='color:#999'>No tweets to show.</div>", height=60)
+        return
+    if "TWEET_TEXT" not in rows[0]:  # URL-only fallback rows (see _get_rows)
+        _render_embeds([r["TWEET_URL"] for r in rows], theme=theme)
+        return
+    html, height = cards_document(rows, theme=theme)
+    # scrolling: an embedded tweet can grow past its card's height
+    html_component(html, height=height, scrolling=True)
 
 
 def _render_embeds(urls: list[str], theme: str = "dark") -> None:
@@ -45,8 +82,7 @@ def _render_embeds(urls: list[str], theme: str = "dark") -> None:
     Programmatically embed by Tweet ID so /i/web/status/... works.
     Fixed width, dynamic height per tweet. Shows as many as resolve.
     """
-    # ✅ build ids from the URLs (this was missing)
-    ids = [tid for tid in (_extract_id(u) for u in urls) if tid]
+    ids = [tid for tid in (tweet_id({"TWEET_URL": u}) for u in urls) if tid]
     if not ids:
         html_component("<div style='color:#999'>No embeddable tweets.</div>", height=60)
         return
@@ -90,6 +126,54 @@ def _render_embeds(urls: list[str], theme: str = "dark") -> None:
 
 # --- page UI ---------------------------------------------------------------
 
+def _feed_state() -> dict:
+    # slices: [start cursor, size, row count] per loaded slice – no rows, they are
+    # re-fetched by cursor; next: keyset cursor after the last slice ("" before the first,
+    # None once the table is exhausted); dropped: rows trimmed off the top so far
+    if "tweet_feed" not in st.session_state:
+        st.session_state.tweet_feed = {"slices": [], "next": "", "dropped": 0}
+    return st.session_state.tweet_feed
+
+def _feed_load(feed: dict, page_size: int) -> None:
+    cursor = feed["next"] or None
+    rows, feed["next"] = _feed_slice(cursor, page_size)
+    feed["slices"].append([cursor, int(page_size), len(rows)])
+    # trim whole slices off the top, always keeping the one just loaded
+    while len(feed["slices"]) > 1 and sum(n for _, _, n in feed["slices"]) > FEED_WINDOW:
+        feed["dropped"] += feed["slices"].pop(0)[2]
+
+def _feed(page_size: int, theme: str) -> None:
+    feed = _feed_state()
+    if not feed["slices"]:
+        _feed_load(feed, page_size)
+
+    rows = []
+    for s in feed["slices"]:
+        part, _ = _feed_slice(s[0], s[1])
+        s[2] = len(part)
+        rows += part
+    start = len(rows) - feed["slices"][-1][2] if len(feed["slices"]) > 1 else 0  # first new card
+
+    if feed["dropped"]:
+        c1, c2 = st.columns([3, 1])
+        c1.caption(f"{feed['dropped']:,} earlier tweet(s) were dropped to keep the feed light.")
+        if c2.button("Back to top", key="feed_top"):
+            del st.session_state.tweet_feed
+            st.rerun()
+    st.caption(f"Showing {len(rows)} tweet(s) (window of {FEED_WINDOW})")
+
+    if rows:
+        html_component(feed_document(rows, theme=theme, start=start),
+                       height=FEED_VIEWPORT_H, scrolling=True)
+    else:
+        st.info("No tweets to show.")
+
+    if feed["next"] is None:
+        st.caption("You're all caught up.")
+    elif st.button("Load more ▼", key="feed_more"):
+        _feed_load(feed, page_size)
+        st.rerun()
+
 def main():
     st.set_page_config(layout="wide")
     st.subheader("Trending Social Posts")
@@ -97,24 +181,38 @@ def main():
     # Controls
     col1, col2, col3, col4, col5 = st.columns([1,1,1,1,2])
     with col1:
-        page_size = st.selectbox("Page size", [5, 10, 15], index=1, key="news_page_size")
+        page_size = st.selectbox("Page size", PAGE_SIZES, index=PAGE_SIZES.index(PAGE_SIZE_DEFAULT),
+                                 key="news_page_size")
     with col2:
         theme = st.selectbox("Theme", ["dark", "light"], index=0, key="news_theme")
     with col3:
-        mode_append = st.toggle("Append mode", value=False, help="If on, 'Next' adds 10 more below (load more).")
+        mode_feed = st.toggle("Infinite feed", value=False,
+                              help="Scroll one feed instead of pages; 'Load more' adds the next tweets below.")
     with col4:
         if st.button("Refresh list"):
-            st.cache_data.clear()
-            st.rerun()
+            # only the tweet queries – not every cached query and rendered image of every page
+            wait = manual_refresh("tweets.*")
+            if wait is not None:
+                st.toast(f"Just refreshed – try again in {wait:.0f}s.")
+            else:
+                st.session_state.pop("tweet_feed", None)
+                st.rerun()
     with col5:
         total = _total_tweet_count()
         st.markdown(f"<div style='margin-top:16px;color:#888'>Total: {total:,}</div>", unsafe_allow_html=True)
 
-    # Session state for pagination/append
+    if mode_feed:
+        try:
+            _feed(page_size, theme)
+            return
+        except Exception:
+            # tweets.feed_page needs the card columns; pages fall back to plain embeds
+            st.session_state.pop("tweet_feed", None)
+            st.info("The infinite feed isn't available for this data – showing pages instead.")
+
+    # Session state for pagination
     if "news_offset" not in st.session_state:
         st.session_state.news_offset = 0
-    if "news_accum_urls" not in st.session_state:
-        st.session_state.news_accum_urls = []
 
     # Nav buttons
     nav1, nav2, nav3 = st.columns([1,1,3])
@@ -122,17 +220,10 @@ def main():
         disabled_prev = st.session_state.news_offset <= 0
         if st.button("◀ Prev", disabled=disabled_prev):
             st.session_state.news_offset = max(0, st.session_state.news_offset - page_size)
-            if not mode_append:
-                st.session_state.news_accum_urls = []
             st.rerun()
     with nav2:
         disabled_next = (st.session_state.news_offset + page_size) >= total
         if st.button("Next ▶", disabled=disabled_next):
-            if mode_append:
-                # keep current offset for next slice and accumulate
-                pass
-            else:
-                st.session_state.news_accum_urls = []
             st.session_state.news_offset = min(total, st.session_state.news_offset + page_size)
             st.rerun()
     with nav3:
@@ -143,34 +234,20 @@ def main():
         )
         if cur_page != (st.session_state.news_offset // page_size) + 1:
             st.session_state.news_offset = (int(cur_page) - 1) * page_size
-            if not mode_append:
-                st.session_state.news_accum_urls = []
             st.rerun()
 
-    # Fetch URLs for current slice
-    cur_urls = _get_urls(limit=page_size, offset=st.session_state.news_offset)
-
-    # Append vs paginate
-    if mode_append:
-        # Accumulate (dedupe while preserving order)
-        seen = set(st.session_state.news_accum_urls)
-        for u in cur_urls:
-            if u not in seen:
-                st.session_state.news_accum_urls.append(u); seen.add(u)
-        urls_to_render = st.session_state.news_accum_urls
-    else:
-        urls_to_render = cur_urls
+    # Fetch rows for current slice
+    rows = _get_rows(limit=page_size, offset=st.session_state.news_offset)
 
-    st.caption(f"Showing {len(urls_to_render)} tweet(s) "
+    st.caption(f"Showing {len(rows)} tweet(s) "
                f"[page size {page_size}, offset {st.session_state.news_offset}]")
 
-    # Render embeds
-    if urls_to_render:
-        _render_embeds(urls_to_render, theme=theme)
+    # Render cards
+    if rows:
+        _render_cards(rows, theme=theme)
     else:
         st.info("No tweets to show.")
 
-    mode_append = False
     # --- bottom pager ---
     st.divider()
     b1, b2, b3 = st.columns([1, 1, 3])
@@ -183,15 +260,11 @@ def main():
         disabled_prev = st.session_state.news_offset <= 0
         if st.button("◀ Prev", key="prev_bottom", disabled=disabled_prev):
             st.session_state.news_offset = max(0, st.session_state.news_offset - page_size)
-            if not mode_append:
-                st.session_state.news_accum_urls = []
             st.rerun()
 
     with b2:
         disabled_next = (st.session_state.news_offset + page_size) >= total
         if st.button("Next ▶", key="next_bottom", disabled=disabled_next):
-            if not mode_append:
-                st.session_state.news_accum_urls = []
             st.session_state.news_offset = min(total, st.session_state.news_offset + page_size)
             st.rerun()
 
@@ -206,8 +279,6 @@ def main():
         )
         if new_page != cur_page_val:
             st.session_state.news_offset = (int(new_page) - 1) * page_size
-            if not mode_append:
-                st.session_state.news_accum_urls = []
             st.rerun()
 
 
@@ -1,11 +1,20 @@
 # page3_news/streamlit_app.py
 import re
-import io
 import datetime as dt
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import lru_cache
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import streamlit as st
 
-from db import fetch_df  # uses your get_conn() under the hood
+from db import fetch_arrow, fetch_batches, fetch_many, fetch_query, get_search_index, peek, prefetch, prime  # uses your get_conn() under the hood
+from cache_scopes import on_invalidate
+from exports import EXPORT_DIR, FORMATS, ExportJob, static_url
+from normalize import ROW_KEY, ROW_KEY_SQL, published_at_between, published_at_sql, source_tables, sources_ready
+from keyset import SeekOrder, and_where, cursor_after, decode_cursor, encode_cursor
+from queries import bind, in_list, spec
 
 DEFAULT_DB = st.secrets.get("client_db", "SNACKLASH2")
 DEFAULT_SCHEMA = "RAW"
@@ -14,49 +23,79 @@ FQT = f"{DEFAULT_DB}.{DEFAULT_SCHEMA}.{TABLE_NAME}"
 
 PAGE_SIZE_DEFAULT = 10
 MAX_PAGE_SIZE = 100
+PREFETCH_PAGES = 6  # pages kept per session (current, the ones next to it, a few visited)
+COUNT_CAP = 10_000  # past this, a recount (only if the cached total is gone) shows "10,000+"
+SORT_OPTIONS = ["Most recent", "Oldest", "Title A→Z", "Relevance"]  # Relevance: BM25, needs keywords
 
 # ----- helpers -----
+@lru_cache(maxsize=128)
+def term_regex(terms: tuple) -> str | None:
+    # one case-insensitive alternation per keyword set (longest first, so "glp-1" beats "glp");
+    # the same text works for Python re and for Arrow's RE2
+    alts = sorted({t.strip() for t in terms if t.strip()}, key=len, reverse=True)
+    return "(?i)(" + "|".join(re.escape(t) for t in alts) + ")" if alts else None
+
+@lru_cache(maxsize=128)
+def _term_pattern(terms: tuple):
+    rx = term_regex(terms)
+    return re.compile(rx) if rx else None
+
 def highlight_terms(text: str, terms: list[str]) -> str:
-    if not text or not terms:
+    pattern = _term_pattern(tuple(terms or ()))
+    if not text or pattern is None:
         return text or ""
-    pattern = r"(" + "|".join(re.escape(t) for t in terms if t.strip()) + r")"
-    try:
-        return re.sub(pattern, r"**\1**", text, flags=re.IGNORECASE)
-    except re.error:
-        return text
-
-@st.cache_data(ttl=120, show_spinner=False)
+    return pattern.sub(r"**\1**", text)
+
+def highlight_columns(tbl: pa.Table, terms: list[str], cols=("TITLE", "SNIPPET")) -> pa.Table:
+    """Bold every keyword in whole page columns at once (one RE2 pass per column, no per-row Python)."""
+    rx = term_regex(tuple(terms or ()))
+    if rx is None:
+        return tbl
+    for c in cols:
+        if c in tbl.column_names:
+            col = pc.replace_substring_regex(tbl.column(c), pattern=rx, replacement=r"**\1**")
+            tbl = tbl.set_column(tbl.column_names.index(c), c, col)
+    return tbl
+
+# no TTL wrapper: fetch_df re-runs this only when RAW.RSS_ARTICLES' watermark advances
 def distinct_sources(start_dt, end_dt) -> list[str]:
-    where = ""
-    params = {}
     if start_dt and end_dt:
-        where = """
-          WHERE PULLED_AT >= TO_TIMESTAMP_TZ(%(dstart)s)
-            AND PULLED_AT <  TO_TIMESTAMP_TZ(%(dend)s)
-        """
         params = {
             "dstart": f"{start_dt} 00:00:00 +00:00",
             "dend":   f"{end_dt} 23:59:59 +00:00",
         }
+        df = fetch_query("news.sources_in_range", params, fqt=FQT)
+    else:
+        df = fetch_query("news.sources", fqt=FQT)
+    return [s for s in df["SRC"].dropna().astype(str).tolist() if s]
 
-    sql = f"""
-        SELECT DISTINCT COALESCE(SOURCE_NAME, SOURCE_FEED_TITLE, SOURCE_FEED_URL) AS SRC
-        FROM {FQT}
-        {where}
-        ORDER BY SRC
+def source_options(start_dt, end_dt) -> dict:
     """
-    df = fetch_df(sql, params)
-    return [s for s in df["SRC"].dropna().astype(str).tolist() if s]
+    Sources filter options → {label: (SOURCE_ID, article count)}. Read from the source
+    dimension's daily counts once normalize.py has built it (a few hundred rows instead of a
+    DISTINCT over every article); until then labels only, with (None, None).
+    """
+    if not sources_ready(FQT):
+        return {s: (None, None) for s in distinct_sources(start_dt, end_dt)}
+    dim, days = source_tables(FQT)
+    where, params = "", {}
+    if start_dt and end_dt:
+        where, params = "WHERE d.DAY >= %(dstart)s AND d.DAY <= %(dend)s", {"dstart": str(start_dt), "dend": str(end_dt)}
+    tbl = fetch_query("news.source_counts", params, as_arrow=True, dim=dim, days=days, where=where)
+    return {label: (sid, int(n)) for sid, label, n in zip(*(tbl.column(c).to_pylist() for c in ("SOURCE_ID", "SRC", "N")))
+            if label}
 
 
-def build_where_and_params(q, start_dt, end_dt, sources, use_published_parse=False):
+def build_where_and_params(q, start_dt, end_dt, sources, use_published_parse=False, source_ids=None):
     """
     Build WHERE clause (as a string) and params (dict).
     - If start_dt/end_dt provided => add a date clause.
-    - If sources provided => filter by COALESCE(source fields).
+    - If source_ids provided => SOURCE_ID IN (...) (normalized source dimension), plus
+      the COALESCE(source fields) match for rows not stamped yet (SOURCE_ID IS NULL),
+      else if sources provided => filter by COALESCE(source fields) only.
     - If q provided => ILIKE across TITLE, SUMMARY, CONTENT_TEXT, CONTENT_HTML.
-    - If use_published_parse=True => date clauses use TRY_TO_TIMESTAMP_TZ(PUBLISHED_AT_RAW),
-      otherwise use PULLED_AT.
+    - If use_published_parse=True => date clauses use the normalized PUBLISHED_AT
+      (normalize.published_at_sql), otherwise use PULLED_AT.
     """
     params: dict = {}
     clauses: list[str] = []
@@ -66,13 +105,8 @@ def build_where_and_params(q, start_dt, end_dt, sources, use_published_parse=Fal
         params["dstart"] = f"{start_dt} 00:00:00 +00:00"
         params["dend"]   = f"{end_dt} 23:59:59 +00:00"
         if use_published_parse:
-            clauses.append(
-                """
-                TRY_TO_TIMESTAMP_TZ(PUBLISHED_AT_RAW) IS NOT NULL
-                AND TRY_TO_TIMESTAMP_TZ(PUBLISHED_AT_RAW) >= TO_TIMESTAMP_TZ(%(dstart)s)
-                AND TRY_TO_TIMESTAMP_TZ(PUBLISHED_AT_RAW) <= TO_TIMESTAMP_TZ(%(dend)s)
-                """
-            )
+            # prunes on the typed column once normalized; rows not normalized yet parse inline
+            clauses.append(published_at_between(FQT, "TO_TIMESTAMP_TZ(%(dstart)s)", "TO_TIMESTAMP_TZ(%(dend)s)"))
         else:
             clauses.append(
                 """
@@ -82,18 +116,25 @@ def build_where_and_params(q, start_dt, end_dt, sources, use_published_parse=Fal
             )
 
     # ---- Source filter ----
+    by_key = ""
     if sources:
         src_keys = []
         for i, s in enumerate(sources):
             k = f"src{i}"
             params[k] = s.lower()
             src_keys.append(f"%({k})s")
-        clauses.append(
-            f"""
+        by_key = f"""
             LOWER(COALESCE(SOURCE_NAME, SOURCE_FEED_TITLE, SOURCE_FEED_URL))
             IN ({", ".join(src_keys)})
             """
-        )
+    if source_ids:
+        frag, id_params = in_list(source_ids, "sid")
+        params.update(id_params)
+        # rows ingested since the last normalize run have no SOURCE_ID yet
+        clauses.append(f"(SOURCE_ID IN ({frag}) OR (SOURCE_ID IS NULL AND {by_key}))" if by_key
+                       else f"SOURCE_ID IN ({frag})")
+    elif by_key:
+        clauses.append(by_key)
 
     # ---- Keyword search ----
     if q and q.strip():
@@ -116,18 +157,341 @@ def build_where_and_params(q, start_dt, end_dt, sources, use_published_parse=Fal
 
 
 
-def build_order_by(choice: str, use_published_parse=False) -> str:
-    if choice == "Most recent":
-        if use_published_parse:
-            return "ORDER BY TRY_TO_TIMESTAMP_TZ(PUBLISHED_AT_RAW) DESC NULLS LAST"
-        return "ORDER BY PULLED_AT DESC NULLS LAST"
+def build_seek_order(choice: str, use_published_parse=False) -> SeekOrder:
+    # every sort option is keyset-paginated on (sort value, row key) – GUIDs repeat, so they
+    # can't break ties; "Relevance" only exists in the search index (see search_page), so in
+    # SQL it falls back to "Most recent"
+    if use_published_parse:
+        ts = SeekOrder(published_at_sql(FQT), tiebreak_sql=ROW_KEY_SQL, param_sql="TO_TIMESTAMP_TZ({})")
+    else:
+        ts = SeekOrder("PULLED_AT", tiebreak_sql=ROW_KEY_SQL, param_sql="TO_TIMESTAMP_TZ({})")
     if choice == "Oldest":
-        if use_published_parse:
-            return "ORDER BY TRY_TO_TIMESTAMP_TZ(PUBLISHED_AT_RAW) ASC NULLS LAST"
-        return "ORDER BY PULLED_AT ASC NULLS LAST"
+        return ts
+    if choice == "Title A→Z":
+        return SeekOrder("TITLE", tiebreak_sql=ROW_KEY_SQL)
+    ts.descending = True  # "Most recent" (and the fallback)
+    return ts
+
+def build_order_by(choice: str, use_published_parse=False) -> str:
+    return build_seek_order(choice, use_published_parse).order_by()
+
+# List view: only what a card shows, plus a snippet computed in the warehouse, so pages
+# never carry CONTENT_TEXT / CONTENT_HTML / enclosures. The rest loads per card (article_detail).
+# Without keywords the snippet is SUMMARY if it is substantial, else the start of CONTENT_TEXT;
+# with keywords it is a window of the body starting SNIPPET_LEAD chars before the first match.
+SNIPPET_CHARS = 240
+SNIPPET_LEAD = 80
+CARD_COLS = [
+    "GUID", "TITLE", "URL",
+    "SOURCE_NAME", "SOURCE_FEED_TITLE", "SOURCE_FEED_URL",
+    "PUBLISHED_AT_RAW", "UPDATED_AT_RAW", "PULLED_AT", "AUTHOR_NAME",
+]
+_LEAD_SNIPPET = f"""CASE WHEN LENGTH(TRIM(COALESCE(SUMMARY, ''))) >= 40 THEN SUBSTR(SUMMARY, 1, {SNIPPET_CHARS})
+          ELSE SUBSTR(COALESCE(CONTENT_TEXT, ''), 1, {SNIPPET_CHARS}) END"""
+_ROW_KEY = f"{ROW_KEY_SQL} AS {ROW_KEY}"  # keyset tie-breaker, detail lookup, index order
+CARD_SELECT = ", ".join(CARD_COLS + [_ROW_KEY, f"{_LEAD_SNIPPET} AS SNIPPET"])
+_NO_MATCH = 1_000_000_000
+
+def card_select(terms) -> tuple[str, dict]:
+    """→ (card select list, params it binds): the query-aware snippet needs the keywords."""
+    terms = [t.strip().lower() for t in terms or () if t.strip()]
+    if not terms:
+        return CARD_SELECT, {}
+    body = "COALESCE(CONTENT_TEXT, SUMMARY, '')"
+    params = {f"hl{i}": t for i, t in enumerate(terms)}
+    first = "LEAST(" + ", ".join(
+        f"COALESCE(NULLIF(POSITION(%({k})s IN LOWER({body})), 0), {_NO_MATCH})" for k in params
+    ) + ")"
+    snippet = f"""CASE WHEN {first} < {_NO_MATCH} THEN
+            CASE WHEN {first} > {SNIPPET_LEAD + 1} THEN '…' ELSE '' END
+            || SUBSTR({body}, GREATEST(1, {first} - {SNIPPET_LEAD}), {SNIPPET_CHARS})
+          ELSE {_LEAD_SNIPPET} END AS SNIPPET"""
+    return ", ".join(CARD_COLS + [_ROW_KEY, snippet]), params
+
+# Select list (exact columns from your schema) – shown when a card's details are opened
+DETAIL_COLS = [
+    "SUMMARY", "CONTENT_TEXT", "CATEGORIES", "MATCHING_RULE_IDS", "MATCHING_TERMS",
+    "AUTHOR_EMAIL", "AUTHOR_URI", "IMAGE_URL", "GUID_IS_PERMALINK",
+    "ENCLOSURE_URL", "ENCLOSURE_TYPE", "ENCLOSURE_LENGTH",
+]
+
+@st.cache_data(show_spinner=False, max_entries=512, ttl=3600)
+def article_detail(guid: str, row_key: str) -> dict:
+    # per-row cache: opening the same card again (any session) is free
+    tbl = fetch_query("news.detail", {"guid": guid, "row_key": row_key}, as_arrow=True,
+                      select_list=", ".join(DETAIL_COLS), fqt=FQT, row_key=ROW_KEY_SQL)
+    rows = tbl.slice(0, 1).to_pylist()
+    return rows[0] if rows else {}
+
+on_invalidate("news.detail", article_detail.clear)
+
+def page_spec(where_sql: str, params: dict, order: SeekOrder, cursor, limit: int, terms=()):
+    # The first page also carries the filter's total (COUNT(*) OVER ()); later pages seek
+    # past `cursor`. Both ask for limit+1 rows: the extra one only tells us whether there is a next page.
+    select_list, hl_params = card_select(terms)
+    params = {**params, **hl_params}
+    common = dict(select_list=select_list, sort_key=order.select_key(), fqt=FQT,
+                  order_by=order.order_by())
+    if cursor is None:
+        return spec("news.first_page", {**params, "limit": limit + 1}, where=where_sql, **common)
+    seek_sql, seek_params = order.seek(cursor)
+    return spec("news.page", {**params, **seek_params, "limit": limit + 1},
+                where=and_where(where_sql, seek_sql), **common)
+
+def seek_page(where_sql: str, params: dict, order: SeekOrder, cursor, limit: int, terms=()):
+    """
+    One page through keyset SQL → (total, total_is_lower_bound, page table, next cursor or None).
+    The total is counted once per filter state: it comes back with the first page and is cached
+    under that filter's news.count statement, so Prev/Next never re-count. If the entry has been
+    evicted, a capped count stops scanning at COUNT_CAP rows.
+    """
+    count = spec("news.count", params, fqt=FQT, where=where_sql)
+    approx = False
+    if cursor is None:
+        page_tbl = fetch_arrow(*page_spec(where_sql, params, order, None, limit, terms))
+        total = page_tbl.column("TOTAL_N")[0].as_py() if page_tbl.num_rows else 0
+        prime(count[0], count[1], pa.table({"N": [int(total)]}), count[2])
+    else:
+        cached = peek(*count)
+        if cached is not None:
+            page_tbl = fetch_arrow(*page_spec(where_sql, params, order, cursor, limit, terms))
+            total = cached.column(0)[0].as_py()
+        else:
+            res = fetch_many({
+                "count": spec("news.count_capped", {**params, "cap": COUNT_CAP}, fqt=FQT, where=where_sql),
+                "page": page_spec(where_sql, params, order, cursor, limit, terms),
+            }, as_arrow=True)
+            total = res["count"].column(0)[0].as_py()
+            approx = total >= COUNT_CAP
+            page_tbl = res["page"]
+    next_cursor = cursor_after(page_tbl.slice(0, limit), ROW_KEY) if page_tbl.num_rows > limit else None
+    return int(total), approx, page_tbl.slice(0, limit), next_cursor
+
+def default_specs() -> dict:
+    # what a fresh visitor sees: no filters, "Most recent" by published date, first page
+    where_sql, params = build_where_and_params("", None, None, [], use_published_parse=True)
+    order = build_seek_order("Most recent", use_published_parse=True)
+    return {"page": page_spec(where_sql, params, order, None, PAGE_SIZE_DEFAULT)}
+
+def index_sort(choice: str, use_published_parse=False) -> str:
+    # the search index's equivalent of build_order_by (search_index.SORTS)
+    if choice == "Relevance":
+        return "relevance"
     if choice == "Title A→Z":
-        return "ORDER BY TITLE ASC NULLS LAST"
-    return ""
+        return "title_asc"
+    col = "published" if use_published_parse else "pulled"
+    return f"{col}_asc" if choice == "Oldest" else f"{col}_desc"
+
+def search_args(q, start_dt, end_dt, sources, choice, use_published_parse) -> dict:
+    # index.search keywords for a filter state (same instants build_where_and_params binds)
+    start = end = None
+    if start_dt and end_dt:
+        start = dt.datetime.combine(start_dt, dt.time.min, tzinfo=dt.timezone.utc).timestamp()
+        end = dt.datetime.combine(end_dt, dt.time(23, 59, 59), tzinfo=dt.timezone.utc).timestamp()
+    return dict(q=q, sort=index_sort(choice, use_published_parse),
+                date_col="published_at" if use_published_parse else "pulled_at",
+                start=start, end=end, sources=[s.lower() for s in sources])
+
+def in_index_order(tbl: pa.Table, hits: list) -> pa.Table:
+    # rows fetched by GUID IN (...) come back in any order, with every row sharing a GUID;
+    # keep the index's (GUID, row key) hits, in its order
+    first: dict = {}
+    for i, k in enumerate(tbl.column(ROW_KEY).to_pylist()):
+        first.setdefault(k, i)
+    return tbl.take([first[k] for _, k in hits if k in first])
+
+def search_page(index, q, start_dt, end_dt, sources, choice, use_published_parse, cursor, limit):
+    """
+    Keyword search through the local FTS index: filter, rank and page there, then fetch
+    just this page's rows by GUID. → (total, page table in result order, next cursor or None)
+    """
+    pos = int(decode_cursor(cursor)[0]) if cursor else 0
+    hits, total = index.search(
+        **search_args(q, start_dt, end_dt, sources, choice, use_published_parse), limit=limit, offset=pos
+    )
+    if not hits:
+        return total, pa.table({"GUID": pa.array([], pa.string())}), None
+    frag, gparams = in_list(list(dict.fromkeys(g for g, _ in hits)), "g")
+    select_list, hl_params = card_select(q.split())
+    tbl = fetch_query("news.by_guid", {**gparams, **hl_params}, as_arrow=True,
+                      select_list=select_list, fqt=FQT, guids=frag)
+    next_cursor = encode_cursor(pos + limit, None) if pos + limit < total else None
+    return total, in_index_order(tbl, hits), next_cursor
+
+# Export: every row of the filter (not just the page), streamed to a file by exports.ExportJob
+EXPORT_COLS = [
+    "PULLED_AT", "PUBLISHED_AT_RAW", "UPDATED_AT_RAW",
+    "SOURCE_NAME", "SOURCE_FEED_TITLE", "SOURCE_FEED_URL",
+    "TITLE", "SUMMARY", "CONTENT_TEXT", "URL", "AUTHOR_NAME", "CATEGORIES", "GUID",
+]
+EXPORT_GUID_BATCH = 1000
+
+def sql_export_source(where_sql: str, params: dict, order: SeekOrder):
+    sql, bound = bind("news.export", params, select_list=", ".join(EXPORT_COLS), fqt=FQT,
+                      where=where_sql, order_by=order.order_by())
+    return lambda cancel: fetch_batches(sql, bound, as_arrow=True, cancel=cancel)
+
+def index_export_source(index, search_kw: dict):
+    # walk the index's ranking EXPORT_GUID_BATCH GUIDs at a time and fetch those rows
+    def chunks(cancel):
+        pos = 0
+        while not cancel.is_set():
+            hits, _ = index.search(**search_kw, limit=EXPORT_GUID_BATCH, offset=pos)
+            if not hits:
+                return
+            frag, gparams = in_list(list(dict.fromkeys(g for g, _ in hits)), "g")
+            sql, bound = bind("news.by_guid", gparams, select_list=", ".join(EXPORT_COLS + [_ROW_KEY]),
+                              fqt=FQT, guids=frag)
+            parts = list(fetch_batches(sql, bound, as_arrow=True, cancel=cancel))
+            if parts:
+                yield in_index_order(pa.concat_tables(parts), hits).drop_columns([ROW_KEY])
+            pos += len(hits)
+    return chunks
+
+def export_panel(make_source, total: int, approx: bool = False) -> None:
+    """Format picker + "Prepare export"; while the job runs, a fragment polls its progress."""
+    # files are only handed out by Streamlit's static file handler, straight from disk – an
+    # st.download_button would load the whole file into memory on every rerun
+    if not st.get_option("server.enableStaticServing") or static_url(EXPORT_DIR) is None:
+        st.error("Exports need static file serving: set server.enableStaticServing = true and keep "
+                 "EXPORT_DIR under static/.")
+        return
+    job = st.session_state.get("news_export_job")
+    running = job is not None and not job.done
+
+    @st.fragment(run_every=1.0 if running else None)
+    def panel():
+        job = st.session_state.get("news_export_job")
+        if job is not None and not job.done:
+            p = job.progress()
+            text = f"Exporting… {p['rows']:,} rows · {p['bytes'] / 1e6:.1f} MB"
+            st.progress(p["fraction"] or 0.0, text=text)
+            if st.button("Cancel export", key="news_export_cancel"):
+                job.cancel()
+            return
+        if running:  # finished since the last full run: rerun the page to stop polling
+            st.rerun()
+
+        c_fmt, c_go = st.columns([1, 2])
+        with c_fmt:
+            fmt = st.radio("Export format", list(FORMATS), horizontal=True, key="news_export_fmt",
+                           label_visibility="collapsed")
+        with c_go:
+            if st.button(f"Prepare export of all {total:,}{'+' if approx else ''} results", key="news_export_go"):
+                st.session_state.news_export_job = ExportJob(
+                    make_source(), fmt, total_hint=None if approx else total, label="news_results", tag="news:export"
+                ).start()
+                st.rerun()
+
+        if job is None:
+            return
+        if job.status == "done":
+            name = f"news_results{FORMATS[job.fmt]}"
+            if job.path.exists():
+                st.markdown(f'<a href="{static_url(job.path)}" download="{name}">⬇ Download {name}</a> '
+                            f"({job.rows:,} rows)", unsafe_allow_html=True)
+            else:
+                st.caption("The export file has expired; prepare it again.")
+        elif job.status == "cancelled":
+            st.caption("Export cancelled.")
+        elif job.status == "error":
+            st.error(f"Export failed: {job.error}")
+
+    panel()
+
+def render_detail(d: dict, terms: list[str]) -> None:
+    if not d:
+        st.caption("Article no longer available.")
+        return
+    meta = []
+    if d.get("CATEGORIES"):
+        meta.append(f"Categories: {d['CATEGORIES']}")
+    if d.get("MATCHING_TERMS"):
+        meta.append(f"Matched terms: {d['MATCHING_TERMS']}")
+    if d.get("MATCHING_RULE_IDS"):
+        meta.append(f"Rules: {d['MATCHING_RULE_IDS']}")
+    if d.get("AUTHOR_EMAIL") or d.get("AUTHOR_URI"):
+        meta.append(f"Author contact: {d.get('AUTHOR_EMAIL') or d.get('AUTHOR_URI')}")
+    if meta:
+        st.caption(" • ".join(meta))
+    if d.get("IMAGE_URL"):
+        st.image(d["IMAGE_URL"], width=320)
+    body = d.get("CONTENT_TEXT") or d.get("SUMMARY") or ""
+    if body:
+        st.markdown(highlight_terms(body, terms))
+    if d.get("ENCLOSURE_URL"):
+        st.caption(f"Enclosure: [{d.get('ENCLOSURE_TYPE') or 'file'}]({d['ENCLOSURE_URL']})"
+                   + (f" ({d['ENCLOSURE_LENGTH']:,} bytes)" if d.get("ENCLOSURE_LENGTH") else ""))
+
+# Facets: per source, per day, per matching rule / term, and the total, in one
+# GROUPING SETS scan cached under the filter's statement (paging never re-runs it).
+FACET_TOP = 10
+
+def facet_counts(where_sql: str, params: dict, use_published_parse=False) -> pd.DataFrame:
+    day = f"CAST({published_at_sql(FQT) if use_published_parse else 'PULLED_AT'} AS DATE)"
+    return fetch_query("news.facets", params, fqt=FQT, where=where_sql, day=day)
+
+def index_facet_counts(index, search_kw: dict) -> pd.DataFrame:
+    # keyword searches: source and day facets straight from the local index (no rules there)
+    kw = {k: v for k, v in search_kw.items() if k != "sort"}
+    return pd.DataFrame(index.facets(**kw), columns=["FACET", "VALUE", "N"])
+
+def render_facets(df: pd.DataFrame) -> None:
+    by = {f: g[["VALUE", "N"]] for f, g in df.dropna(subset=["VALUE"]).groupby("FACET")}
+    top = lambda f: by[f].sort_values("N", ascending=False).head(FACET_TOP)
+    c_src, c_day, c_rule = st.columns([2, 3, 2])
+    if "source" in by:
+        with c_src:
+            st.caption("Sources")
+            st.dataframe(top("source"), hide_index=True, use_container_width=True)
+    if "day" in by:
+        with c_day:
+            st.caption("Articles per day")
+            st.bar_chart(by["day"].set_index("VALUE")["N"].sort_index())
+    with c_rule:
+        for f, label in (("rule", "Matching rules"), ("term", "Matching terms")):
+            if f in by:
+                st.caption(label)
+                st.dataframe(top(f), hide_index=True, use_container_width=True)
+
+# Speculative paging: the pages either side of the current one load in the background
+# (db.prefetch) into a small per-session LRU of cursor → Future, so Next/Prev usually
+# render from memory. The LRU belongs to one filter state; changing filters drops it.
+def page_lru(filter_state: dict) -> OrderedDict:
+    lru = st.session_state.get("news_page_lru")
+    if lru is None or lru["state"] != filter_state:
+        if lru is not None:
+            for fut in lru["pages"].values():
+                fut.cancel()  # not started yet → never runs; running ones are just dropped
+        lru = st.session_state.news_page_lru = {"state": dict(filter_state), "pages": OrderedDict()}
+    return lru["pages"]
+
+def _remember(pages: OrderedDict, cursor, fut: Future) -> None:
+    pages[cursor] = fut
+    pages.move_to_end(cursor)
+    while len(pages) > PREFETCH_PAGES:
+        pages.popitem(last=False)[1].cancel()
+
+def load_page(pages: OrderedDict, cursor, load):
+    """The page at `cursor`: prefetched (waits if still loading) or loaded now, then kept for Prev."""
+    fut = pages.get(cursor)
+    if fut is not None and not fut.cancelled():
+        try:
+            res = fut.result()
+            pages.move_to_end(cursor)
+            return res
+        except Exception:
+            pass  # a failed speculative load is retried in the foreground
+    res = load(cursor)
+    done = Future()
+    done.set_result(res)
+    _remember(pages, cursor, done)
+    return res
+
+def prefetch_pages(pages: OrderedDict, cursors, load) -> None:
+    for c in cursors:
+        if c not in pages:
+            _remember(pages, c, prefetch(load, c))
 
 # ----- UI -----
 def main():
@@ -150,16 +514,20 @@ def main():
                 start_dt, end_dt = start_dt
 
         query = st.text_input("Keywords", placeholder="e.g., semaglutide supply, pricing, marketing")
-        # source list (no date filter unless chosen)
-        picks = st.multiselect("Sources", options=distinct_sources(start_dt, end_dt), default=[])
+        # source list (no date filter unless chosen), with article counts once normalized
+        src_opts = source_options(start_dt, end_dt)
+        picks = st.multiselect(
+            "Sources", options=list(src_opts), default=[],
+            format_func=lambda s: f"{s} ({src_opts[s][1]:,})" if src_opts.get(s, (None, None))[1] else s,
+        )
 
-        sort_by = st.selectbox("Sort by", ["Most recent", "Oldest", "Title A→Z"])
+        sort_by = st.selectbox("Sort by", SORT_OPTIONS)
         page_size = st.number_input("Results per page", 5, MAX_PAGE_SIZE, PAGE_SIZE_DEFAULT, step=5)
 
         use_pub = st.checkbox(
-            "Use published date (parse PUBLISHED_AT_RAW)",
+            "Use published date",
             value=True,
-            help="Sorts/filters by TRY_TO_TIMESTAMP_TZ(PUBLISHED_AT_RAW). Uncheck to use PULLED_AT."
+            help="Sorts/filters by PUBLISHED_AT (parsed from PUBLISHED_AT_RAW). Uncheck to use PULLED_AT."
         )
 
     #filter state
@@ -173,99 +541,89 @@ def main():
         "page_size": int(page_size),
     }
 
-    # Reset offset to 0 if filters changed
-    if st.session_state.get("news_prev_filter_state") != filter_state:
-        st.session_state.news_offset = 0
+    # Keywords go through the local search index once it has been built (ILIKE scans until then)
+    index = get_search_index(FQT) if (query or "").strip() else None
+    use_index = index is not None and index.ready
+    filter_state["index"] = use_index
+    if sort_by == "Relevance" and not use_index:
+        st.caption("Relevance needs keywords and the search index; showing Most recent.")
+
+    # Back to the first page if filters changed. news_cursors is a stack of opaque keyset
+    # cursors, one per page visited (None = first page): Next pushes, Prev pops.
+    if st.session_state.get("news_prev_filter_state") != filter_state or "news_cursors" not in st.session_state:
+        st.session_state.news_cursors = [None]
     st.session_state.news_prev_filter_state = filter_state
 
-    # Pagination state
-    if "news_offset" not in st.session_state:
-        st.session_state.news_offset = 0
-
     # Build SQL
+    source_ids = [src_opts[p][0] for p in picks]
     where_sql, params = build_where_and_params(
-        query, start_dt, end_dt, picks, use_published_parse=use_pub
+        query, start_dt, end_dt, picks, use_published_parse=use_pub,
+        source_ids=source_ids if source_ids and None not in source_ids else None,
     )
-    order_sql = build_order_by(sort_by, use_published_parse=use_pub)
-
-    # Count
-    count_sql = f"SELECT COUNT(*) AS N FROM {FQT} {where_sql}"
-    total = int(fetch_df(count_sql, params).iloc[0, 0])
+    order = build_seek_order(sort_by, use_published_parse=use_pub)
 
-    # Page slice
-    offset = int(st.session_state.news_offset)
+    cursors = st.session_state.news_cursors
+    terms = [t for t in (query or "").split() if t.strip()]
     limit = int(page_size)
-
-    # Clamp offset to the last full page
-    if total == 0:
-        offset = 0
+    offset = (len(cursors) - 1) * limit  # display only; the query seeks, it never skips
+    # Arrow results: pages are served from cache without copies
+    if use_index:
+        def load(cursor):
+            total, tbl, nxt = search_page(index, query, start_dt, end_dt, picks, sort_by, use_pub, cursor, limit)
+            return total, False, tbl, nxt
     else:
-        max_offset = ((total - 1) // limit) * limit
-        if offset > max_offset:
-            offset = max_offset
-            st.session_state.news_offset = offset
+        def load(cursor):
+            return seek_page(where_sql, params, order, cursor, limit, terms)
+    pages = page_lru(filter_state)
+    total, approx, page_tbl, next_cursor = load_page(pages, cursors[-1], load)
+
+    can_prev = len(cursors) > 1
+    can_next = next_cursor is not None
+    # warm N+1 (and N-1 if it has dropped out of the LRU) while this page renders
+    prefetch_pages(pages, ([next_cursor] if can_next else []) + ([cursors[-2]] if can_prev else []), load)
+
+    def go_next():
+        st.session_state.news_cursors = cursors + [next_cursor]
 
-    can_prev = offset > 0
-    can_next = (offset + limit) < total
+    def go_prev():
+        st.session_state.news_cursors = cursors[:-1]
 
     # TOP prev/next buttons 
     col_prev, col_next, _ = st.columns([1, 1, 6])
     with col_prev:
-        if st.button("⟵ Prev", key="news_prev_top", use_container_width=True, disabled=not can_prev):
-            st.session_state.news_offset = max(0, offset - limit)
-            st.rerun()
+        st.button("⟵ Prev", key="news_prev_top", use_container_width=True, disabled=not can_prev,
+                  on_click=go_prev)
     with col_next:
-        if st.button("Next ⟶", key="news_next_top", use_container_width=True, disabled=not can_next):
-            st.session_state.news_offset = offset + limit
-            st.rerun()
-
+        st.button("Next ⟶", key="news_next_top", use_container_width=True, disabled=not can_next,
+                  on_click=go_next)
 
-    # Select list (exact columns from your schema)
-    select_cols = [
-        "PULLED_AT", "PUBLISHED_AT_RAW", "UPDATED_AT_RAW",
-        "SOURCE_NAME", "SOURCE_FEED_TITLE", "SOURCE_FEED_URL",
-        "TITLE", "SUMMARY", "CONTENT_TEXT", "CONTENT_HTML",
-        "AUTHOR_NAME", "AUTHOR_EMAIL", "AUTHOR_URI",
-        "URL", "IMAGE_URL", "CATEGORIES", "MATCHING_RULE_IDS", "MATCHING_TERMS",
-        "GUID", "GUID_IS_PERMALINK", "ENCLOSURE_URL", "ENCLOSURE_TYPE", "ENCLOSURE_LENGTH"
-    ]
-    select_list = ", ".join(select_cols)
-
-    page_sql = f"""
-        SELECT {select_list}
-        FROM {FQT}
-        {where_sql}
-        {order_sql}
-        LIMIT {limit}
-        OFFSET {offset}
-    """
-    df_page = fetch_df(page_sql, params)
 
     # Summary
-    showing_lo = offset + 1 if total > 0 else 0
-    showing_hi = min(offset + limit, total)
-    st.markdown(f"**Showing {showing_lo}–{showing_hi} of {total}**")
+    showing_lo = offset + 1 if page_tbl.num_rows else 0
+    showing_hi = offset + page_tbl.num_rows
+    st.markdown(f"**Showing {showing_lo}–{showing_hi} of {total:,}{'+' if approx else ''}**")
 
-    if df_page.empty:
+    if page_tbl.num_rows == 0:
         st.info("No results found. Try widening the date range or changing keywords.")
         return
 
-    # Export current page
-    export_cols = [c for c in [
-        "PULLED_AT","PUBLISHED_AT_RAW","UPDATED_AT_RAW",
-        "SOURCE_NAME","SOURCE_FEED_TITLE","SOURCE_FEED_URL",
-        "TITLE","SUMMARY","CONTENT_TEXT","URL","AUTHOR_NAME","CATEGORIES"
-    ] if c in df_page.columns]
-    csv_buf = io.StringIO()
-    df_page[export_cols].to_csv(csv_buf, index=False)
-    st.download_button("Download CSV of current page",
-                       data=csv_buf.getvalue().encode("utf-8"),
-                       file_name="news_results.csv",
-                       mime="text/csv")
-
-    # Render cards
-    terms = [t for t in (query.split() if query else []) if t.strip()]
-    for _, r in df_page.iterrows():
+    # Breakdown of the whole result set (one aggregate; only while the toggle is on)
+    if st.toggle("Show breakdown", key="news_facets"):
+        if use_index:
+            facets = index_facet_counts(index, search_args(query, start_dt, end_dt, picks, sort_by, use_pub))
+        else:
+            facets = facet_counts(where_sql, params, use_published_parse=use_pub)
+        render_facets(facets)
+
+    # Export the whole result set (runs in the background; files land under static/exports)
+    if use_index:
+        kw = search_args(query, start_dt, end_dt, picks, sort_by, use_pub)
+        export_panel(lambda: index_export_source(index, kw), total)
+    else:
+        export_panel(lambda: sql_export_source(where_sql, params, order), total, approx)
+
+    # Render cards: keywords are bolded for the whole page at once, before the row loop
+    for i, r in enumerate(highlight_columns(page_tbl, terms).to_pylist()):  # plain dicts; nulls come through as None
         with st.container(border=True):
             title = str(r.get("TITLE") or "(No title)")
             url = r.get("URL")
@@ -276,18 +634,14 @@ def main():
             if not disp_date:
                 disp_date = r.get("PULLED_AT")
 
-            title_disp = highlight_terms(title, terms)
             if isinstance(url, str) and url.strip():
-                st.markdown(f"### [{title_disp}]({url})")
+                st.markdown(f"### [{title}]({url})")
             else:
-                st.markdown(f"### {title_disp}")
+                st.markdown(f"### {title}")
 
             st.caption(f"{source} • {disp_date}")
 
-            summary = (r.get("SUMMARY") or "")
-            body = (r.get("CONTENT_TEXT") or "")  # keep HTML out of the snippet by default
-            snippet = summary if len(str(summary).strip()) >= 40 else str(body)[:240]
-            snippet = highlight_terms(snippet, terms)
+            snippet = r.get("SNIPPET") or ""  # windowed in SQL, highlighted above
             if snippet:
                 st.markdown(snippet)
 
@@ -296,19 +650,23 @@ def main():
                 extras.append(f"Author: {r.get('AUTHOR_NAME')}")
             if isinstance(url, str) and url.strip():
                 extras.append(f"[Open original]({url})")
-            if r.get("CATEGORIES"):
-                extras.append(f"Categories: {r.get('CATEGORIES')}")
             if extras:
                 st.caption(" • ".join(extras))
 
+            # full content only for cards the user opens (toggle state lives in the session);
+            # GUIDs repeat in some feeds, so the key also carries the row's position
+            guid = r.get("GUID")
+            if guid and st.toggle("Details", key=f"news_detail_{offset + i}_{guid}"):
+                render_detail(article_detail(guid, r.get(ROW_KEY)), terms)
+
     # BOTTOM prev/next buttons
     bprev, bnext = st.columns([1, 1])
     with bprev:
         st.button("⟵ Prev", key="news_prev_bottom", use_container_width=True, disabled=not can_prev,
-                on_click=lambda: setattr(st.session_state, "news_offset", max(0, offset - limit)))
+                on_click=go_prev)
     with bnext:
         st.button("Next ⟶", key="news_next_bottom", use_container_width=True, disabled=not can_next,
-                on_click=lambda: setattr(st.session_state, "news_offset", offset + limit))
+                on_click=go_next)
 
 
 def render():
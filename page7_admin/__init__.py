@@ -0,0 +1 @@
+from .streamlit_app import main as page7, is_admin
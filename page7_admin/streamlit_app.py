@@ -0,0 +1,103 @@
+# page7_admin/streamlit_app.py
+### ADMIN: QUERY PERFORMANCE (only listed in the menu when ?admin=<ADMIN_TOKEN>)
+import pandas as pd
+import streamlit as st
+
+from config import setting
+from db import get_pool, get_query_log
+from queries import catalog
+from query_log import query_shape, shape_id
+from warmup import start_warmer
+
+
+def is_admin() -> bool:
+    token = setting("ADMIN_TOKEN")
+    return bool(token) and st.query_params.get("admin") == str(token)
+
+
+def _load_events(all_processes: bool) -> pd.DataFrame:
+    log = get_query_log()
+    events = log.read_file() if all_processes else log.events()
+    df = pd.DataFrame(events)
+    if df.empty:
+        return df
+    df["ts"] = pd.to_datetime(df["ts"], unit="s", utc=True)
+    return df
+
+
+def _per_shape(df: pd.DataFrame) -> pd.DataFrame:
+    cached = df["status"].isin(["hit", "stale", "coalesced", "shared"])
+    g = df.assign(_cached=cached, _warehouse=df["status"].isin(["miss", "refresh", "bypass", "stream"])).groupby("shape_id")
+    out = pd.DataFrame({
+        "calls": g.size(),
+        "p50_ms": g["wall_ms"].quantile(0.50),
+        "p95_ms": g["wall_ms"].quantile(0.95),
+        "hit_rate": g["_cached"].mean(),
+        "warehouse_runs": g["_warehouse"].sum(),
+        "avg_rows": g["rows"].mean(),
+        "avg_bytes": g["bytes"].mean(),
+        "top_tag": g["tag"].agg(lambda s: s.value_counts().index[0]),
+        "shape": g["shape"].first(),
+    })
+    return out.sort_values("p95_ms", ascending=False)
+
+
+def main():
+    if not is_admin():
+        st.warning("Admin only.")
+        return
+
+    st.subheader("Query Performance")
+    c1, c2, c3 = st.columns([1, 1, 2])
+    with c1:
+        all_processes = st.toggle("All processes (JSON log)", value=False,
+                                  help="Off: this process' ring buffer. On: every process writing QUERY_LOG_PATH.")
+    with c2:
+        top_n = st.number_input("Top N slowest", 5, 200, 20, step=5)
+    with c3:
+        st.caption(f"Connection pool: {get_pool().stats()}")
+
+    warmer = start_warmer()
+    if warmer is None:
+        st.caption("Warm-up: disabled (WARMUP_ENABLED=0)")
+    else:
+        status = warmer.status()
+        with st.expander(f"Warm-up: {'warm' if status['ready'] else 'cold'} · {status['cycles']} cycle(s)"):
+            jobs = pd.DataFrame.from_dict(status["jobs"], orient="index")
+            for col in ("ok_at", "last_run"):
+                jobs[col] = pd.to_datetime(jobs[col], unit="s", utc=True)
+            st.dataframe(jobs, use_container_width=True)
+
+    with st.expander("Query catalog (queries.py)"):
+        st.dataframe(pd.DataFrame([
+            {"name": q.name, "shape_id": shape_id(query_shape(q.sql)), "cache": str(q.cache),
+             "params": ", ".join(q.params), "doc": q.doc, "sql": q.sql}
+            for q in catalog()
+        ]), use_container_width=True, hide_index=True)
+
+    df = _load_events(all_processes)
+    if df.empty:
+        st.info("No queries recorded yet.")
+        return
+
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Calls", f"{len(df):,}")
+    m2.metric("Cache hit rate", f"{df['status'].isin(['hit', 'stale', 'coalesced', 'shared']).mean():.0%}")
+    m3.metric("Warehouse runs", f"{df['status'].isin(['miss', 'refresh', 'bypass', 'stream']).sum():,}")
+    m4.metric("p95 (ms)", f"{df['wall_ms'].quantile(0.95):,.0f}")
+
+    st.markdown("**By status**")
+    st.dataframe(df.groupby("status")["wall_ms"].describe(percentiles=[.5, .95]), use_container_width=True)
+
+    st.markdown("**Per query shape**")
+    st.dataframe(_per_shape(df), use_container_width=True)
+
+    st.markdown("**By page / widget**")
+    st.dataframe(
+        df.groupby("tag")["wall_ms"].agg(["count", "sum", "median"]).sort_values("sum", ascending=False),
+        use_container_width=True,
+    )
+
+    st.markdown(f"**Top {int(top_n)} slowest calls**")
+    cols = ["ts", "wall_ms", "status", "rows", "bytes", "query_id", "tag", "shape", "error"]
+    st.dataframe(df.nlargest(int(top_n), "wall_ms")[cols], use_container_width=True, hide_index=True)
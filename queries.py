@@ -0,0 +1,388 @@
+# queries.py
+### NAMED QUERY CATALOG
+# Every SQL statement the pages run lives here once, with:
+#   - bound parameters (%(name)s) instead of f-string literals, so LIMIT 10 vs LIMIT 20 is
+#     one statement text (one shape in the query log, one plan in Snowflake)
+#   - whitespace-normalized text, so the same query from two modules is one cache entry
+#   - a declared cache policy (see CACHE_* below)
+# Use: fetch_query("tweets.recent_urls", {"limit": 10})
+#      fetch_many({"n": spec("news.count", params, fqt=..., where=...), ...})
+from __future__ import annotations
+import re, threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+
+from result_cache import normalize_sql
+
+CACHE_WATERMARK = "watermark"  # reuse until a registered table's watermark moves (default)
+CACHE_NONE = "none"            # always run against the warehouse
+# …or an int: plain TTL in seconds
+
+CachePolicy = Union[str, int]
+
+_param = re.compile(r"%\((\w+)\)s")
+_fragment = re.compile(r"\{(\w+)\}")
+
+
+class NamedQuery:
+    __slots__ = ("name", "sql", "cache", "doc", "params", "fragments")
+
+    def __init__(self, name: str, sql: str, cache: CachePolicy = CACHE_WATERMARK, doc: str = ""):
+        self.name = name
+        self.sql = normalize_sql(sql)
+        self.cache = cache
+        self.doc = doc
+        self.params = tuple(dict.fromkeys(_param.findall(self.sql)))
+        self.fragments = tuple(dict.fromkeys(_fragment.findall(self.sql)))
+
+    def bind(self, params: Optional[dict] = None, **fragments: str) -> Tuple[str, dict]:
+        """
+        → (sql, params). `fragments` fill {placeholders} with SQL built by trusted helpers
+        (e.g. page3_news.build_where_and_params); values always travel as params.
+        """
+        params = dict(params or {})
+        missing = [p for p in self.params if p not in params]
+        if missing:
+            raise KeyError(f"{self.name}: missing params {missing}")
+        sql = self.sql
+        if self.fragments:
+            absent = [f for f in self.fragments if f not in fragments]
+            if absent:
+                raise KeyError(f"{self.name}: missing SQL fragments {absent}")
+            sql = normalize_sql(_fragment.sub(lambda m: fragments[m.group(1)], sql))
+        _remember(sql, self.name)
+        return sql, params
+
+    def spec(self, params: Optional[dict] = None, **fragments: str) -> Tuple[str, dict, CachePolicy]:
+        # (sql, params, cache policy) — the shape db.fetch_many accepts
+        return (*self.bind(params, **fragments), self.cache)
+
+
+_CATALOG: Dict[str, NamedQuery] = {}
+
+# bound statement text → catalog name, so the data layer can file a result under its
+# query's namespace (cache_scopes.py) from the SQL alone
+_NAMES: "OrderedDict[str, str]" = OrderedDict()
+_NAMES_MAX = 4096
+_names_lock = threading.Lock()
+
+def _remember(sql: str, name: str) -> None:
+    with _names_lock:
+        _NAMES[sql] = name
+        _NAMES.move_to_end(sql)
+        if len(_NAMES) > _NAMES_MAX:
+            _NAMES.popitem(last=False)
+
+def name_for(sql: str) -> Optional[str]:
+    """Catalog name a statement was bound from (None for ad-hoc SQL)."""
+    return _NAMES.get(sql)
+
+def define(name: str, sql: str, cache: CachePolicy = CACHE_WATERMARK, doc: str = "") -> NamedQuery:
+    if name in _CATALOG:
+        raise ValueError(f"Query {name!r} already defined")
+    _CATALOG[name] = q = NamedQuery(name, sql, cache, doc)
+    return q
+
+def get(name: str) -> NamedQuery:
+    return _CATALOG[name]
+
+def bind(name: str, params: Optional[dict] = None, **fragments: str) -> Tuple[str, dict]:
+    return _CATALOG[name].bind(params, **fragments)
+
+def spec(name: str, params: Optional[dict] = None, **fragments: str) -> Tuple[str, dict, CachePolicy]:
+    return _CATALOG[name].spec(params, **fragments)
+
+def catalog() -> List[NamedQuery]:
+    return sorted(_CATALOG.values(), key=lambda q: q.name)
+
+def in_list(values, prefix: str = "v") -> Tuple[str, dict]:
+    # → ("%(v0)s, %(v1)s, …", {"v0": …}) for an IN (…) fragment with every value bound
+    params = {f"{prefix}{i}": v for i, v in enumerate(values)}
+    return ", ".join(f"%({k})s" for k in params) or "NULL", params
+
+
+# --- MART.TWEET_MEDIA ------------------------------------------------------
+
+define("tweets.recent_urls", """
+    SELECT TWEET_URL, CREATED_AT
+    FROM MART.TWEET_MEDIA
+    WHERE TWEET_URL IS NOT NULL
+    ORDER BY CREATED_AT DESC
+    LIMIT %(limit)s
+""", doc="Newest tweet URLs (Overview widget, debug listing).")
+
+define("tweets.recent_with_text", """
+    SELECT TWEET_TEXT, TWEET_URL, CREATED_AT
+    FROM MART.TWEET_MEDIA
+    WHERE TWEET_URL IS NOT NULL
+    ORDER BY CREATED_AT DESC
+    LIMIT %(limit)s
+""", doc="Newest tweets with text (sync screenshot renderer).")
+
+define("tweets.count", """
+    SELECT COUNT(*) AS N
+    FROM MART.TWEET_MEDIA
+    WHERE TWEET_URL IS NOT NULL
+""", doc="Total embeddable tweets (Social Conversation header).")
+
+define("tweets.page_urls", """
+    SELECT TWEET_URL
+    FROM MART.TWEET_MEDIA
+    WHERE TWEET_URL IS NOT NULL
+    ORDER BY CREATED_AT DESC
+    LIMIT %(limit)s OFFSET %(offset)s
+""", doc="One page of tweet URLs only (Social Conversation's embed fallback when the card columns aren't there).")
+
+define("tweets.page_cards", """
+    SELECT CAST(TWEET_ID AS VARCHAR) AS TWEET_ID, TWEET_URL, TWEET_TEXT, CREATED_AT,
+           AUTHOR_USERNAME, AUTHOR_NAME, AUTHOR_PROFILE_IMAGE_URL,
+           LIKE_COUNT, RETWEET_COUNT, REPLY_COUNT, QUOTE_COUNT,
+           MEDIA_URL, MEDIA_TYPE
+    FROM MART.TWEET_MEDIA
+    WHERE TWEET_URL IS NOT NULL
+    ORDER BY CREATED_AT DESC
+    LIMIT %(limit)s OFFSET %(offset)s
+""", doc="One page of tweets with what a native card shows (Social Conversation).")
+
+define("tweets.feed_page", """
+    SELECT CAST(TWEET_ID AS VARCHAR) AS TWEET_ID, TWEET_URL, TWEET_TEXT, CREATED_AT,
+           AUTHOR_USERNAME, AUTHOR_NAME, AUTHOR_PROFILE_IMAGE_URL,
+           LIKE_COUNT, RETWEET_COUNT, REPLY_COUNT, QUOTE_COUNT,
+           MEDIA_URL, MEDIA_TYPE, {row_key} AS ROW_KEY, {sort_key}
+    FROM MART.TWEET_MEDIA
+    {where}
+    {order_by}
+    LIMIT %(limit)s
+""", doc="Next slice of the infinite tweet feed; {where} carries the keyset seek on (CREATED_AT, {row_key}).")
+
+
+# --- RAW.RSS_ARTICLES ------------------------------------------------------
+
+define("rss.overview", """
+    SELECT TITLE, SUMMARY, SOURCE_NAME, URL, PUBLISHED_AT_RAW, {published_at} AS PUBLISHED_AT
+    FROM SNACKLASH2.RAW.RSS_ARTICLES
+    ORDER BY PUBLISHED_AT DESC NULLS LAST
+    LIMIT %(limit)s
+""", doc="Newest articles for the Overview news widget ({published_at}: normalize.published_at_sql).")
+
+define("news.sources", """
+    SELECT DISTINCT COALESCE(SOURCE_NAME, SOURCE_FEED_TITLE, SOURCE_FEED_URL) AS SRC
+    FROM {fqt}
+    ORDER BY SRC
+""", doc="Sources filter options (no date filter).")
+
+define("news.sources_in_range", """
+    SELECT DISTINCT COALESCE(SOURCE_NAME, SOURCE_FEED_TITLE, SOURCE_FEED_URL) AS SRC
+    FROM {fqt}
+    WHERE PULLED_AT >= TO_TIMESTAMP_TZ(%(dstart)s)
+      AND PULLED_AT <  TO_TIMESTAMP_TZ(%(dend)s)
+    ORDER BY SRC
+""", doc="Sources filter options within a PULLED_AT range.")
+
+define("news.count", """
+    SELECT COUNT(*) AS N FROM {fqt} {where}
+""", doc="Total matches for the News Coverage filters (normally primed from news.first_page's TOTAL_N).")
+
+define("news.count_capped", """
+    SELECT COUNT(*) AS N FROM (SELECT 1 FROM {fqt} {where} LIMIT %(cap)s)
+""", doc="Matches up to a cap: stops scanning once `cap` rows are found (N = cap → 'cap+').")
+
+define("news.facets", """
+    SELECT CASE WHEN GROUPING(COALESCE(SOURCE_NAME, SOURCE_FEED_TITLE, SOURCE_FEED_URL)) = 0 THEN 'source'
+                WHEN GROUPING({day}) = 0 THEN 'day'
+                WHEN GROUPING(MATCHING_RULE_IDS) = 0 THEN 'rule'
+                WHEN GROUPING(MATCHING_TERMS) = 0 THEN 'term'
+                ELSE 'total' END AS FACET,
+           CAST(COALESCE(COALESCE(SOURCE_NAME, SOURCE_FEED_TITLE, SOURCE_FEED_URL),
+                         CAST({day} AS VARCHAR), MATCHING_RULE_IDS, MATCHING_TERMS) AS VARCHAR) AS VALUE,
+           COUNT(*) AS N
+    FROM {fqt}
+    {where}
+    GROUP BY GROUPING SETS (
+        (COALESCE(SOURCE_NAME, SOURCE_FEED_TITLE, SOURCE_FEED_URL)), ({day}),
+        (MATCHING_RULE_IDS), (MATCHING_TERMS), ()
+    )
+""", doc="Facet counts for the News Coverage filters in one scan: per source, per {day}, per rule and "
+         "matched term, plus the total (FACET = 'total').")
+
+define("news.first_page", """
+    SELECT {select_list}, {sort_key}, COUNT(*) OVER () AS TOTAL_N
+    FROM {fqt}
+    {where}
+    {order_by}
+    LIMIT %(limit)s
+""", doc="First page of News Coverage results with the filter's total on every row (one pass).")
+
+define("news.page", """
+    SELECT {select_list}, {sort_key}
+    FROM {fqt}
+    {where}
+    {order_by}
+    LIMIT %(limit)s
+""", doc="One page of News Coverage results; {where} carries the keyset seek predicate (keyset.py).")
+
+define("news.detail", """
+    SELECT {select_list}
+    FROM {fqt}
+    WHERE GUID = %(guid)s
+      AND {row_key} = %(row_key)s
+    LIMIT 1
+""", cache=CACHE_NONE, doc="Full content of one article, loaded when its card is opened (cached per row in page3_news).")
+
+define("news.by_guid", """
+    SELECT {select_list}
+    FROM {fqt}
+    WHERE GUID IN ({guids})
+""", doc="Rows for GUIDs the local search index ranked (page order is restored in Python by ROW_KEY).")
+
+define("news.export", """
+    SELECT {select_list}
+    FROM {fqt}
+    {where}
+    {order_by}
+""", cache=CACHE_NONE, doc="Every row of the current News Coverage filter, streamed to a file (exports.py).")
+
+define("search.delta", """
+    SELECT GUID, {row_key} AS ROW_KEY, TITLE, SUMMARY,
+           COALESCE(CONTENT_TEXT, CONTENT_HTML) AS BODY,
+           PULLED_AT,
+           {published_at} AS PUBLISHED_AT,
+           LOWER(COALESCE(SOURCE_NAME, SOURCE_FEED_TITLE, SOURCE_FEED_URL)) AS SRC_KEY,
+           COALESCE(SOURCE_NAME, SOURCE_FEED_TITLE, SOURCE_FEED_URL) AS SRC_LABEL
+    FROM {fqt}
+    WHERE GUID IS NOT NULL
+      AND PULLED_AT >= TO_TIMESTAMP_TZ(%(since)s)
+    ORDER BY PULLED_AT
+""", cache=CACHE_NONE, doc="Rows pulled since the last sync, streamed into the local search index.")
+
+define("search.keys", """
+    SELECT GUID, {row_key} AS ROW_KEY
+    FROM {fqt}
+    WHERE GUID IS NOT NULL
+""", cache=CACHE_NONE, doc="Every indexable row's key, streamed for the search index's periodic reconcile.")
+
+define("search.rows", """
+    SELECT GUID, {row_key} AS ROW_KEY, TITLE, SUMMARY,
+           COALESCE(CONTENT_TEXT, CONTENT_HTML) AS BODY,
+           PULLED_AT,
+           {published_at} AS PUBLISHED_AT,
+           LOWER(COALESCE(SOURCE_NAME, SOURCE_FEED_TITLE, SOURCE_FEED_URL)) AS SRC_KEY,
+           COALESCE(SOURCE_NAME, SOURCE_FEED_TITLE, SOURCE_FEED_URL) AS SRC_LABEL
+    FROM {fqt}
+    WHERE GUID IN ({guids})
+""", cache=CACHE_NONE, doc="search.delta's columns for given GUIDs (rows a reconcile found unindexed).")
+
+define("search.published", """
+    SELECT {row_key} AS ROW_KEY, {published_at} AS PUBLISHED_AT
+    FROM {fqt}
+    WHERE GUID IN ({guids})
+      AND {published_at} IS NOT NULL
+""", cache=CACHE_NONE, doc="Published times for indexed rows that had none when synced (normalized since).")
+
+
+# --- PUBLISHED_AT normalization (normalize.py) ------------------------------
+# PUBLISHED_AT_RAW is feed text; these parse it once into a typed PUBLISHED_AT column so
+# filters/sorts compare a real timestamp (prunable) instead of re-parsing every row.
+# Readers use normalize.published_at_sql(fqt), which falls back to parsing inline until then.
+
+define("news.published_at.add", """
+    ALTER TABLE {fqt} ADD COLUMN IF NOT EXISTS PUBLISHED_AT TIMESTAMP WITH TIME ZONE
+""", cache=CACHE_NONE, doc="Typed published timestamp next to PUBLISHED_AT_RAW (idempotent).")
+
+define("news.published_at.backfill", """
+    UPDATE {fqt}
+    SET PUBLISHED_AT = COALESCE(
+        TRY_TO_TIMESTAMP_TZ(REGEXP_REPLACE(TRIM(PUBLISHED_AT_RAW), ' (GMT|UTC|UT|Z)$', ' +0000'),
+                            'DY, DD MON YYYY HH24:MI:SS TZHTZM'),
+        TRY_TO_TIMESTAMP_TZ(PUBLISHED_AT_RAW))
+    WHERE PUBLISHED_AT IS NULL
+      AND PUBLISHED_AT_RAW IS NOT NULL
+""", cache=CACHE_NONE, doc="Parse PUBLISHED_AT_RAW for rows not normalized yet: RFC-2822 fast path "
+                          "(what nearly every feed sends), then AUTO detection (ISO-8601, oddball feeds).")
+
+define("news.published_at.cluster", """
+    ALTER TABLE {fqt} CLUSTER BY (TO_DATE(PUBLISHED_AT))
+""", cache=CACHE_NONE, doc="Cluster on the published day so date filters prune micro-partitions (Snowflake only).")
+
+define("news.published_at.filled", """
+    SELECT COUNT(PUBLISHED_AT) AS N FROM {fqt}
+""", cache=CACHE_NONE, doc="Normalized rows so far (errors while the column doesn't exist yet).")
+
+
+# --- source dimension (normalize.py) -----------------------------------------
+# {dim}  = <schema>.NEWS_SOURCES       one row per lowercase source key, stable SOURCE_ID
+# {days} = <schema>.NEWS_SOURCE_DAYS   articles per source per PULLED_AT day
+# Articles carry SOURCE_ID, so the Sources filter is `SOURCE_ID IN (…)` on an integer column.
+
+define("news.sources.create_dim", """
+    CREATE TABLE IF NOT EXISTS {dim} (SOURCE_ID INTEGER, SOURCE_KEY VARCHAR, SOURCE_LABEL VARCHAR)
+""", cache=CACHE_NONE, doc="Source dimension (idempotent).")
+
+define("news.sources.next_id", """
+    SELECT COALESCE(MAX(SOURCE_ID), 0) + 1 AS N FROM {dim}
+""", cache=CACHE_NONE, doc="Where a new id sequence starts (past ids handed out before it existed).")
+
+define("news.sources.create_seq", """
+    CREATE SEQUENCE IF NOT EXISTS {seq} START WITH {start}
+""", cache=CACHE_NONE, doc="Source id sequence (idempotent; concurrent runs never draw the same id).")
+
+define("news.sources.create_days", """
+    CREATE TABLE IF NOT EXISTS {days} (SOURCE_ID INTEGER, DAY DATE, N INTEGER)
+""", cache=CACHE_NONE, doc="Per-source daily article counts (idempotent).")
+
+define("news.sources.add_column", """
+    ALTER TABLE {fqt} ADD COLUMN IF NOT EXISTS SOURCE_ID INTEGER
+""", cache=CACHE_NONE, doc="Source id on every article (idempotent).")
+
+define("news.sources.insert_new", """
+    INSERT INTO {dim} (SOURCE_ID, SOURCE_KEY, SOURCE_LABEL)
+    SELECT {seq}.NEXTVAL, n.SOURCE_KEY, n.SOURCE_LABEL
+    FROM (
+        SELECT LOWER(COALESCE(SOURCE_NAME, SOURCE_FEED_TITLE, SOURCE_FEED_URL)) AS SOURCE_KEY,
+               MIN(COALESCE(SOURCE_NAME, SOURCE_FEED_TITLE, SOURCE_FEED_URL)) AS SOURCE_LABEL
+        FROM {fqt}
+        WHERE SOURCE_ID IS NULL
+          AND COALESCE(SOURCE_NAME, SOURCE_FEED_TITLE, SOURCE_FEED_URL) IS NOT NULL
+        GROUP BY 1
+    ) n
+    WHERE NOT EXISTS (SELECT 1 FROM {dim} s WHERE s.SOURCE_KEY = n.SOURCE_KEY)
+""", cache=CACHE_NONE, doc="Give sources seen for the first time ids from the sequence (existing ids never change).")
+
+define("news.sources.assign", """
+    UPDATE {fqt} AS a
+    SET SOURCE_ID = s.SOURCE_ID
+    FROM (SELECT SOURCE_KEY, MIN(SOURCE_ID) AS SOURCE_ID FROM {dim} GROUP BY SOURCE_KEY) s
+    WHERE a.SOURCE_ID IS NULL
+      AND s.SOURCE_KEY = LOWER(COALESCE(a.SOURCE_NAME, a.SOURCE_FEED_TITLE, a.SOURCE_FEED_URL))
+""", cache=CACHE_NONE, doc="Stamp SOURCE_ID on articles that don't have one yet (lowest id if two runs registered a key at once).")
+
+define("news.sources.counted_through", """
+    SELECT MAX(DAY) AS DAY FROM {days}
+""", cache=CACHE_NONE, doc="Last day with counts; the incremental recount starts there.")
+
+define("news.sources.count_days", """
+    MERGE INTO {days} t
+    USING (
+        SELECT SOURCE_ID, CAST(PULLED_AT AS DATE) AS DAY, COUNT(*) AS N
+        FROM {fqt}
+        WHERE SOURCE_ID IS NOT NULL
+          AND PULLED_AT >= TO_TIMESTAMP_TZ(%(since)s)
+        GROUP BY 1, 2
+    ) s
+    ON t.SOURCE_ID = s.SOURCE_ID AND t.DAY = s.DAY
+    WHEN MATCHED THEN UPDATE SET N = s.N
+    WHEN NOT MATCHED THEN INSERT (SOURCE_ID, DAY, N) VALUES (s.SOURCE_ID, s.DAY, s.N)
+""", cache=CACHE_NONE, doc="Recount days from `since` on (one atomic statement: readers never see a gap).")
+
+define("news.sources.filled", """
+    SELECT COUNT(SOURCE_ID) AS N FROM {fqt}
+""", cache=CACHE_NONE, doc="Articles with a SOURCE_ID so far (errors while the column doesn't exist yet).")
+
+define("news.source_counts", """
+    SELECT s.SOURCE_ID, s.SOURCE_LABEL AS SRC, SUM(d.N) AS N
+    FROM {dim} s
+    JOIN {days} d ON d.SOURCE_ID = s.SOURCE_ID
+    {where}
+    GROUP BY s.SOURCE_ID, s.SOURCE_LABEL
+    ORDER BY SRC
+""", doc="Sources filter options with article counts; {where} limits d.DAY to the date range.")
@@ -0,0 +1,122 @@
+# query_log.py
+### QUERY INSTRUMENTATION: one event per fetch_arrow/fetch_df call (and per fetch_batches stream)
+# Events go to a bounded in-memory ring buffer (per process) and, optionally, a
+# JSON-lines file that every process appends to (read by the admin page).
+from __future__ import annotations
+import contextvars, hashlib, json, os, re, sys, threading, time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from result_cache import normalize_sql
+
+# --- query shapes ----------------------------------------------------------
+
+_literals = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+def query_shape(sql: str) -> str:
+    # same statement with different LIMIT/OFFSET/literals → same shape
+    return _literals.sub("?", normalize_sql(sql))
+
+def shape_id(shape: str) -> str:
+    return hashlib.sha1(shape.encode("utf-8")).hexdigest()[:10]
+
+
+# --- caller tags (→ Snowflake QUERY_TAG) -----------------------------------
+
+_tag: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("query_tag", default=None)
+
+@contextmanager
+def query_tag(name: str) -> Iterator[None]:
+    """Label every query issued inside the block, e.g. `with query_tag("News Coverage"):`."""
+    outer = _tag.get()
+    token = _tag.set(f"{outer}/{name}" if outer else name)
+    try:
+        yield
+    finally:
+        _tag.reset(token)
+
+def set_tag(tag: Optional[str]):
+    # for worker threads: carry the submitting thread's tag over
+    return _tag.set(tag)
+
+_INTERNAL_MODULES = {"db", "page1.db", "backends", "queries", "query_log", "result_cache", "watermarks", "contextlib"}
+_INTERNAL_PREFIXES = ("concurrent.", "threading", "streamlit.")
+
+def current_tag() -> str:
+    """Explicit query_tag(s) plus the first calling function outside the data layer."""
+    caller = None
+    f = sys._getframe(1)
+    while f is not None:
+        mod = f.f_globals.get("__name__", "")
+        if mod not in _INTERNAL_MODULES and not mod.startswith(_INTERNAL_PREFIXES):
+            caller = f"{mod}.{f.f_code.co_name}"
+            break
+        f = f.f_back
+    explicit = _tag.get()
+    if explicit and caller:
+        return f"{explicit}|{caller}"
+    return explicit or caller or "?"
+
+
+# --- the log ---------------------------------------------------------------
+
+class QueryLog:
+    def __init__(self, capacity: int = 2000, path: Optional[str] = None, max_file_mb: float = 50):
+        self._events: deque = deque(maxlen=int(capacity))
+        self._lock = threading.Lock()
+        self.path = Path(path).expanduser() if path else None
+        self.max_file_bytes = int(float(max_file_mb) * 1024 * 1024)
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def record(self, sql: str, status: str, wall_ms: float, tag: str = "?",
+               rows: Optional[int] = None, nbytes: Optional[int] = None,
+               query_id: Optional[str] = None, error: Optional[str] = None) -> Dict[str, Any]:
+        shape = query_shape(sql)
+        ev = {
+            "ts": time.time(),
+            "pid": os.getpid(),
+            "shape_id": shape_id(shape),
+            "shape": shape[:500],
+            "status": status,          # hit | stale | coalesced | shared | miss | refresh | bypass | stream | cancelled | error
+            "wall_ms": round(float(wall_ms), 2),
+            "rows": rows,
+            "bytes": nbytes,
+            "query_id": query_id,
+            "tag": tag,
+            "error": error,
+        }
+        with self._lock:
+            self._events.append(ev)
+            if self.path:
+                self._append(ev)
+        return ev
+
+    def _append(self, ev: Dict[str, Any]) -> None:
+        try:
+            if self.path.exists() and self.path.stat().st_size > self.max_file_bytes:
+                self.path.replace(self.path.with_suffix(self.path.suffix + ".1"))
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(ev, default=str) + "\n")
+        except OSError:
+            pass  # logging must never break a page
+
+    def events(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._events)
+
+    def read_file(self, max_lines: int = 50000) -> List[Dict[str, Any]]:
+        """Events from every process that shares QUERY_LOG_PATH (most recent max_lines)."""
+        if not self.path or not self.path.exists():
+            return []
+        with self.path.open(encoding="utf-8") as f:
+            lines = deque(f, maxlen=max_lines)
+        out = []
+        for line in lines:
+            try:
+                out.append(json.loads(line))
+            except ValueError:
+                continue
+        return out
@@ -0,0 +1,410 @@
+# renderer_service.py
+### OUT-OF-PROCESS TWEET RENDERER (WARM CHROMIUM POOL)
+# Screenshots of tweet embeds used to launch a fresh Chromium per batch (tweets_widget_async)
+# or pin a sync Playwright to whichever Streamlit thread touched it first (tweets_to_image).
+# This is one long-lived process per host that keeps a pool of browsers (one context each)
+# warm and renders over local HTTP:
+#   POST /render  {"urls": [...], "theme": "dark"}  → {"pngs": [base64 | null, ...], "ms": …}
+#   GET  /health                                   → pool stats
+# - at most RENDERER_CONCURRENCY pages render at once; beyond RENDERER_MAX_QUEUE waiting
+#   jobs, new ones get 503 instead of piling up
+# - a browser is recycled (relaunched once idle) after RENDERER_RECYCLE_AFTER tweets, or when
+#   the browsers together hold more than RENDERER_MAX_RSS_MB
+#
+#   run:     python renderer_service.py [--port 8765]
+#   client:  render(urls) – starts the service on first use (RENDERER_AUTOSTART) and raises
+#            RendererUnavailable if it can't be reached, so callers can render in-process instead;
+#            a full queue (503) is retried with backoff, then raised as RendererBusy – launching
+#            one more Chromium in the app then would only add to the load
+from __future__ import annotations
+import asyncio, base64, json, re, subprocess, sys, threading, time
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import urlparse
+
+from config import setting
+
+DEFAULT_URL = "http://127.0.0.1:8765"
+VIEWPORT_W = 600
+TIMEOUT_MS = 50000
+USER_AGENT = ("Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+
+_id_re = re.compile(r"(?:status/|status%2F|i/web/status/)(\d+)")
+
+def _extract_id(u: str) -> Optional[str]:
+    m = _id_re.search(u.strip())
+    return m.group(1) if m else None
+
+
+# --- rendering (shared with the in-process fallback) -----------------------
+
+def context_options() -> dict:
+    return dict(viewport={"width": VIEWPORT_W + 40, "height": 3000}, device_scale_factor=2, user_agent=USER_AGENT)
+
+def _batch_html(ids: List[Optional[str]], cids: List[str], theme: str) -> str:
+    containers_html = "\n".join(f'<div id="{cid}" style="margin:0 0 16px 0;"></div>' for cid in cids)
+    return f"""
+    <!doctype html><meta charset="utf-8"/>
+    <style>
+      html,body {{ margin:0; background:#fff; }}
+      #wrap      {{ width:{VIEWPORT_W}px; margin:0 auto; }}
+      /* no fixed heights: let widgets.js resize */
+    </style>
+    <div id="wrap">
+      {containers_html}
+    </div>
+    <script>
+      window.__TWEET_IDS__  = {json.dumps(ids)};
+      window.__CONTAINER_IDS__ = {json.dumps(cids)};
+      function boot() {{
+        if (!window.twttr || !twttr.widgets || !twttr.widgets.createTweet) {{
+          return setTimeout(boot, 100);
+        }}
+        for (var i=0;i<__TWEET_IDS__.length;i++) {{
+          var id  = __TWEET_IDS__[i];
+          var el  = document.getElementById(__CONTAINER_IDS__[i]);
+          if (!el) continue;
+          if (!id) {{ el.innerHTML = ""; continue; }}
+          twttr.widgets.createTweet(id, el, {{ theme: {json.dumps(theme)}, conversation: "none", align: "center" }});
+        }}
+      }}
+      window.addEventListener('load', boot);
+    </script>
+    <script async src="https://platform.twitter.com/widgets.js"></script>
+    """
+
+async def render_on_page(page, urls: List[str], theme: str = "dark") -> List[Optional[bytes]]:
+    """
+    Render N tweets on one Playwright page with widgets.js: create each by ID, scroll it
+    into view, wait for its iframe to size, screenshot the container (None where it failed).
+    """
+    ids = [_extract_id(u) for u in urls]
+    cids = [f"t-{tid or f'i{i}'}" for i, tid in enumerate(ids)]
+    await page.set_content(_batch_html(ids, cids, theme), wait_until="load", timeout=TIMEOUT_MS)
+    await page.wait_for_timeout(800)  # let widgets.js initialize
+
+    out: List[Optional[bytes]] = []
+    for cid in cids:
+        png: Optional[bytes] = None
+        try:
+            await page.evaluate("""id => {
+                const el = document.getElementById(id);
+                if (el) el.scrollIntoView({block: 'center'});
+            }""", cid)
+            try:
+                await page.wait_for_function(
+                    """id => {
+                        const c = document.getElementById(id);
+                        if (!c) return false;
+                        const f = c.querySelector('iframe[src*="platform.twitter.com"]');
+                        const h = c.getBoundingClientRect().height;
+                        return !!f && (h > 140 || (f && f.clientHeight > 140));
+                    }""",
+                    arg=cid, timeout=16000,
+                )
+            except Exception:
+                pass  # still capture whatever is there
+            el = await page.query_selector(f"#{cid}")
+            png = await (el.screenshot(type="png") if el else page.screenshot(type="png"))
+        except Exception:
+            png = None
+        out.append(png)
+    return out
+
+
+# --- pool ------------------------------------------------------------------
+
+class _Slot:
+    __slots__ = ("browser", "context", "renders", "active", "draining", "started_at")
+
+    def __init__(self, browser, context):
+        self.browser = browser
+        self.context = context
+        self.renders = 0        # tweets rendered since launch
+        self.active = 0         # pages open right now
+        self.draining = False   # no new jobs; relaunched once idle
+        self.started_at = time.time()
+
+
+class BrowserPool:
+    def __init__(self, size: int = 2, concurrency: int = 4, recycle_after: int = 500,
+                 max_rss_mb: float = 1500):
+        self.size = int(size)
+        self.recycle_after = int(recycle_after)
+        self.max_rss_mb = float(max_rss_mb)
+        self._sem = asyncio.Semaphore(int(concurrency))
+        self._slots: List[_Slot] = []
+        self._pw = None
+        self._recycling: set = set()
+        self.rendered = self.recycled = self.failed = 0
+
+    async def start(self) -> None:
+        from playwright.async_api import async_playwright  # optional dependency of the app; required here
+        self._pw = await async_playwright().start()
+        self._slots = [await self._launch() for _ in range(self.size)]
+
+    async def stop(self) -> None:
+        for slot in self._slots:
+            await self._close(slot)
+        if self._pw is not None:
+            await self._pw.stop()
+
+    async def _launch(self) -> _Slot:
+        browser = await self._pw.chromium.launch(headless=True)
+        return _Slot(browser, await browser.new_context(**context_options()))
+
+    async def _close(self, slot: _Slot) -> None:
+        try:
+            await slot.context.close()
+            await slot.browser.close()
+        except Exception:
+            pass
+
+    def _pick(self) -> _Slot:
+        live = [s for s in self._slots if not s.draining] or self._slots
+        return min(live, key=lambda s: s.active)
+
+    async def render(self, urls: List[str], theme: str = "dark") -> List[Optional[bytes]]:
+        try:
+            async with self._sem:
+                slot = self._pick()
+                slot.active += 1
+                page = None
+                try:
+                    page = await slot.context.new_page()
+                    pngs = await render_on_page(page, urls, theme)
+                except (Exception, asyncio.CancelledError):
+                    # a browser that throws or hangs past the job timeout gets replaced; closing
+                    # its context also takes any page new_page() opened before being cancelled
+                    self.failed += 1
+                    slot.draining = True
+                    raise
+                finally:
+                    if page is not None:
+                        await self._release(page)
+                    slot.active -= 1
+                slot.renders += len(urls)
+                self.rendered += len(urls)
+                if slot.renders >= self.recycle_after:
+                    slot.draining = True
+                self._check_memory()
+            return pngs
+        finally:
+            await self._recycle_idle()
+
+    async def _release(self, page) -> None:
+        # shielded so a cancelled job still closes its page rather than leaving it open
+        try:
+            await asyncio.shield(asyncio.wait_for(page.close(), 10))
+        except (Exception, asyncio.CancelledError):
+            pass
+
+    def _check_memory(self) -> None:
+        rss = _browsers_rss_mb()
+        if rss is not None and rss > self.max_rss_mb:
+            # the longest-running browser has usually grown the most
+            live = [s for s in self._slots if not s.draining]
+            if live:
+                max(live, key=lambda s: s.renders).draining = True
+
+    async def _recycle_idle(self) -> None:
+        for slot in [s for s in self._slots if s.draining and s.active == 0 and s not in self._recycling]:
+            self._recycling.add(slot)
+            try:
+                fresh = await self._launch()
+            except Exception:
+                self._recycling.discard(slot)  # keep the old one; retried after the next job
+                continue
+            self._slots[self._slots.index(slot)] = fresh
+            self._recycling.discard(slot)
+            self.recycled += 1
+            await self._close(slot)
+
+    def stats(self) -> dict:
+        return {"browsers": len(self._slots), "active": sum(s.active for s in self._slots),
+                "renders": [s.renders for s in self._slots], "rendered": self.rendered,
+                "recycled": self.recycled, "failed": self.failed, "rss_mb": _browsers_rss_mb()}
+
+
+def _browsers_rss_mb() -> Optional[float]:
+    # Chromium runs as child processes of the Playwright driver, i.e. our descendants
+    try:
+        import psutil
+    except ImportError:
+        return None
+    try:
+        procs = psutil.Process().children(recursive=True)
+        return sum(p.memory_info().rss for p in procs) / (1024 * 1024)
+    except Exception:
+        return None
+
+
+# --- HTTP service ----------------------------------------------------------
+
+def serve(port: int, pool: BrowserPool, max_queue: int = 32, job_timeout_s: float = 120) -> None:
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    pending = {"n": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, code: int, body: dict, retry_after: Optional[int] = None) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            if retry_after is not None:
+                self.send_header("Retry-After", str(retry_after))
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path != "/health":
+                return self._reply(404, {"error": "not found"})
+            fut = asyncio.run_coroutine_threadsafe(_stats(pool), loop)
+            self._reply(200, {**fut.result(5), "queued": pending["n"]})
+
+        def do_POST(self):
+            if self.path != "/render":
+                return self._reply(404, {"error": "not found"})
+            try:
+                job = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)))
+                urls = [str(u) for u in job["urls"]]
+            except Exception:
+                return self._reply(400, {"error": "expected {\"urls\": [...]}"})
+            with lock:
+                if pending["n"] >= max_queue:
+                    return self._reply(503, {"error": "queue full"}, retry_after=1)
+                pending["n"] += 1
+            t0 = time.perf_counter()
+            try:
+                fut = asyncio.run_coroutine_threadsafe(pool.render(urls, job.get("theme") or "dark"), loop)
+                pngs = fut.result(job_timeout_s)
+            except TimeoutError:
+                fut.cancel()  # cancels pool.render on the loop: page closed, semaphore slot freed
+                return self._reply(504, {"error": f"render took over {job_timeout_s:g}s"})
+            except Exception as exc:
+                return self._reply(500, {"error": repr(exc)[:500]})
+            finally:
+                with lock:
+                    pending["n"] -= 1
+            self._reply(200, {"pngs": [base64.b64encode(p).decode("ascii") if p else None for p in pngs],
+                              "ms": round((time.perf_counter() - t0) * 1000)})
+
+        def log_message(self, *args):
+            pass
+
+    # bind first: a second instance started meanwhile fails here, before launching any browser
+    server = ThreadingHTTPServer(("127.0.0.1", int(port)), Handler)
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="renderer-loop", daemon=True).start()
+    asyncio.run_coroutine_threadsafe(pool.start(), loop).result()
+    try:
+        server.serve_forever()
+    finally:
+        asyncio.run_coroutine_threadsafe(pool.stop(), loop).result(30)
+
+async def _stats(pool: BrowserPool) -> dict:
+    return pool.stats()
+
+
+# --- client ----------------------------------------------------------------
+
+class RendererError(RuntimeError):
+    pass
+
+class RendererUnavailable(RendererError):
+    # service not reachable (and couldn't be started): render in-process instead
+    pass
+
+class RendererBusy(RendererError):
+    # service up but its queue stayed full: show a retry state, don't add a browser
+    def __init__(self, msg: str, retry_after: float = 5):
+        super().__init__(msg)
+        self.retry_after = retry_after
+
+_spawn_lock = threading.Lock()
+_spawned_at = 0.0
+
+def _post(base: str, path: str, body: Optional[dict], timeout_s: float) -> dict:
+    from urllib.request import Request, urlopen
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    req = Request(base.rstrip("/") + path, data=data, headers={"Content-Type": "application/json"},
+                  method="POST" if data is not None else "GET")
+    with urlopen(req, timeout=timeout_s) as resp:
+        return json.loads(resp.read())
+
+def _spawn(base: str) -> bool:
+    # one start attempt per minute per process; a second service on the same port just fails to bind
+    global _spawned_at
+    with _spawn_lock:
+        if time.monotonic() - _spawned_at < 60 and _spawned_at:
+            return False
+        _spawned_at = time.monotonic()
+    log = Path(setting("RENDERER_LOG", "~/.cache/snacklash/renderer.log")).expanduser()
+    log.parent.mkdir(parents=True, exist_ok=True)
+    with open(log, "ab") as out:
+        subprocess.Popen([sys.executable, str(Path(__file__).resolve()), "--port", str(urlparse(base).port or 8765)],
+                         cwd=str(Path(__file__).resolve().parent), stdout=out, stderr=out,
+                         stdin=subprocess.DEVNULL, start_new_session=True)
+    return True
+
+def _wait_healthy(base: str, timeout_s: float) -> bool:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            _post(base, "/health", None, 2)
+            return True
+        except Exception:
+            time.sleep(0.25)
+    return False
+
+def render(urls: List[str], theme: str = "dark", timeout_s: Optional[float] = None) -> List[Optional[bytes]]:
+    """
+    PNG bytes per URL (None where it failed) from the renderer service.
+    Raises RendererUnavailable if unreachable, RendererBusy if its queue stays full,
+    RendererError if the job itself failed.
+    """
+    if not urls:
+        return []
+    base = setting("RENDERER_URL", DEFAULT_URL)
+    timeout_s = float(timeout_s or setting("RENDERER_TIMEOUT_S", 120))
+    body = {"urls": list(urls), "theme": theme}
+    from urllib.error import HTTPError
+    retries = int(setting("RENDERER_BUSY_RETRIES", 3))
+    busy, started = 0, False
+    while True:
+        try:
+            res = _post(base, "/render", body, timeout_s)
+            return [base64.b64decode(p) if p else None for p in res["pngs"]]
+        except HTTPError as exc:
+            # HTTPError is an OSError too: the service answered, so never fall through to autostart
+            if exc.code != 503:
+                raise RendererError(f"renderer answered {exc.code}") from exc
+            wait = min(float(exc.headers.get("Retry-After") or 1) * 2 ** busy, 10)
+            if busy >= retries:
+                raise RendererBusy("renderer queue full", retry_after=wait) from exc
+            busy += 1
+            time.sleep(wait)
+        except TimeoutError as exc:
+            # connected but no answer in timeout_s: overloaded, not gone
+            raise RendererBusy(f"renderer timed out after {timeout_s:.0f}s") from exc
+        except OSError as exc:  # URLError: connection refused/reset, host unreachable
+            autostart = str(setting("RENDERER_AUTOSTART", "1")).lower() in ("1", "true", "yes", "on")
+            if started or not (autostart and _spawn(base) and _wait_healthy(base, float(setting("RENDERER_START_S", 30)))):
+                raise RendererUnavailable(repr(exc)[:200]) from exc
+            started = True
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Tweet renderer service (warm Chromium pool over local HTTP)")
+    ap.add_argument("--port", type=int, default=urlparse(setting("RENDERER_URL", DEFAULT_URL)).port or 8765)
+    args = ap.parse_args()
+    serve(args.port, BrowserPool(
+        size=int(setting("RENDERER_BROWSERS", 2)),
+        concurrency=int(setting("RENDERER_CONCURRENCY", 4)),
+        recycle_after=int(setting("RENDERER_RECYCLE_AFTER", 500)),
+        max_rss_mb=float(setting("RENDERER_MAX_RSS_MB", 1500)),
+    ), max_queue=int(setting("RENDERER_MAX_QUEUE", 32)))
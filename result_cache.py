@@ -0,0 +1,315 @@
+# result_cache.py
+### QUERY RESULT CACHE TIERS
+#   LocalCache   – in-process Arrow tables (zero-copy hits, stale-while-revalidate, single-flight)
+#   SharedCache  – cross-process: normalized SQL+params → Arrow IPC blob
+#     SqliteCache  – one file on local disk, shared by every process/replica on the host
+#     RedisCache   – any Redis-protocol server, shared by replicas behind a load balancer
+from __future__ import annotations
+import hashlib, json, os, re, sqlite3, threading, time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pyarrow as pa
+
+# --- keys & payloads -------------------------------------------------------
+
+_ws_or_str = re.compile(r"('(?:[^']|'')*')|\s+")
+
+def normalize_sql(sql: str) -> str:
+    # collapse whitespace outside string literals so indentation changes share an entry
+    return _ws_or_str.sub(lambda m: m.group(1) or " ", sql).strip()
+
+def cache_key(sql: str, params: Optional[dict] = None, version: str = "") -> str:
+    # version: freshness token (table watermarks or TTL bucket) so stale entries simply miss
+    payload = json.dumps([normalize_sql(sql), params or {}, version], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def table_to_ipc(tbl: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, tbl.schema) as w:
+        w.write_table(tbl)
+    return sink.getvalue().to_pybytes()
+
+def ipc_to_table(blob: bytes) -> pa.Table:
+    # reads straight over the blob's buffer (no per-column copy)
+    return pa.ipc.open_stream(pa.py_buffer(blob)).read_all()
+
+
+# --- in-process tier -------------------------------------------------------
+
+class _Entry:
+    __slots__ = ("table", "version", "stored_at", "tag")
+
+    def __init__(self, table: pa.Table, version: str, tag: Optional[str] = None):
+        self.table = table
+        self.version = version
+        self.stored_at = time.monotonic()
+        self.tag = tag  # namespace for scoped invalidation (see evict)
+
+
+class LocalCache:
+    """
+    In-process LRU of immutable Arrow tables, keyed on query identity.
+    - hit:       entry exists at the requested version → returned as-is (no copy)
+    - stale:     entry exists at an older version (TTL bucket rolled over / watermark
+                 moved) and is younger than max_stale_s → returned immediately while
+                 ONE background refresh loads the new version
+    - miss:      nothing usable → load inline; concurrent callers for the same
+                 (key, version) wait on that one load instead of issuing their own
+                 ("coalesced")
+    """
+
+    def __init__(self, max_entries: int = 256, max_stale_s: float = 86400, refresh_workers: int = 2):
+        self.max_entries = int(max_entries)
+        self.max_stale_s = float(max_stale_s)
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="swr")
+
+    def get(self, key: str, version: str, load: Callable[[], pa.Table],
+            tag: Optional[str] = None) -> Tuple[pa.Table, str]:
+        """Returns (table, status) with status in hit | stale | miss | coalesced."""
+        with self._lock:
+            e = self._entries.get(key)
+            if e is not None:
+                self._entries.move_to_end(key)
+                if e.version == version:
+                    return e.table, "hit"
+                if time.monotonic() - e.stored_at < self.max_stale_s:
+                    if (key, version) not in self._inflight:
+                        fut: Future = Future()
+                        self._inflight[(key, version)] = fut
+                        self._refresher.submit(self._run, key, version, load, fut, tag)
+                    return e.table, "stale"
+            fut = self._inflight.get((key, version))
+            leader = fut is None
+            if leader:
+                fut = Future()
+                self._inflight[(key, version)] = fut
+        if leader:
+            self._run(key, version, load, fut, tag)
+        return fut.result(), ("miss" if leader else "coalesced")
+
+    def _run(self, key: str, version: str, load: Callable[[], pa.Table], fut: Future,
+             tag: Optional[str] = None) -> None:
+        try:
+            tbl = load()
+        except BaseException as exc:
+            fut.set_exception(exc)  # waiters re-raise; a failed background refresh keeps serving stale
+        else:
+            self._store(key, version, tbl, tag)
+            fut.set_result(tbl)
+        finally:
+            with self._lock:
+                self._inflight.pop((key, version), None)
+
+    def _store(self, key: str, version: str, tbl: pa.Table, tag: Optional[str] = None) -> None:
+        with self._lock:
+            self._entries[key] = _Entry(tbl, version, tag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put(self, key: str, version: str, tbl: pa.Table, tag: Optional[str] = None) -> None:
+        # seed an entry computed elsewhere (e.g. a total that came back with a page query)
+        self._store(key, version, tbl, tag)
+
+    def peek(self, key: str) -> Optional[pa.Table]:
+        """Entry at any version younger than max_stale_s, without loading anything."""
+        with self._lock:
+            e = self._entries.get(key)
+            if e is None or time.monotonic() - e.stored_at >= self.max_stale_s:
+                return None
+            self._entries.move_to_end(key)
+            return e.table
+
+    def evict(self, match: Callable[[Optional[str]], bool]) -> int:
+        """Drop entries whose tag satisfies `match` (the next get is a miss, not stale) → count."""
+        with self._lock:
+            keys = [k for k, e in self._entries.items() if match(e.tag)]
+            for k in keys:
+                del self._entries[k]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# --- shared tier backends --------------------------------------------------
+
+class SharedCache:
+    """Byte-blob cache with per-entry TTL and a total size cap."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, blob: bytes, ttl_s: float) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class NullCache(SharedCache):
+    def get(self, key): return None
+    def set(self, key, blob, ttl_s): pass
+    def delete(self, key): pass
+    def clear(self): pass
+
+
+class SqliteCache(SharedCache):
+    """
+    Local-disk cache in a single SQLite file (WAL mode, so several Streamlit
+    processes can read while one writes). Expired rows are skipped on read;
+    least-recently-used rows are dropped once the file holds more than max_bytes.
+    """
+
+    def __init__(self, path: str | os.PathLike, max_bytes: int = 512 * 1024 * 1024):
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key         TEXT PRIMARY KEY,
+                value       BLOB NOT NULL,
+                size        INTEGER NOT NULL,
+                expires_at  REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries(last_access)")
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM entries WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+        return bytes(row[0])
+
+    def set(self, key, blob, ttl_s):
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries(key, value, size, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(blob), len(blob), now + float(ttl_s), now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        self._db.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute(
+            "SELECT key, size FROM entries ORDER BY last_access ASC"
+        ).fetchall():
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def delete(self, key):
+        with self._lock:
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+
+
+class RedisCache(SharedCache):
+    """
+    Redis-protocol cache (Redis, Valkey, KeyDB, ...). Entries expire via SET EX;
+    a sorted set of last-access times + a running byte counter evict the
+    least-recently-used entries once more than max_bytes are held.
+    """
+
+    def __init__(self, url: str, max_bytes: int = 512 * 1024 * 1024, prefix: str = "snacklash:q:"):
+        import redis  # optional dependency; only needed when this backend is selected
+        self._r = redis.Redis.from_url(url)
+        self.max_bytes = int(max_bytes)
+        self.prefix = prefix
+        self._lru = prefix + "__lru"
+        self._sizes = prefix + "__sizes"
+        self._bytes = prefix + "__bytes"
+
+    def get(self, key):
+        k = self.prefix + key
+        blob = self._r.get(k)
+        if blob is not None:
+            self._r.zadd(self._lru, {k: time.time()})
+        return blob
+
+    def set(self, key, blob, ttl_s):
+        if len(blob) > self.max_bytes:
+            return
+        k = self.prefix + key
+        old = self._r.hget(self._sizes, k)
+        pipe = self._r.pipeline()
+        pipe.set(k, blob, ex=max(1, int(ttl_s)))
+        pipe.zadd(self._lru, {k: time.time()})
+        pipe.hset(self._sizes, k, len(blob))
+        pipe.incrby(self._bytes, len(blob) - int(old or 0))
+        total = pipe.execute()[-1]
+        if total > self.max_bytes:
+            self._evict(total)
+
+    def _evict(self, total: int) -> None:
+        # oldest first; entries that already expired still release their bytes here
+        while total > self.max_bytes:
+            oldest = self._r.zpopmin(self._lru, 16)
+            if not oldest:
+                break
+            for k, _ in oldest:
+                total = self._forget(k)
+                if total <= self.max_bytes:
+                    break
+
+    def _forget(self, k) -> int:
+        size = int(self._r.hget(self._sizes, k) or 0)
+        pipe = self._r.pipeline()
+        pipe.delete(k)
+        pipe.zrem(self._lru, k)
+        pipe.hdel(self._sizes, k)
+        pipe.decrby(self._bytes, size)
+        return pipe.execute()[-1]
+
+    def delete(self, key):
+        self._forget(self.prefix + key)
+
+    def clear(self):
+        keys = list(self._r.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self._r.delete(*keys)
+
+
+def make_shared_cache(kind: str, **opts: Any) -> SharedCache:
+    """kind: 'sqlite' | 'redis' | 'none'."""
+    kind = (kind or "none").lower()
+    max_bytes = int(float(opts.get("max_mb", 512)) * 1024 * 1024)
+    if kind == "sqlite":
+        return SqliteCache(opts.get("path") or "~/.cache/snacklash/query_cache.sqlite", max_bytes)
+    if kind == "redis":
+        return RedisCache(opts["url"], max_bytes)
+    if kind == "none":
+        return NullCache()
+    raise ValueError(f"Unknown QUERY_CACHE_BACKEND: {kind!r}")
@@ -0,0 +1,347 @@
+# search_index.py
+### LOCAL FULL-TEXT INDEX OVER RAW.RSS_ARTICLES (SQLite FTS5)
+# Keyword search on News Coverage used to be `ILIKE '%term%'` over TITLE, SUMMARY,
+# CONTENT_TEXT and CONTENT_HTML for every term – a full scan of the widest columns per
+# keystroke. This keeps an inverted index on local disk instead:
+#   articles_fts  FTS5(title, summary, body)            – BM25-ranked term/prefix matching
+#   docs          row key, guid + the filter/sort columns – date range, source, sort order
+# It is synced incrementally by PULLED_AT (rows at or after the last synced PULLED_AT,
+# upserted by row key – GUIDs repeat, see normalize.ROW_KEY_SQL) whenever the table's
+# watermark moves, so a search runs entirely locally and the warehouse is only asked for
+# the page's rows by GUID.
+# PUBLISHED_AT can be filled after a row was synced (normalize.py parses formats the inline
+# fallback doesn't), so each sync also re-asks for a batch of docs still without one.
+# The delta never sees rows that were deleted or re-keyed (an edited TITLE or source changes
+# the row key, not PULLED_AT), so every `reconcile_s` a sync also streams the table's full
+# (GUID, row key) list: docs whose key is gone are dropped, keys not indexed yet are fetched.
+from __future__ import annotations
+import re, sqlite3, threading, time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+
+_EPOCH = "1970-01-01T00:00:00+00:00"
+SCHEMA_VERSION = 3  # 2: docs keyed by row_key (was guid); 3: + src_label. Older files are rebuilt by the next sync
+RECHECK_BATCH = 1000  # docs without published_at re-asked per sync (rotating through them)
+FETCH_BATCH = 1000    # GUIDs per rows() call when a reconcile finds keys that aren't indexed
+_tags = re.compile(r"<[^>]+>")
+
+# sort name → ORDER BY over (articles_fts f, docs d)
+SORTS = {
+    "relevance":      "bm25(articles_fts, 10.0, 4.0, 1.0) ASC, d.row_key DESC",  # title ≫ summary ≫ body
+    "published_desc": "d.published_at IS NULL, d.published_at DESC, d.row_key DESC",
+    "published_asc":  "d.published_at IS NULL, d.published_at ASC, d.row_key ASC",
+    "pulled_desc":    "d.pulled_at IS NULL, d.pulled_at DESC, d.row_key DESC",
+    "pulled_asc":     "d.pulled_at IS NULL, d.pulled_at ASC, d.row_key ASC",
+    "title_asc":      "d.title_key IS NULL, d.title_key ASC, d.row_key ASC",
+}
+
+
+def match_expr(q: str) -> Optional[str]:
+    """Keywords → FTS5 query: every term must match, as a word or word prefix."""
+    terms = [t.strip() for t in (q or "").split() if t.strip()]
+    if not terms:
+        return None
+    return " AND ".join('"' + t.replace('"', '""') + '"*' for t in terms)
+
+def _epoch(v) -> Optional[float]:
+    if v is None:
+        return None
+    if isinstance(v, datetime):
+        if v.tzinfo is None:
+            v = v.replace(tzinfo=timezone.utc)
+        return v.timestamp()
+    return float(v)
+
+
+class ArticleIndex:
+    def __init__(self, path: str, delta: Callable[[str], Iterable[pa.Table]],
+                 published: Optional[Callable[[List[str]], pa.Table]] = None,
+                 keys: Optional[Callable[[], Iterable[pa.Table]]] = None,
+                 rows: Optional[Callable[[List[str]], Iterable[pa.Table]]] = None,
+                 reconcile_s: float = 3600):
+        # delta(since_iso) → Arrow chunks with GUID, ROW_KEY, TITLE, SUMMARY, BODY, PULLED_AT,
+        # PUBLISHED_AT, SRC_KEY, SRC_LABEL for rows with PULLED_AT >= since (see queries.py search.delta)
+        # published(guids) → ROW_KEY, PUBLISHED_AT for those rows that have one now (search.published)
+        # keys() → Arrow chunks with GUID, ROW_KEY of every row (search.keys); rows(guids) → the
+        # delta's columns for those GUIDs (search.rows). Both or neither: they drive the reconcile.
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._delta = delta
+        self._published = published
+        self._keys = keys
+        self._rows = rows
+        self._reconcile_s = reconcile_s
+        self._wlock = threading.Lock()   # one writer (sync) at a time
+        self._rlock = threading.Lock()
+        self._db = self._connect()       # writes
+        self._rdb = self._connect()      # reads (WAL: not blocked by a running sync)
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._db.executescript(f"""
+                DROP TABLE IF EXISTS meta;
+                DROP TABLE IF EXISTS docs;
+                DROP TABLE IF EXISTS articles_fts;
+                PRAGMA user_version = {SCHEMA_VERSION};
+            """)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT);
+            CREATE TABLE IF NOT EXISTS docs (
+                id           INTEGER PRIMARY KEY,
+                row_key      TEXT NOT NULL UNIQUE,
+                guid         TEXT NOT NULL,
+                pulled_at    REAL,
+                published_at REAL,
+                src          TEXT,
+                src_label    TEXT,
+                title_key    TEXT
+            );
+            CREATE INDEX IF NOT EXISTS docs_src ON docs(src);
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts
+                USING fts5(title, summary, body, tokenize = 'unicode61 remove_diacritics 2');
+        """)
+        self._syncing = False
+        self._state_lock = threading.Lock()
+        self._synced_token: Optional[str] = None
+        self.last_error: Optional[str] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    # --- state ---
+
+    def _meta(self, k: str) -> Optional[str]:
+        with self._rlock:
+            row = self._rdb.execute("SELECT v FROM meta WHERE k = ?", (k,)).fetchone()
+        return row[0] if row else None
+
+    @property
+    def ready(self) -> bool:
+        # one complete sync so far (persisted, so a restart is ready immediately)
+        return self._meta("synced_at") is not None
+
+    def stats(self) -> dict:
+        with self._rlock:
+            n = self._rdb.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+        synced = self._meta("synced_at")
+        reconciled = self._meta("reconciled_at")
+        return {"docs": n, "since": self._meta("since"), "syncing": self._syncing,
+                "synced_at": float(synced) if synced else None,
+                "reconciled_at": float(reconciled) if reconciled else None, "error": self.last_error}
+
+    def _reconcile_due(self) -> bool:
+        if self._keys is None or self._rows is None:
+            return False
+        done = self._meta("reconciled_at")
+        return done is None or time.time() - float(done) >= self._reconcile_s
+
+    # --- sync ---
+
+    def sync(self) -> int:
+        """Index rows pulled since the last sync → rows upserted (blocking)."""
+        with self._wlock:
+            since = self._meta("since") or _EPOCH
+            n, newest = 0, None
+            for tbl in self._delta(since):
+                n += tbl.num_rows
+                newest = self._upsert(tbl) or newest
+            if self._published is not None:
+                n += self._recheck_published()
+            # after the delta, so every doc it just wrote is in the key list too (a first,
+            # full build counts as one)
+            if since == _EPOCH:
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES ('reconciled_at', ?)", (str(time.time()),))
+            elif self._reconcile_due():
+                n += self._reconcile()
+            self._db.execute("BEGIN")
+            if newest is not None:
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES ('since', ?)", (newest,))
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('synced_at', ?)", (str(time.time()),))
+            self._db.execute("COMMIT")
+            return n
+
+    def _recheck_published(self) -> int:
+        # next RECHECK_BATCH docs (by id, after where the last sync stopped) that have no
+        # published_at → fill the ones the warehouse has one for now
+        after = int(self._meta("recheck_after") or 0)
+        with self._rlock:
+            rows = self._rdb.execute("SELECT id, guid FROM docs WHERE published_at IS NULL AND id > ? "
+                                     "ORDER BY id LIMIT ?", (after, RECHECK_BATCH)).fetchall()
+        found = {}
+        if rows:
+            tbl = self._published(list(dict.fromkeys(g for _, g in rows)))
+            found = dict(zip(tbl.column("ROW_KEY").to_pylist(), tbl.column("PUBLISHED_AT").to_pylist()))
+        db = self._db
+        db.execute("BEGIN")
+        try:
+            # rows sharing a GUID come back too; only ones still without published_at change
+            db.executemany("UPDATE docs SET published_at = ? WHERE row_key = ? AND published_at IS NULL",
+                           [(_epoch(v), k) for k, v in found.items() if v is not None])
+            # a short batch reached the end: start over from the oldest next time
+            nxt = rows[-1][0] if len(rows) == RECHECK_BATCH else 0
+            db.execute("INSERT OR REPLACE INTO meta VALUES ('recheck_after', ?)", (str(nxt),))
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return len(found)
+
+    def _reconcile(self) -> int:
+        # the table's live (row key, GUID)s into a temp table, then drop docs whose key is
+        # gone and index the keys that are missing → docs removed + rows upserted
+        db = self._db
+        db.execute("CREATE TEMP TABLE IF NOT EXISTS live (row_key TEXT PRIMARY KEY, guid TEXT NOT NULL)")
+        db.execute("DELETE FROM live")
+        try:
+            for tbl in self._keys():
+                db.execute("BEGIN")
+                db.executemany("INSERT OR IGNORE INTO live VALUES (?, ?)",
+                               zip(tbl.column("ROW_KEY").to_pylist(), tbl.column("GUID").to_pylist()))
+                db.execute("COMMIT")
+            db.execute("BEGIN")
+            try:
+                gone = [r[0] for r in db.execute(
+                    "SELECT id FROM docs WHERE row_key NOT IN (SELECT row_key FROM live)").fetchall()]
+                db.executemany("DELETE FROM articles_fts WHERE rowid = ?", [(i,) for i in gone])
+                db.executemany("DELETE FROM docs WHERE id = ?", [(i,) for i in gone])
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+            missing = [r[0] for r in db.execute(
+                "SELECT DISTINCT l.guid FROM live l LEFT JOIN docs d ON d.row_key = l.row_key "
+                "WHERE d.id IS NULL").fetchall()]
+        finally:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            db.execute("DELETE FROM live")
+        n = len(gone)
+        for i in range(0, len(missing), FETCH_BATCH):
+            for tbl in self._rows(missing[i:i + FETCH_BATCH]):
+                n += tbl.num_rows
+                self._upsert(tbl)  # leaves `since` alone: these rows are older than the delta's
+        db.execute("INSERT OR REPLACE INTO meta VALUES ('reconciled_at', ?)", (str(time.time()),))
+        return n
+
+    def _upsert(self, tbl: pa.Table) -> Optional[str]:
+        cols = {c: tbl.column(c).to_pylist() for c in
+                ("GUID", "ROW_KEY", "TITLE", "SUMMARY", "BODY", "PULLED_AT", "PUBLISHED_AT", "SRC_KEY", "SRC_LABEL")}
+        newest = None
+        db = self._db
+        db.execute("BEGIN")
+        try:
+            for guid, key, title, summary, body, pulled, published, src, label in zip(*cols.values()):
+                if not guid:
+                    continue
+                title = title or ""
+                row = (_epoch(pulled), _epoch(published), src, label, title.lower() or None)
+                hit = db.execute("SELECT id FROM docs WHERE row_key = ?", (key,)).fetchone()
+                if hit:
+                    doc_id = hit[0]
+                    db.execute("UPDATE docs SET pulled_at = ?, published_at = ?, src = ?, src_label = ?, "
+                               "title_key = ? WHERE id = ?", (*row, doc_id))
+                    db.execute("DELETE FROM articles_fts WHERE rowid = ?", (doc_id,))
+                else:
+                    doc_id = db.execute("INSERT INTO docs(row_key, guid, pulled_at, published_at, src, src_label, "
+                                        "title_key) VALUES (?, ?, ?, ?, ?, ?, ?)", (key, guid, *row)).lastrowid
+                db.execute("INSERT INTO articles_fts(rowid, title, summary, body) VALUES (?, ?, ?, ?)",
+                           (doc_id, title, summary or "", _tags.sub(" ", body or "")))
+                if pulled is not None:
+                    newest = pulled
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        # rows arrive ordered by PULLED_AT; re-read from the newest one next time (upserts are idempotent)
+        return newest.isoformat() if isinstance(newest, datetime) else newest
+
+    def refresh_async(self, token: Optional[str], max_age_s: float = 300) -> None:
+        """
+        Start a background sync if the table's watermark `token` moved (or, without one, after
+        max_age_s), or a reconcile is due.
+        """
+        due = self._reconcile_due()
+        if token is None and not due:
+            synced = self._meta("synced_at")
+            if synced and time.time() - float(synced) < max_age_s:
+                return
+        with self._state_lock:
+            if self._syncing or (token is not None and token == self._synced_token and not due):
+                return
+            self._syncing = True
+
+        def run():
+            try:
+                self.sync()
+                self._synced_token = token
+                self.last_error = None
+            except Exception as exc:
+                self.last_error = repr(exc)[:500]  # keep serving the last good index
+            finally:
+                self._syncing = False
+        threading.Thread(target=run, name="search-index-sync", daemon=True).start()
+
+    # --- search ---
+
+    def search(self, q: str, sort: str = "relevance", date_col: str = "published_at",
+               start: Optional[float] = None, end: Optional[float] = None,
+               sources: Sequence[str] = (), limit: int = 10, offset: int = 0) -> Tuple[List[Tuple[str, str]], int]:
+        """→ (page of (GUID, row key) in order, total matches). `sources` are lowercase source keys."""
+        expr = match_expr(q)
+        if expr is None:
+            return [], 0
+        if date_col not in ("published_at", "pulled_at"):
+            raise ValueError(date_col)
+        where = ["articles_fts MATCH ?"]
+        args: list = [expr]
+        if start is not None and end is not None:
+            where.append(f"d.{date_col} >= ? AND d.{date_col} <= ?")
+            args += [start, end]
+        if sources:
+            where.append(f"d.src IN ({', '.join('?' * len(sources))})")
+            args += list(sources)
+        # CROSS JOIN pins the join order: MATCH drives, docs is probed by primary key
+        # (otherwise SQLite may scan docs via docs_src and re-run the MATCH per row)
+        base = f"FROM articles_fts CROSS JOIN docs d ON d.id = articles_fts.rowid WHERE {' AND '.join(where)}"
+        with self._rlock:
+            total = self._rdb.execute(f"SELECT COUNT(*) {base}", args).fetchone()[0]
+            rows = self._rdb.execute(
+                f"SELECT d.guid, d.row_key {base} ORDER BY {SORTS[sort]} LIMIT ? OFFSET ?",
+                [*args, int(limit), int(offset)]
+            ).fetchall()
+        return [tuple(r) for r in rows], int(total)
+
+    def facets(self, q: str, date_col: str = "published_at", start: Optional[float] = None,
+               end: Optional[float] = None, sources: Sequence[str] = ()) -> List[Tuple[str, Optional[str], int]]:
+        """
+        → [(facet, value, n)] per source and per UTC day of `date_col`, plus ("total", None, n).
+        Source values are display names (one per lowercase source key).
+        """
+        expr = match_expr(q)
+        if expr is None:
+            return []
+        if date_col not in ("published_at", "pulled_at"):
+            raise ValueError(date_col)
+        where = ["articles_fts MATCH ?"]
+        args: list = [expr]
+        if start is not None and end is not None:
+            where.append(f"d.{date_col} >= ? AND d.{date_col} <= ?")
+            args += [start, end]
+        if sources:
+            where.append(f"d.src IN ({', '.join('?' * len(sources))})")
+            args += list(sources)
+        # one pass over the matches into a temp result, then the three groupings over that
+        hits = (f"SELECT d.src AS src, d.src_label AS src_label, date(d.{date_col}, 'unixepoch') AS day "
+                f"FROM articles_fts CROSS JOIN docs d ON d.id = articles_fts.rowid WHERE {' AND '.join(where)}")
+        with self._rlock:
+            rows = self._rdb.execute(
+                f"WITH hits AS MATERIALIZED ({hits}) "
+                "SELECT 'source', COALESCE(MAX(src_label), src), COUNT(*) FROM hits GROUP BY src "
+                "UNION ALL SELECT 'day', day, COUNT(*) FROM hits GROUP BY day "
+                "UNION ALL SELECT 'total', NULL, COUNT(*) FROM hits", args
+            ).fetchall()
+        return [(f, v, int(n)) for f, v, n in rows]
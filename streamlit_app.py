@@ -11,6 +11,9 @@ import page3_news
 import page5_surveys
 #import page6_executive_summary
 import page6_ai_summary
+import page7_admin
+from db import query_tag
+from warmup import start_warmer
 import os
 import sys
 
@@ -46,6 +49,7 @@ def main():
     # st.cache_resource.clear()
 
     st.set_page_config( layout="wide")
+    start_warmer()  # first run in this process starts the background cache warm-up
     
     render_title(""""Snacklash"\n\n Real-Time Intelligence Dashboard"""
                  )
@@ -64,6 +68,10 @@ def main():
         "Public Opinion": page5_surveys.page5,
         "AI Reporting": page6_ai_summary.page6b,
     }
+    icons = ["graph-up", "newspaper", "twitter", "people-fill", "robot"]
+    if page7_admin.is_admin():
+        pages["Query Performance"] = page7_admin.page7
+        icons.append("speedometer2")
     
     # Register them with page_group
     for name, callback in pages.items():
@@ -73,7 +81,7 @@ def main():
     selected = option_menu(
         menu_title="",
         options=list(pages.keys()),
-        icons=["graph-up", "newspaper", "twitter", "people-fill", "robot"],  # Add icons as needed
+        icons=icons,  # Add icons as needed
         menu_icon="cast",
         default_index=0,
         orientation="horizontal",
@@ -86,7 +94,8 @@ def main():
     )
     
     # Show the selected page
-    pages[selected]()  # ✅ call the function directly
+    with query_tag(selected):  # every query below is attributed to this page
+        pages[selected]()  # ✅ call the function directly
     
     
     st.markdown("""
@@ -0,0 +1,196 @@
+# tweet_cards.py
+### NATIVE TWEET CARDS FROM MART.TWEET_MEDIA ROWS
+# One static HTML document for a whole page of tweets – author, avatar, text, media preview
+# and metrics straight from the warehouse row – instead of one widgets.js iframe per tweet.
+# Every card has a fixed height estimated from the row (text boxes get ~CHARS_PER_LINE per
+# line, clamped to at most TEXT_LINES and cut off with an ellipsis when the estimate is short),
+# so the page paints in one pass and the component height is known up front.
+# Each card keeps an "Embed" button that swaps in the official embed on demand; widgets.js
+# is only fetched the first time one is clicked. feed_document is the same cards in a
+# virtualized scroller for long windows (Social Conversation's infinite feed).
+from __future__ import annotations
+import html, json, math, re
+from datetime import datetime
+from typing import Dict, Optional, Sequence, Tuple
+
+WIDTH = 600
+TEXT_LINES = 6
+CHARS_PER_LINE = 68      # ~15px system font in a WIDTH-wide card
+LINE_H = 21
+HEADER_H = 48
+MEDIA_H = 260
+METRICS_H = 30
+PAD = 14
+GAP = 12
+
+THEMES = {
+    "dark":  {"bg": "#15202b", "card": "#192734", "fg": "#e7e9ea", "muted": "#8b98a5", "border": "#2f3b47", "link": "#1d9bf0"},
+    "light": {"bg": "#ffffff", "card": "#ffffff", "fg": "#0f1419", "muted": "#536471", "border": "#cfd9de", "link": "#1d9bf0"},
+}
+
+_ID_RE = re.compile(r"(?:status/|status%2F|i/web/status/)(\d+)")
+
+
+def tweet_id(row: Dict) -> Optional[str]:
+    # queries select TWEET_ID as VARCHAR; a float (pandas upcast of a numeric column with
+    # NULLs) has lost digits past 2**53, so the URL's id is used instead
+    tid = row.get("TWEET_ID")
+    if isinstance(tid, (str, int)) and not isinstance(tid, bool) and str(tid).strip():
+        return str(tid).strip()
+    m = _ID_RE.search(str(row.get("TWEET_URL") or ""))
+    return m.group(1) if m else None
+
+def _safe_url(u) -> Optional[str]:
+    u = str(u or "").strip()
+    return html.escape(u, quote=True) if u.startswith(("https://", "http://")) else None
+
+def _compact(n) -> str:
+    if n is None:
+        return "0"
+    n = int(n)
+    for div, suffix in ((1_000_000, "M"), (1_000, "K")):
+        if n >= div:
+            return f"{n / div:.1f}".rstrip("0").rstrip(".") + suffix
+    return str(n)
+
+def _when(ts) -> str:
+    if isinstance(ts, datetime):
+        return ts.strftime("%b %d, %Y · %H:%M")
+    return str(ts or "")
+
+def _text_lines(text: str) -> int:
+    lines = sum(max(1, math.ceil(len(part) / CHARS_PER_LINE)) for part in (text or "").split("\n"))
+    return min(TEXT_LINES, lines) if text else 0
+
+def card_height(row: Dict) -> int:
+    """Estimated height of one card in px; the card box is fixed to it (text clamps to fit)."""
+    h = 2 * PAD + HEADER_H + _text_lines(row.get("TWEET_TEXT") or "") * LINE_H + METRICS_H
+    if _safe_url(row.get("MEDIA_URL")):
+        h += MEDIA_H + 8
+    return h
+
+def card_html(row: Dict) -> str:
+    tid = tweet_id(row) or ""
+    name = html.escape(str(row.get("AUTHOR_NAME") or row.get("AUTHOR_USERNAME") or "Unknown"))
+    handle = html.escape(str(row.get("AUTHOR_USERNAME") or ""))
+    avatar = _safe_url(row.get("AUTHOR_PROFILE_IMAGE_URL"))
+    avatar_html = (f'<img class="av" src="{avatar}" loading="lazy" alt="">' if avatar
+                   else f'<div class="av ph">{html.escape(name[:1].upper())}</div>')
+    link = _safe_url(row.get("TWEET_URL")) or "#"
+    raw = str(row.get("TWEET_TEXT") or "")
+    text, lines = html.escape(raw), _text_lines(raw)
+    media = _safe_url(row.get("MEDIA_URL"))
+    media_html = ""
+    if media:
+        badge = '<span class="play">▶</span>' if str(row.get("MEDIA_TYPE") or "").lower() in ("video", "animated_gif") else ""
+        media_html = f'<a class="media" href="{link}" target="_blank" rel="noopener"><img src="{media}" loading="lazy" alt="">{badge}</a>'
+    metrics = " ".join(
+        f'<span title="{label}">{icon} {_compact(row.get(col))}</span>'
+        for col, icon, label in (("REPLY_COUNT", "💬", "Replies"), ("RETWEET_COUNT", "🔁", "Reposts"),
+                                 ("LIKE_COUNT", "♥", "Likes"), ("QUOTE_COUNT", "❝", "Quotes"))
+    )
+    embed_btn = f'<button class="emb" data-id="{html.escape(tid)}">Embed</button>' if tid else ""
+    return f"""<div class="card" id="t-{html.escape(tid)}" style="height:{card_height(row)}px">
+  <div class="hd">{avatar_html}<div class="who"><b>{name}</b><span>@{handle} · {html.escape(_when(row.get("CREATED_AT")))}</span></div>
+    <a class="open" href="{link}" target="_blank" rel="noopener">Open ↗</a></div>
+  <div class="tx" style="-webkit-line-clamp:{lines};height:{lines * LINE_H}px">{text}</div>{media_html}
+  <div class="mx">{metrics}{embed_btn}</div>
+</div>"""
+
+def _style(c: Dict) -> str:
+    return f"""<style>
+  html,body {{ margin:0; background:{c["bg"]}; font:15px/{LINE_H}px -apple-system,"Segoe UI",Roboto,Helvetica,Arial,sans-serif; color:{c["fg"]}; }}
+  #wrap {{ width:{WIDTH}px; max-width:100%; margin:{GAP}px auto; }}
+  .card {{ box-sizing:border-box; padding:{PAD}px; margin:0 0 {GAP}px; background:{c["card"]}; border:1px solid {c["border"]}; border-radius:14px; overflow:hidden; }}
+  .hd {{ display:flex; align-items:center; gap:10px; height:{HEADER_H}px; }}
+  .av {{ width:40px; height:40px; border-radius:50%; flex:none; object-fit:cover; }}
+  .ph {{ display:flex; align-items:center; justify-content:center; background:{c["border"]}; font-weight:700; }}
+  .who {{ display:flex; flex-direction:column; min-width:0; flex:1; line-height:18px; }}
+  .who span {{ color:{c["muted"]}; font-size:13px; white-space:nowrap; overflow:hidden; text-overflow:ellipsis; }}
+  .open {{ color:{c["link"]}; text-decoration:none; font-size:13px; }}
+  .tx {{ white-space:pre-wrap; overflow-wrap:anywhere; display:-webkit-box; -webkit-box-orient:vertical; overflow:hidden; }}
+  .media {{ position:relative; display:block; height:{MEDIA_H}px; margin-top:8px; border-radius:12px; overflow:hidden; background:{c["border"]}; }}
+  .media img {{ width:100%; height:100%; object-fit:cover; }}
+  .play {{ position:absolute; left:50%; top:50%; transform:translate(-50%,-50%); font-size:40px; color:#fff; text-shadow:0 0 8px #000; }}
+  .mx {{ display:flex; gap:18px; align-items:center; height:{METRICS_H}px; color:{c["muted"]}; font-size:13px; }}
+  .emb {{ margin-left:auto; background:none; border:1px solid {c["border"]}; color:{c["muted"]}; border-radius:12px; padding:2px 10px; cursor:pointer; }}
+  .card.embedded {{ height:auto !important; padding:0; border:none; background:none; }}
+</style>"""
+
+def _embed_js(theme: str) -> str:
+    return f"""
+  // official embed only for cards the reader asks for; widgets.js loads on first use
+  let loading = null;
+  function widgets() {{
+    if (window.twttr && twttr.widgets) return Promise.resolve(twttr);
+    if (!loading) loading = new Promise(res => {{
+      const s = document.createElement("script");
+      s.src = "https://platform.twitter.com/widgets.js"; s.async = true;
+      s.onload = () => (function wait() {{ (window.twttr && twttr.widgets) ? res(twttr) : setTimeout(wait, 50); }})();
+      document.body.appendChild(s);
+    }});
+    return loading;
+  }}
+  document.addEventListener("click", ev => {{
+    const b = ev.target.closest(".emb"); if (!b) return;
+    const card = document.getElementById("t-" + b.dataset.id);
+    b.disabled = true; b.textContent = "Loading…";
+    const slot = card.closest(".slot");
+    if (slot) {{ slot.classList.add("pinned"); slot.style.height = "auto"; }}  // feed: keep mounted, let it grow
+    widgets().then(t => {{
+      card.innerHTML = ""; card.classList.add("embedded");
+      t.widgets.createTweet(b.dataset.id, card, {{ theme: {json.dumps(theme)}, conversation: "none", align: "center" }});
+    }});
+  }});"""
+
+def cards_document(rows: Sequence[Dict], theme: str = "dark") -> Tuple[str, int]:
+    """→ (HTML for components.html, height in px: the fixed card heights + gaps) for a page of tweet rows."""
+    c = THEMES.get(theme, THEMES["dark"])
+    cards = "\n".join(card_html(r) for r in rows)
+    height = sum(card_height(r) + GAP for r in rows) + 2 * GAP
+    doc = f"""<!doctype html><meta charset="utf-8"/>
+{_style(c)}
+<div id="wrap">{cards}</div>
+<script>{_embed_js(theme)}
+</script>"""
+    return doc, height
+
+def feed_document(rows: Sequence[Dict], theme: str = "dark", start: int = 0) -> str:
+    """
+    Virtualized feed for components.html (give it a fixed height and scrolling=True):
+    every row gets a slot of its fixed card height, and only slots near the viewport
+    hold a card – off-screen ones are emptied again, so the DOM stays a few screens deep
+    however long the window is. Opens scrolled to row `start`.
+    """
+    c = THEMES.get(theme, THEMES["dark"])
+    slots = [[card_height(r) + GAP, card_html(r)] for r in rows]
+    # "</" can't appear inside the <script> block
+    data = json.dumps(slots).replace("</", "<\\/")
+    return f"""<!doctype html><meta charset="utf-8"/>
+{_style(c)}
+<style> .slot {{ overflow:hidden; }} </style>
+<div id="wrap"></div>
+<script>
+  const SLOTS = {data};
+  const wrap = document.getElementById("wrap");
+  const io = new IntersectionObserver(entries => {{
+    for (const e of entries) {{
+      const slot = e.target;
+      if (e.isIntersecting) {{
+        if (!slot.firstChild) slot.innerHTML = SLOTS[slot.dataset.i][1];
+      }} else if (slot.firstChild && !slot.classList.contains("pinned")) {{
+        slot.textContent = "";  // recycle: the slot keeps its height, the card's nodes go
+      }}
+    }}
+  }}, {{ rootMargin: "1200px 0px" }});
+  const frag = document.createDocumentFragment();
+  SLOTS.forEach(([h], i) => {{
+    const slot = document.createElement("div");
+    slot.className = "slot"; slot.dataset.i = i; slot.style.height = h + "px";
+    frag.appendChild(slot); io.observe(slot);
+  }});
+  wrap.appendChild(frag);
+  const first = wrap.children[{int(start)}];
+  if (first) window.scrollTo(0, first.offsetTop - {GAP});
+{_embed_js(theme)}
+</script>"""
@@ -0,0 +1,205 @@
+# warmup.py
+### BACKGROUND WARM-UP OF THE LANDING VIEWS
+# A daemon thread pre-runs what a fresh visitor would otherwise pay for: the Overview
+# widget queries, the Overview tweet screenshots (Playwright), the News Coverage source
+# list, first page and keyword search index, and the Social Conversation first page.
+# It runs once at startup and then every WARMUP_INTERVAL_S, so the local/shared result
+# caches and the PNG disk cache are already warm (and kept warm across watermark moves)
+# when a user arrives.
+#
+#   in the app:   start_warmer() (called by streamlit_app.main, once per process)
+#   before boot:  python warmup.py --once   (fills QUERY_CACHE_PATH / redis + PNGs, exit 0 when warm)
+#
+# Readiness: Warmer.ready is True once every job has succeeded within the last
+# 2 intervals; WARMUP_READY_FILE (optional) is touched while warm and removed while
+# cold, for container readiness probes (`test -f ...`).
+from __future__ import annotations
+import threading, time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import streamlit as st
+
+from config import setting
+
+Job = Tuple[str, Callable[[], Any]]
+
+
+class Warmer:
+    def __init__(self, jobs: List[Job], interval_s: float = 240, ready_file: Optional[str] = None):
+        self.jobs = list(jobs)
+        self.interval_s = float(interval_s)
+        self.ready_file = Path(ready_file).expanduser() if ready_file else None
+        self._state: Dict[str, Dict[str, Any]] = {
+            name: {"ok_at": None, "last_run": None, "wall_ms": None, "error": None} for name, _ in self.jobs
+        }
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at: Optional[float] = None
+        self.cycles = 0
+
+    def run_once(self) -> bool:
+        """Run every job in order (a failing job doesn't stop the others) → ready."""
+        from query_log import query_tag
+        for name, fn in self.jobs:
+            if self._stop.is_set():
+                break
+            t0 = time.perf_counter()
+            err = None
+            try:
+                with query_tag(f"warmup:{name}"):
+                    fn()
+            except Exception as exc:
+                err = repr(exc)[:500]
+            with self._lock:
+                s = self._state[name]
+                s["last_run"] = time.time()
+                s["wall_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+                s["error"] = err
+                if err is None:
+                    s["ok_at"] = s["last_run"]
+        with self._lock:
+            self.cycles += 1
+        ready = self.ready
+        self._mark_ready_file(ready)
+        return ready
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval_s)
+
+    def start(self) -> "Warmer":
+        if self._thread is None:
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._loop, name="warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    @property
+    def ready(self) -> bool:
+        horizon = time.time() - 2 * self.interval_s
+        with self._lock:
+            return all(s["ok_at"] is not None and s["ok_at"] >= horizon for s in self._state.values())
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs = {name: dict(s) for name, s in self._state.items()}
+            cycles = self.cycles
+        return {"ready": self.ready, "cycles": cycles, "started_at": self.started_at,
+                "interval_s": self.interval_s, "jobs": jobs}
+
+    def _mark_ready_file(self, ready: bool) -> None:
+        if not self.ready_file:
+            return
+        try:
+            if ready:
+                self.ready_file.parent.mkdir(parents=True, exist_ok=True)
+                self.ready_file.touch()
+            else:
+                self.ready_file.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+# --- what gets warmed ------------------------------------------------------
+
+def _overview_queries():
+    from db import fetch_many
+    from queries import spec
+    from page1.parse_rss import rss_spec
+    from page1.widget2 import NEWS_LIMIT
+    from page1.widget3 import TWEETS_LIMIT
+    # the exact specs page1.main prefetches, so the first Overview render is all hits
+    fetch_many({
+        "news": rss_spec(NEWS_LIMIT),
+        "tweets": spec("tweets.recent_urls", {"limit": TWEETS_LIMIT}),
+    })
+
+def _overview_tweet_images():
+    # renders (and writes to the PNG disk cache) any recent tweet that has no screenshot yet
+    from page1.cache_tweets import get_recent_tweet_images_b64_and_urls
+    from page1.widget3 import TWEETS_LIMIT
+    get_recent_tweet_images_b64_and_urls(limit=TWEETS_LIMIT)
+
+def _news_sources():
+    from page3_news.streamlit_app import source_options
+    source_options(None, None)
+
+def _news_first_page():
+    from db import fetch_many
+    from page3_news.streamlit_app import default_specs
+    fetch_many(default_specs(), as_arrow=True)
+
+def _tweets_first_page():
+    from db import fetch_many
+    from queries import spec
+    from page2_twitter.streamlit_app import PAGE_SIZE_DEFAULT
+    fetch_many({
+        "count": spec("tweets.count"),
+        "page": spec("tweets.page_cards", {"limit": PAGE_SIZE_DEFAULT, "offset": 0}),
+    })
+
+def _search_index():
+    # first build can take a while on a big table; later runs only read the PULLED_AT delta
+    from db import get_search_index
+    from page3_news.streamlit_app import FQT
+    get_search_index(FQT, wait=True)
+
+def _normalize():
+    # NORMALIZE_IN_APP=1: fill PUBLISHED_AT / SOURCE_ID for newly ingested rows (needs DDL/DML rights)
+    from normalize import normalize, normalize_in_app
+    from page3_news.streamlit_app import FQT
+    if normalize_in_app():
+        normalize(FQT)
+
+def _watermarks():
+    from db import get_watermarks
+    get_watermarks().refresh()
+
+DEFAULT_JOBS: List[Job] = [
+    ("watermarks", _watermarks),
+    ("news.normalize", _normalize),   # before anything that reads PUBLISHED_AT / SOURCE_ID
+    ("overview.queries", _overview_queries),
+    ("news.sources", _news_sources),
+    ("news.first_page", _news_first_page),
+    ("tweets.first_page", _tweets_first_page),
+    ("search.index", _search_index),
+    ("overview.tweet_images", _overview_tweet_images),  # last: Playwright is the slow one
+]
+
+
+def make_warmer(jobs: Optional[List[Job]] = None) -> Warmer:
+    return Warmer(
+        DEFAULT_JOBS if jobs is None else jobs,
+        interval_s=float(setting("WARMUP_INTERVAL_S", 240)),  # below QUERY_CACHE_TTL_S
+        ready_file=setting("WARMUP_READY_FILE"),
+    )
+
+@st.cache_resource
+def start_warmer() -> Optional[Warmer]:
+    # one warm-up thread per server process; WARMUP_ENABLED=0 turns it off
+    if str(setting("WARMUP_ENABLED", "1")).lower() in ("0", "false", "no", "off"):
+        return None
+    return make_warmer().start()
+
+def is_warm() -> bool:
+    w = start_warmer()
+    return w is None or w.ready
+
+
+if __name__ == "__main__":
+    import argparse, json, sys
+    ap = argparse.ArgumentParser(description="Warm the shared query cache and tweet PNG cache")
+    ap.add_argument("--once", action="store_true", help="one pass, exit 0 when warm / 1 when not")
+    args = ap.parse_args()
+    w = make_warmer()
+    if args.once:
+        ok = w.run_once()
+        print(json.dumps(w.status(), indent=2, default=str))
+        sys.exit(0 if ok else 1)
+    w.start()._thread.join()
@@ -0,0 +1,92 @@
+# watermarks.py
+### FRESHNESS PROBES: cached results live until their table's watermark moves
+# Every registered table gets one cheap aggregate (MAX(<ts col>) + COUNT(*), both
+# served from Snowflake metadata). The probes run at most once per interval per process,
+# one query per table (a table that can't be reached only drops itself back to TTLs);
+# fetch_arrow folds the resulting version token into its cache key, so a new PULLED_AT /
+# CREATED_AT naturally misses and everything else hits. RSS_ARTICLES is registered by
+# fully-qualified name: the Overview reads SNACKLASH2's, News Coverage the client_db's.
+from __future__ import annotations
+import re, threading, time
+from typing import Callable, Dict, List, Optional, Tuple
+
+def default_tables(client_db: str = "SNACKLASH2") -> Dict[str, Tuple[str, str]]:
+    """name (as it appears in SQL) → (fully-qualified table, watermark column)."""
+    tables = {"MART.TWEET_MEDIA": ("MART.TWEET_MEDIA", "CREATED_AT")}
+    for db in dict.fromkeys(["SNACKLASH2", client_db]):
+        fq = f"{db}.RAW.RSS_ARTICLES"
+        tables[fq] = (fq, "PULLED_AT")
+    return tables
+
+
+class WatermarkRegistry:
+    def __init__(self, run_probe: Callable[[str], "object"], interval_s: float = 60):
+        # run_probe(sql) → pyarrow.Table with columns T, WM
+        self._run_probe = run_probe
+        self.interval_s = float(interval_s)
+        self._tables: Dict[str, Tuple[str, str]] = {}
+        self._patterns: Dict[str, re.Pattern] = {}
+        self._marks: Dict[str, str] = {}
+        self._probed_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def register(self, name: str, fq_table: str, column: str) -> None:
+        with self._lock:
+            self._tables[name] = (fq_table, column)
+            # not preceded by "." either: "RAW.X" must not match "OTHERDB.RAW.X"
+            self._patterns[name] = re.compile(r"(?<![\w$.])" + re.escape(name) + r"(?![\w$])", re.I)
+            self._probed_at = 0.0  # new table → probe on next use
+
+    def tables_in(self, sql: str) -> List[str]:
+        return sorted(n for n, p in self._patterns.items() if p.search(sql))
+
+    def probe_sql(self, name: str) -> str:
+        fq, col = self._tables[name]
+        return (f"SELECT '{name}' AS T, "
+                f"COALESCE(CAST(MAX({col}) AS VARCHAR), '') || '#' || CAST(COUNT(*) AS VARCHAR) AS WM "
+                f"FROM {fq}")
+
+    def refresh(self, force: bool = False) -> Dict[str, str]:
+        with self._lock:
+            if not self._tables:
+                return {}
+            due = force or time.monotonic() - self._probed_at >= self.interval_s
+            if not due or (self._probing and self._marks):
+                # while one caller probes, everyone else keeps using the last marks
+                return dict(self._marks)
+            self._probing = True
+            sqls = {name: self.probe_sql(name) for name in sorted(self._tables)}
+        marks = {}
+        for name, sql in sqls.items():
+            try:
+                tbl = self._run_probe(sql)
+                marks.update(zip(tbl.column("T").to_pylist(), tbl.column("WM").to_pylist()))
+            except Exception:
+                pass  # this table falls back to plain TTLs until its next probe works
+        with self._lock:
+            self._marks = marks
+            self._probed_at = time.monotonic()
+            self._probing = False
+            return dict(self._marks)
+
+    def current(self, name: str) -> Optional[str]:
+        return self.refresh().get(name)
+
+    def token_for(self, sql: str) -> Optional[str]:
+        """Version token for the registered tables `sql` reads, or None if any is unknown."""
+        names = self.tables_in(sql)
+        if not names:
+            return None
+        marks = self.refresh()
+        if any(marks.get(n) is None for n in names):
+            return None
+        return ";".join(f"{n}={marks[n]}" for n in names)
+
+
+def default_registry(run_probe: Callable[[str], "object"], interval_s: float = 60,
+                     client_db: str = "SNACKLASH2") -> WatermarkRegistry:
+    reg = WatermarkRegistry(run_probe, interval_s)
+    for name, (fq, col) in default_tables(client_db).items():
+        reg.register(name, fq, col)
+    return reg